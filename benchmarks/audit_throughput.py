@@ -0,0 +1,205 @@
+"""Audit log throughput, behaviour on a slow disk, and cost per enforcement check.
+
+* ``sustained`` – feeds ``--rate`` events per second for ``--seconds`` into
+  an :class:`~microphone_guardian.audit.AuditLog` with small rotating files,
+  and requires every event to be written with none dropped.
+* ``burst`` – pushes ``--burst`` events as fast as one thread can and reports
+  how many the writer kept up with; the rest must be counted as dropped.
+* ``slow disk`` – the same burst against a file whose writes take 200 ms.
+  ``record`` must still return at once, and the overflow must be dropped and
+  counted rather than block.
+* ``tick latency`` – enforcement checks paced at ``--rate`` per second in
+  real time, each one correcting the level and so producing an audited
+  event. Latency is compared with and without the audit log attached, in
+  ``--repeat`` interleaved rounds of ``--round-seconds``.
+
+Exits non-zero if any of these fails, or if the audit log adds more than
+``--budget-us`` to the median check in the median round, so one round
+disturbed by other load on the machine does not decide the result.
+
+    python benchmarks/audit_throughput.py --rate 5000 --seconds 2
+"""
+
+import argparse
+import glob
+import io
+import os
+import sys
+import tempfile
+import time
+from typing import Dict, List, Optional, Tuple
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from microphone_guardian.audit import AuditLog  # noqa: E402
+from microphone_guardian.engine import EnforcementEvent  # noqa: E402
+from microphone_guardian.simulated import FakeClock, demo_source  # noqa: E402
+from microphone_guardian.worker import EnforcementSettings, EnforcementWorker, WorkerCommand  # noqa: E402
+
+MAX_BYTES = 256 * 1024
+BACKUPS = 3
+
+
+class SlowFile(io.StringIO):
+    def __init__(self, delay: float) -> None:
+        super().__init__()
+        self.delay = delay
+
+    def write(self, data: str) -> int:
+        time.sleep(self.delay)
+        return len(data)
+
+
+def events(count: int) -> List[EnforcementEvent]:
+    kinds = [
+        EnforcementEvent("corrected", 1.0, payload=0.42, device_id="{0.0.1.00000000}.{mic-1}"),
+        EnforcementEvent("verified", 1.0, device_id="{0.0.1.00000000}.{mic-1}"),
+        EnforcementEvent("error", 1.0, "simulated endpoint failure", device_id="{0.0.1.00000000}.{mic-2}"),
+        EnforcementEvent("contention", 0.6, "Another application keeps changing the level.", True, "{mic-3}"),
+    ]
+    return [kinds[index % len(kinds)] for index in range(count)]
+
+
+def audited(batch: List[EnforcementEvent]) -> int:
+    return sum(event.kind != "verified" for event in batch)
+
+
+def sustained(directory: str, rate: float, seconds: float) -> bool:
+    log = AuditLog(os.path.join(directory, "sustained", "audit.jsonl"), max_bytes=MAX_BYTES, backups=BACKUPS).start()
+    batch = events(int(rate * seconds))
+    began = time.perf_counter()
+    for index, event in enumerate(batch):
+        due = began + index / rate
+        while time.perf_counter() < due:
+            pass
+        log.record(event)
+    log.close()
+    files = glob.glob(log.path + "*")
+    largest = max(os.path.getsize(path) for path in files)
+    print(
+        f" sustained: {len(batch)} events at {rate:.0f}/s, {log.written} written in {log.batches} batches, "
+        f"{log.dropped} dropped, {log.rotations} rotations, {len(files)} files (largest {largest / 1024:.0f} KiB)"
+    )
+    ok = log.dropped == 0 and log.written == audited(batch)
+    ok = ok and len(files) <= BACKUPS + 1 and largest <= MAX_BYTES and log.rotations > 0
+    if not ok:
+        print("FAIL: the sustained rate lost events or did not rotate within limits")
+    return ok
+
+
+def burst(log: AuditLog, count: int, label: str) -> Tuple[AuditLog, List[float]]:
+    batch = events(count)
+    timings = []
+    began = time.perf_counter()
+    for event in batch:
+        started = time.perf_counter()
+        log.record(event)
+        timings.append(time.perf_counter() - started)
+    produced = time.perf_counter() - began
+    log.close(timeout=30.0)
+    drained = time.perf_counter() - began
+    timings.sort()
+    print(
+        f"{label:>10}: {audited(batch)} audited events offered in {produced * 1000:.0f} ms, "
+        f"{log.written} written, {log.dropped} dropped, drained after {drained:.2f} s  "
+        f"record p99 {timings[int(0.99 * len(timings))] * 1e6:.1f} µs max {timings[-1] * 1e6:.0f} µs"
+    )
+    return log, timings
+
+
+def tick_latency(devices: int, rate: float, seconds: float, log: Optional[AuditLog]) -> List[float]:
+    """Sorted wall-clock seconds per endpoint check, with checks paced at ``rate``; every check corrects."""
+    clock = FakeClock()
+    source = demo_source(devices)
+    post = log.tee(lambda event: None) if log is not None else (lambda event: None)
+    worker = EnforcementWorker(source, post=post, clock=clock)
+    worker.registry.start()
+    for device_id in source.devices:
+        settings = EnforcementSettings(interval=1.0, instant=False, contention="off")
+        worker.handle(WorkerCommand("start", (device_id, settings)))
+        worker.enforcers[device_id].backoff.factor = 1.0
+    volumes = [device.EndpointVolume for device in source.devices.values()]
+    latencies = []
+    started = time.perf_counter()
+    while len(latencies) < rate * seconds:
+        clock.now = worker.scheduler.next_deadline()
+        for volume in volumes:
+            volume.level = 0.5
+        due = started + len(latencies) / rate
+        while time.perf_counter() < due:
+            pass
+        began = time.perf_counter()
+        checks = worker.run_due()
+        latencies.extend([(time.perf_counter() - began) / checks] * checks)
+    return sorted(latencies)
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rate", type=float, default=5000.0)
+    parser.add_argument("--seconds", type=float, default=2.0)
+    parser.add_argument("--round-seconds", type=float, default=0.5, help="length of each tick latency run")
+    parser.add_argument("--burst", type=int, default=50000)
+    parser.add_argument("--devices", type=int, default=20)
+    parser.add_argument("--repeat", type=int, default=7)
+    parser.add_argument("--budget-us", type=float, default=10.0, help="allowed extra median cost per check")
+    args = parser.parse_args()
+
+    failed = False
+    with tempfile.TemporaryDirectory() as directory:
+        failed |= not sustained(directory, args.rate, args.seconds)
+
+        fast, _timings = burst(
+            AuditLog(os.path.join(directory, "burst", "audit.jsonl"), max_bytes=MAX_BYTES, backups=BACKUPS).start(),
+            args.burst,
+            "burst",
+        )
+        offered = audited(events(args.burst))
+        if fast.written + fast.dropped != offered:
+            print("FAIL: events were neither written nor counted as dropped")
+            failed = True
+
+        slow_path = os.path.join(directory, "slow", "audit.jsonl")
+        slow_log = AuditLog(slow_path, queue_size=1000, sync=False, opener=lambda path: SlowFile(0.2))
+        slow, timings = burst(slow_log.start(), args.burst, "slow disk")
+        if not slow.dropped or slow.written + slow.dropped != offered or timings[int(0.999 * len(timings))] > 0.001:
+            print("FAIL: a slow disk blocked the caller instead of dropping events")
+            failed = True
+
+        baseline: Dict[str, float] = {}
+        with_log: Dict[str, float] = {}
+        overheads = []
+        for _ in range(args.repeat):  # interleaved so drift in machine load hits both sides
+            medians = []
+            for results, audit in ((baseline, False), (with_log, True)):
+                log = AuditLog(os.path.join(directory, "ticks", "audit.jsonl")).start() if audit else None
+                latencies = tick_latency(args.devices, args.rate, args.round_seconds, log)
+                if log is not None:
+                    log.close()
+                for name, fraction in (("median", 0.5), ("p99", 0.99)):
+                    value = latencies[int(fraction * len(latencies))]
+                    results[name] = min(results.get(name, value), value)
+                medians.append(latencies[len(latencies) // 2])
+            overheads.append((medians[1] - medians[0]) * 1e6)
+        for name in ("median", "p99"):
+            print(
+                f"check {name:>6} at {args.rate:.0f}/s: {baseline[name] * 1e6:7.2f} us without audit log, "
+                f"{with_log[name] * 1e6:7.2f} us with it (best of {args.repeat})"
+            )
+        overheads.sort()
+        overhead = overheads[len(overheads) // 2]
+        print(
+            f"median overhead: {overhead:.2f} us per check in the median round "
+            f"(rounds range {overheads[0]:.2f} to {overheads[-1]:.2f} us)  budget: {args.budget_us:g} us"
+        )
+        if overhead > args.budget_us:
+            print("FAIL: the audit log slows enforcement checks down too much")
+            failed = True
+    if failed:
+        return 1
+    print("OK")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,83 @@
+"""Correction cost while another application keeps pulling the level down.
+
+Runs one simulated endpoint whose "automatic gain" adversary re-drifts it
+``--rate`` times per second, once per contention strategy, for
+``--seconds`` of fake time. Reports endpoint writes per minute and the share
+of checks that found the level on target. When a fight is detected, exits
+non-zero unless the ``backoff`` and ``rate-limit`` strategies cut writes to
+at most ``--max-ratio`` of what ``off`` (plain correction) writes.
+
+    python benchmarks/contention.py --rate 1 --pull-to 0.7 --seconds 600
+"""
+
+import argparse
+import os
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from microphone_guardian.engine import CONTENTION_STRATEGIES  # noqa: E402
+from microphone_guardian.simulated import (  # noqa: E402
+    AdversarialEndpointVolume,
+    FakeClock,
+    FakeDevice,
+    FakeEndpointSource,
+)
+from microphone_guardian.worker import EnforcementSettings, EnforcementWorker, WorkerCommand  # noqa: E402
+
+
+def run(strategy: str, args: argparse.Namespace) -> dict:
+    clock = FakeClock()
+    device = FakeDevice("{0.0.1.00000000}.{contended}", "Microphone (contended)")
+    device.EndpointVolume = AdversarialEndpointVolume(clock, rate=args.rate, pull_to=args.pull_to)
+    worker = EnforcementWorker(FakeEndpointSource([device]), clock=clock)
+    worker.registry.start()
+    settings = EnforcementSettings(interval=args.interval_ms / 1000.0, instant=False, contention=strategy)
+    worker.handle(WorkerCommand("start", (device.id, settings)))
+    enforcer = worker.enforcers[device.id]
+    while clock.now < args.seconds:
+        clock.now = worker.scheduler.next_deadline()
+        worker.run_due()
+    stats = enforcer.stats
+    return {
+        "writes": stats.writes,
+        "writes_per_minute": stats.writes * 60.0 / args.seconds,
+        "on_target": stats.skipped_writes / max(1, stats.reads),
+        "fights": stats.fights,
+        "yielded": stats.yielded,
+        "pulls": device.EndpointVolume.pulls,
+    }
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rate", type=float, default=1.0, help="adversary pulls per second")
+    parser.add_argument("--pull-to", type=float, default=0.7, help="level the adversary pulls to")
+    parser.add_argument("--interval-ms", type=float, default=250.0)
+    parser.add_argument("--seconds", type=float, default=600.0, help="simulated duration")
+    parser.add_argument("--max-ratio", type=float, default=0.5, help="allowed writes relative to 'off'")
+    args = parser.parse_args()
+
+    results = {strategy: run(strategy, args) for strategy in CONTENTION_STRATEGIES}
+    print(f"{'strategy':11s} {'writes':>7s} {'writes/min':>10s} {'on target':>9s} {'fights':>6s} {'yielded':>7s}")
+    for strategy, result in results.items():
+        print(
+            f"{strategy:11s} {result['writes']:7d} {result['writes_per_minute']:10.1f} "
+            f"{result['on_target'] * 100:8.1f}% {result['fights']:6d} {result['yielded']:7d}"
+        )
+    baseline = max(1, results["off"]["writes"])
+    if not results["backoff"]["fights"]:
+        print("No fight detected at this pull rate; plain correction is cheap enough.")
+        return 0
+    failed = [
+        strategy for strategy in ("backoff", "rate-limit") if results[strategy]["writes"] > baseline * args.max_ratio
+    ]
+    if failed:
+        print(f"FAIL: {', '.join(failed)} did not cut writes below {args.max_ratio:.0%} of plain correction")
+        return 1
+    print("OK")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
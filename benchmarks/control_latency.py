@@ -0,0 +1,127 @@
+"""Round-trip latency of control commands, alone and under a burst.
+
+Starts an enforcement worker on ``--devices`` simulated endpoints with a
+control server in a temporary directory, then measures:
+
+* one client sending ``--requests`` status requests one at a time, and
+* ``--clients`` clients at once, each pipelining ``--burst`` mixed requests
+  (ping, status, list-devices, set-target) without waiting for answers.
+
+``--transport tcp`` measures the loopback transport used on Windows.
+Latency runs from sending a request to reading its response. Exits non-zero
+if any request fails or the burst p99 exceeds ``--budget-ms``.
+
+    python benchmarks/control_latency.py --clients 8 --burst 20
+"""
+
+import argparse
+import os
+import statistics
+import sys
+import tempfile
+import threading
+import time
+from typing import List
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from microphone_guardian.control import ControlClient, ControlError, ControlServer, WorkerControl  # noqa: E402
+from microphone_guardian.simulated import demo_source  # noqa: E402
+from microphone_guardian.worker import EnforcementSettings, EnforcementWorker  # noqa: E402
+
+MIX = (("ping", {}), ("status", {}), ("list-devices", {}), ("set-target", {"target": 90}))
+
+
+def percentile(samples: List[float], fraction: float) -> float:
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(fraction * len(ordered)))]
+
+
+def report(label: str, samples: List[float]) -> None:
+    print(
+        f"{label:>10}: {len(samples)} requests  median {statistics.median(samples) * 1000:.2f} ms  "
+        f"p99 {percentile(samples, 0.99) * 1000:.2f} ms  max {max(samples) * 1000:.2f} ms"
+    )
+
+
+def sequential(directory: str, count: int) -> List[float]:
+    latencies = []
+    with ControlClient(directory) as client:
+        for _ in range(count):
+            began = time.perf_counter()
+            client.request("status")
+            latencies.append(time.perf_counter() - began)
+    return latencies
+
+
+def burst(directory: str, clients: int, count: int, errors: List[str]) -> List[float]:
+    latencies: List[float] = []
+    lock = threading.Lock()
+    ready = threading.Barrier(clients)
+
+    def client_thread() -> None:
+        with ControlClient(directory) as client:
+            sent = []
+            ready.wait()
+            for index in range(count):
+                command, arguments = MIX[index % len(MIX)]
+                client.send(command, **arguments)
+                sent.append(time.perf_counter())
+            for began in sent:
+                try:
+                    client.receive()
+                except ControlError as exc:
+                    errors.append(str(exc))
+                with lock:
+                    latencies.append(time.perf_counter() - began)
+
+    threads = [threading.Thread(target=client_thread) for _ in range(clients)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return latencies
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--devices", type=int, default=4)
+    parser.add_argument("--requests", type=int, default=500)
+    parser.add_argument("--clients", type=int, default=8)
+    parser.add_argument("--burst", type=int, default=20)
+    parser.add_argument("--budget-ms", type=float, default=100.0)
+    parser.add_argument("--transport", choices=("unix", "tcp"), help="default: what the platform would use")
+    args = parser.parse_args()
+
+    source = demo_source(args.devices)
+    worker = EnforcementWorker(source)
+    worker.start()
+    for device_id in source.devices:
+        worker.submit("start", (device_id, EnforcementSettings(interval=0.05, instant=False)))
+    with tempfile.TemporaryDirectory() as directory:
+        server = ControlServer(WorkerControl(worker), directory, args.transport)
+        server.start()
+        print(f"listening on {server.transport}")
+        errors: List[str] = []
+        try:
+            report("sequential", sequential(directory, args.requests))
+            began = time.perf_counter()
+            latencies = burst(directory, args.clients, args.burst, errors)
+            elapsed = time.perf_counter() - began
+            report("burst", latencies)
+            print(f"burst throughput: {len(latencies) / elapsed:.0f} requests/s from {args.clients} clients")
+        finally:
+            server.close()
+            worker.shutdown()
+    if errors:
+        print(f"FAIL: {len(errors)} requests failed, e.g. {errors[0]}")
+        return 1
+    if percentile(latencies, 0.99) * 1000 > args.budget_ms:
+        print("FAIL: burst p99 latency is over budget")
+        return 1
+    print("OK")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
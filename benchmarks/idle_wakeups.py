@@ -0,0 +1,96 @@
+"""Enforcement wakeups per hour with and without activity gating.
+
+Simulates ``--hours`` of fake time for ``--devices`` endpoints polled every
+``--interval-ms``. A fake session source marks them as capturing for
+``--busy-minutes`` out of every hour. Another app lowers the level while the
+device is idle. Every gated device must be back on target the moment its
+session starts, and the gated run must use at most ``--max-ratio`` of the
+wakeups of the always-on run. Wakeups per hour are read from
+:class:`~microphone_guardian.metrics.Metrics`, as they would be served.
+
+    python benchmarks/idle_wakeups.py --devices 4 --busy-minutes 10
+"""
+
+import argparse
+import os
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from microphone_guardian.metrics import Metrics  # noqa: E402
+from microphone_guardian.simulated import FakeCaptureActivity, FakeClock, demo_source  # noqa: E402
+from microphone_guardian.worker import EnforcementSettings, EnforcementWorker, WorkerCommand  # noqa: E402
+
+
+def run(gated: bool, args: argparse.Namespace) -> tuple:
+    clock = FakeClock()
+    source = demo_source(args.devices)
+    sessions = FakeCaptureActivity(active=False)
+    metrics = Metrics()
+    worker = EnforcementWorker(source, clock=clock, metrics=metrics, activity=sessions)
+    worker.registry.start()
+
+    def pump() -> None:
+        while not worker.commands.empty():
+            worker.handle(worker.commands.get())
+
+    settings = EnforcementSettings(interval=args.interval_ms / 1000.0, instant=False, activity_gated=gated)
+    for device_id in source.devices:
+        worker.handle(WorkerCommand("start", (device_id, settings)))
+    pump()
+
+    late = 0
+    busy = args.busy_minutes * 60.0
+    hour = 0
+    while hour < args.hours:
+        start = hour * 3600.0
+        for begin, end, active in ((start, start + busy, True), (start + busy, start + 3600.0, False)):
+            if gated or active:
+                for device_id in source.devices:
+                    if active:
+                        source.devices[device_id].EndpointVolume.drift(0.4)
+                    sessions.set_active(device_id, active)
+                clock.now = begin
+                pump()
+                if active:
+                    late += sum(
+                        abs(device.EndpointVolume.level - settings.target) > settings.tolerance
+                        for device in source.devices.values()
+                    )
+            while True:
+                deadline = worker.scheduler.next_deadline()
+                if deadline is None or deadline >= end:
+                    break
+                clock.now = deadline
+                worker.run_due()
+        hour += 1
+    clock.now = args.hours * 3600.0
+    return metrics.wakeups()["wakeups_per_hour"], late
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--devices", type=int, default=4)
+    parser.add_argument("--interval-ms", type=float, default=1000.0)
+    parser.add_argument("--hours", type=int, default=4)
+    parser.add_argument("--busy-minutes", type=float, default=10.0)
+    parser.add_argument("--max-ratio", type=float, default=0.5)
+    args = parser.parse_args()
+
+    always, _ = run(False, args)
+    gated, late = run(True, args)
+    print(f"wakeups per hour, always polling: {always:.0f}")
+    print(f"wakeups per hour, activity gated: {gated:.0f} ({gated / always:.1%})")
+    print(f"devices not on target when capture started: {late}")
+    if late:
+        print("FAIL: capture started before the target was applied")
+        return 1
+    if gated > always * args.max_ratio:
+        print("FAIL: activity gating did not cut wakeups enough")
+        return 1
+    print("OK")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,74 @@
+"""Measure import cost of the core and fail if it drags in heavy modules.
+
+Runs ``python -X importtime`` on the tkinter-free core modules in a fresh
+interpreter. Exits non-zero if tkinter or the Windows audio stack (pycaw,
+comtypes) gets imported along the way.
+
+    python benchmarks/import_time.py
+"""
+
+import argparse
+import os
+import subprocess
+import sys
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+
+CORE_MODULES = (
+    "microphone_guardian",
+    "microphone_guardian.engine",
+    "microphone_guardian.registry",
+    "microphone_guardian.worker",
+    "microphone_guardian.backend",
+    "microphone_guardian.headless",
+)
+FORBIDDEN = ("tkinter", "_tkinter", "comtypes", "pycaw")
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--top", type=int, default=10, help="how many of the slowest imports to show")
+    parser.add_argument("--budget-ms", type=float, default=100.0, help="maximum cumulative import time of the core")
+    args = parser.parse_args()
+
+    statement = "; ".join(f"import {module}" for module in CORE_MODULES)
+    completed = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", statement],
+        cwd=ROOT,
+        capture_output=True,
+        text=True,
+        check=False,
+    )
+    if completed.returncode != 0:
+        print(completed.stderr)
+        return completed.returncode
+
+    rows = []
+    for line in completed.stderr.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        own, cumulative, name = line[len("import time:"):].split("|", 2)
+        rows.append((int(cumulative), int(own), name[1:].rstrip()))
+
+    top_level_us = sum(cumulative for cumulative, _, name in rows if not name.startswith(" "))
+    imported = {name.strip() for _, _, name in rows}
+    offenders = sorted(name for name in imported if name.split(".")[0] in FORBIDDEN)
+
+    print(f"{'cumulative':>12} {'self':>8}  module")
+    for cumulative, own, name in sorted(rows, reverse=True)[: args.top]:
+        print(f"{cumulative / 1000:>10.2f}ms {own / 1000:>6.2f}ms  {name.strip()}")
+    print(f"modules imported: {len(imported)}  total: {top_level_us / 1000:.2f} ms")
+    failed = False
+    if offenders:
+        print("FAIL: core imports pulled in " + ", ".join(offenders))
+        failed = True
+    if top_level_us / 1000 > args.budget_ms:
+        print(f"FAIL: core import took {top_level_us / 1000:.2f} ms (budget {args.budget_ms:.0f} ms)")
+        failed = True
+    if not failed:
+        print("OK")
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,145 @@
+"""Peak meter statistics: vectorised ring buffer versus a per-sample loop.
+
+Fills a :class:`~microphone_guardian.meter.PeakRing` with each synthetic
+signal from :class:`~microphone_guardian.simulated.SyntheticPeakMeter` and
+computes peak, RMS and clipping share over ``--window`` samples, ``--repeats``
+times. The same numbers are computed with a plain Python loop. The script
+fails if the ring disagrees with the loop or is slower than it. Finally the
+worker samples a synthetic meter on a fake clock to check that events come
+out at the expected rate.
+
+The meter needs NumPy. Without it the statistics are skipped, and the worker
+must report the meter as unavailable instead.
+
+    python benchmarks/meter_stats.py --window 3000
+"""
+
+import argparse
+import math
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from microphone_guardian import meter  # noqa: E402
+from microphone_guardian.meter import CLIP_THRESHOLD, PeakRing  # noqa: E402
+from microphone_guardian.simulated import FakeClock, SyntheticPeakMeter, demo_source  # noqa: E402
+from microphone_guardian.worker import (  # noqa: E402
+    METER_INTERVAL_SECONDS,
+    METER_REPORT_SAMPLES,
+    EnforcementWorker,
+    WorkerCommand,
+)
+
+
+def signal(name: str, count: int) -> list:
+    clock = FakeClock()
+    source = SyntheticPeakMeter(name, amplitude=0.8, frequency=3.0, clock=clock, seed=1)
+    samples = []
+    for index in range(count):
+        clock.now = index * METER_INTERVAL_SECONDS
+        samples.append(source.read())
+    return samples
+
+
+def naive_stats(samples: list) -> tuple:
+    peak = 0.0
+    squares = 0.0
+    clipped = 0
+    for value in samples:
+        if value > peak:
+            peak = value
+        squares += value * value
+        if value >= CLIP_THRESHOLD:
+            clipped += 1
+    return peak, math.sqrt(squares / len(samples)), clipped / len(samples)
+
+
+def timed(function, repeats: int) -> tuple:
+    result = function()
+    started = time.perf_counter()
+    for _ in range(repeats):
+        function()
+    return result, (time.perf_counter() - started) / repeats
+
+
+def close(left: tuple, right: tuple) -> bool:
+    # Samples are stored as float32, so compare at float32 precision.
+    return all(abs(a - b) <= 1e-5 for a, b in zip(left, right))
+
+
+def check_worker(seconds: float) -> bool:
+    clock = FakeClock()
+    source = demo_source(1)
+    events = []
+    peak_meter = SyntheticPeakMeter("sine", clock=clock, seed=1)
+    worker = EnforcementWorker(source, post=events.append, clock=clock, meter=peak_meter)
+    worker.registry.start()
+    device_id = next(iter(source.devices))
+    worker.handle(WorkerCommand("meter", device_id))
+    while True:
+        deadline = worker.scheduler.next_deadline()
+        if deadline is None or deadline > seconds:
+            break
+        clock.now = deadline
+        worker.run_due()
+    reports = 0
+    for event in events:
+        if event.kind == "meter":
+            reports += 1
+        elif event.kind == "meter-unavailable":
+            print(f"worker: meter unavailable: {event.message}")
+            if peak_meter.opens:
+                print("FAIL: the meter was opened although it could not run")
+                return False
+            return meter.numpy is None
+    if meter.numpy is None:
+        print("worker: the meter ran without NumPy")
+        return False
+    expected = int(seconds / METER_INTERVAL_SECONDS) // METER_REPORT_SAMPLES
+    print(f"worker: {reports} meter reports in {seconds:g} s of fake time (expected about {expected})")
+    return abs(reports - expected) <= 1
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--window", type=int, default=3000)
+    parser.add_argument("--repeats", type=int, default=200)
+    args = parser.parse_args()
+
+    failed = False
+    if meter.numpy is None:
+        print("numpy not installed; skipping the statistics")
+    for name in SyntheticPeakMeter.SIGNALS if meter.numpy is not None else ():
+        samples = signal(name, args.window)
+        ring = PeakRing(args.window)
+        ring.extend(samples)
+        # Compare against the float32 values the ring holds.
+        stored = [float(value) for value in ring.window()]
+        expected, loop_seconds = timed(lambda: naive_stats(stored), args.repeats)
+        stats, ring_seconds = timed(lambda: ring.stats(args.window), args.repeats)
+        actual = (stats.peak, stats.rms, stats.clipping)
+        print(
+            f"{name:>8}: peak {stats.peak:.3f} rms {stats.rms:.3f} "
+            f"clipping {stats.clipping:.1%}  loop {loop_seconds * 1e6:8.1f} µs  "
+            f"ring {ring_seconds * 1e6:8.1f} µs  ({loop_seconds / ring_seconds:.1f}x)"
+        )
+        if not close(actual, expected):
+            print(f"FAIL: statistics differ from the loop: {actual} != {expected}")
+            failed = True
+        if ring_seconds > loop_seconds:
+            print("FAIL: statistics are too slow compared with a per-sample loop")
+            failed = True
+
+    if not check_worker(10.0):
+        print("FAIL: the worker did not report the meter as expected")
+        failed = True
+    if failed:
+        return 1
+    print("OK")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
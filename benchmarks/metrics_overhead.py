@@ -0,0 +1,76 @@
+"""Per-tick cost of the metrics layer.
+
+Runs the same synchronous worker workload on a fake clock twice, once
+without metrics and once with :class:`~microphone_guardian.metrics.Metrics`
+attached, and reports the extra time per endpoint check. It also times a
+Prometheus render. Exits non-zero if the overhead per check exceeds
+``--budget-us``.
+
+    python benchmarks/metrics_overhead.py --devices 50 --ticks 20000
+"""
+
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from microphone_guardian.metrics import Metrics  # noqa: E402
+from microphone_guardian.simulated import FakeClock, demo_source  # noqa: E402
+from microphone_guardian.worker import EnforcementSettings, EnforcementWorker, WorkerCommand  # noqa: E402
+
+
+def run(devices: int, ticks: int, metrics: bool) -> float:
+    """Return wall-clock seconds per endpoint check."""
+    clock = FakeClock()
+    source = demo_source(devices)
+    worker = EnforcementWorker(source, post=lambda event: None, clock=clock, metrics=Metrics() if metrics else None)
+    worker.registry.start()
+    for device_id in source.devices:
+        worker.handle(WorkerCommand("start", (device_id, EnforcementSettings(interval=1.0, instant=False))))
+        worker.enforcers[device_id].backoff.factor = 1.0
+    volumes = [device.EndpointVolume for device in source.devices.values()]
+    checks = 0
+    elapsed = 0.0
+    round_number = 0
+    while checks < ticks:
+        clock.now = worker.scheduler.next_deadline()
+        volumes[round_number % len(volumes)].level = 0.5
+        round_number += 1
+        began = time.perf_counter()
+        checks += worker.run_due()
+        elapsed += time.perf_counter() - began
+    if metrics:
+        began = time.perf_counter()
+        worker.metrics.render_prometheus()
+        print(f"prometheus render ({devices} devices): {(time.perf_counter() - began) * 1000:.2f} ms")
+    return elapsed / checks
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--devices", type=int, default=50)
+    parser.add_argument("--ticks", type=int, default=20000)
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--budget-us", type=float, default=10.0, help="allowed extra cost per check")
+    args = parser.parse_args()
+
+    run(args.devices, args.ticks // 10, False)  # warm up
+    baseline = instrumented = float("inf")
+    for _ in range(args.repeat):  # interleaved so drift in machine load hits both sides
+        baseline = min(baseline, run(args.devices, args.ticks, False))
+        instrumented = min(instrumented, run(args.devices, args.ticks, True))
+    overhead = (instrumented - baseline) * 1e6
+    print(f"per check without metrics: {baseline * 1e6:.2f} us")
+    print(f"per check with metrics:    {instrumented * 1e6:.2f} us")
+    print(f"overhead: {overhead:.2f} us per check ({overhead / (baseline * 1e6) * 100:.1f}%)  budget: {args.budget_us:g} us")
+    if overhead > args.budget_us:
+        print("FAIL: metrics overhead exceeds the budget")
+        return 1
+    print("OK")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
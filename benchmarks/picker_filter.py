@@ -0,0 +1,188 @@
+"""Type-to-filter latency of the device picker on a host with many endpoints.
+
+* ``build`` – indexing ``--devices`` synthetic endpoints named like the
+  virtual cables, remote-desktop redirections and USB microphones of a VDI
+  host.
+* ``keystroke`` – every prefix of ``--queries`` typed one character at a
+  time, as the search box sees them, against the index and against a naive
+  scan of every label. Both must return the same devices.
+* ``window`` – scrolling the matches never shows more than the picker's
+  rows, and the selection can always be brought into view.
+* ``inactive`` – disabled and unplugged endpoints are listed on request,
+  and each is opened only the first time.
+
+Exits non-zero if any answer differs from the naive scan, if the p99
+keystroke takes longer than ``--budget-ms``, or if the window or the
+inactive listing misbehave.
+
+    python benchmarks/picker_filter.py --devices 1000
+"""
+
+import argparse
+import os
+import random
+import sys
+import time
+from typing import List, Sequence, Tuple
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from microphone_guardian.picker import DeviceIndex, RowWindow, tokens  # noqa: E402
+from microphone_guardian.registry import (  # noqa: E402
+    DEVICE_STATE_ACTIVE,
+    DEVICE_STATE_INACTIVE,
+    DeviceInfo,
+    DeviceRegistry,
+    display_names,
+)
+from microphone_guardian.simulated import demo_source  # noqa: E402
+
+QUERIES = ("cable 17", "remote audio", "rdp 4", "usb", "microphone #3", "voicemeeter aux", "8f3", "line")
+ROWS = 6
+
+
+def synthetic_devices(count: int, seed: int) -> List[Tuple[str, str]]:
+    """``(endpoint ID, label)`` pairs like a VDI host's capture endpoints."""
+    rng = random.Random(seed)
+    names = []
+    for index in range(count):
+        roll = rng.random()
+        if roll < 0.4:
+            names.append(f"CABLE Output (VB-Audio Virtual Cable {rng.randrange(1, 60)})")
+        elif roll < 0.7:
+            names.append(f"Remote Audio (RDP session {rng.randrange(1, 200)})")
+        elif roll < 0.85:
+            names.append(f"VoiceMeeter {rng.choice(['Out', 'Aux Out', 'VAIO3 Out'])} (VB-Audio VoiceMeeter VAIO)")
+        elif roll < 0.95:
+            names.append("Microphone (USB Audio Device)")
+        else:
+            names.append(f"Line In ({rng.choice(['Realtek', 'Focusrite USB', 'Behringer UMC'])} Audio)")
+    ids = [f"{{0.0.1.00000000}}.{{{rng.getrandbits(128):032x}}}" for _ in range(count)]
+    labels = display_names(DeviceInfo(device_id, name, DEVICE_STATE_ACTIVE) for device_id, name in zip(ids, names))
+    return [(device_id, labels[device_id]) for device_id in ids]
+
+
+def naive(entries: Sequence[Tuple[str, str]], query: str) -> List[int]:
+    terms = tokens(query)
+    matches = []
+    for position, (device_id, label) in enumerate(entries):
+        words = tokens(label) + tokens(device_id)
+        if all(any(word.startswith(term) for word in words) for term in terms):
+            matches.append(position)
+    return matches
+
+
+def keystrokes(queries: Sequence[str]) -> List[str]:
+    return [query[:length] for query in queries for length in range(1, len(query) + 1)]
+
+
+def percentile(samples: List[float], fraction: float) -> float:
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(fraction * len(ordered)))]
+
+
+def check_window(matches: int) -> bool:
+    window = RowWindow(ROWS)
+    window.reset(matches)
+    rng = random.Random(matches)
+    for _ in range(1000):
+        step = rng.random()
+        if step < 0.4:
+            window.scroll(rng.randint(-20, 20))
+        elif step < 0.7:
+            window.move_to(rng.random())
+        else:
+            index = rng.randrange(matches)
+            window.reveal(index)
+            if index not in window.visible():
+                print(f"FAIL: revealing row {index} left rows {window.visible()} on screen")
+                return False
+        visible = window.visible()
+        if len(visible) != min(ROWS, matches) or not 0 <= visible.start <= visible.stop <= matches:
+            print(f"FAIL: {matches} matches showed rows {visible}")
+            return False
+    return True
+
+
+def check_inactive(devices: int) -> bool:
+    source = demo_source(devices // 2, inactive=devices - devices // 2)
+    registry = DeviceRegistry(source)
+    registry.start()
+    opens = source.opens
+    began = time.perf_counter()
+    first = registry.inactive()
+    cold = time.perf_counter() - began
+    cold_opens = source.opens - opens
+    began = time.perf_counter()
+    second = registry.inactive()
+    warm = time.perf_counter() - began
+    warm_opens = source.opens - opens - cold_opens
+    print(
+        f"inactive: {len(first)} endpoints listed in {cold * 1000:.2f} ms ({cold_opens} opens), "
+        f"again in {warm * 1000:.2f} ms ({warm_opens} opens)"
+    )
+    expected = sum(1 for device in source.devices.values() if device.state & DEVICE_STATE_INACTIVE)
+    ok = len(first) == expected and first == second and cold_opens == expected and warm_opens == 0
+    if not ok:
+        print("FAIL: inactive endpoints were missed or opened more than once")
+    if len(registry.devices()) != devices // 2:
+        print("FAIL: listing inactive endpoints changed the active ones")
+        ok = False
+    return ok
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--devices", type=int, default=1000)
+    parser.add_argument("--queries", default=",".join(QUERIES), help="comma-separated queries, typed one key at a time")
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--seed", type=int, default=7)
+    parser.add_argument("--budget-ms", type=float, default=2.0, help="allowed p99 latency of one keystroke")
+    args = parser.parse_args()
+
+    failed = False
+    entries = synthetic_devices(args.devices, args.seed)
+    began = time.perf_counter()
+    index = DeviceIndex(entries)
+    built = time.perf_counter() - began
+    print(f"build: {args.devices} devices indexed in {built * 1000:.2f} ms")
+
+    typed = keystrokes(args.queries.split(",") + [entries[0][0][-12:-4]])  # also part of a real endpoint ID
+    indexed: List[float] = []
+    scanned: List[float] = []
+    for _ in range(args.repeat):
+        index = DeviceIndex(entries)  # fresh prefix cache, as after every device refresh
+        for text in typed:
+            began = time.perf_counter()
+            got = index.search(text)
+            indexed.append(time.perf_counter() - began)
+            began = time.perf_counter()
+            expected = naive(entries, text)
+            scanned.append(time.perf_counter() - began)
+            if got != expected:
+                print(f"FAIL: {text!r} matched {len(got)} devices, the naive scan {len(expected)}")
+                return 1
+    print(
+        f"keystroke, index: p50 {percentile(indexed, 0.5) * 1e3:.3f} ms  "
+        f"p99 {percentile(indexed, 0.99) * 1e3:.3f} ms  max {max(indexed) * 1e3:.3f} ms"
+    )
+    print(
+        f"keystroke, scan:  p50 {percentile(scanned, 0.5) * 1e3:.3f} ms  "
+        f"p99 {percentile(scanned, 0.99) * 1e3:.3f} ms  max {max(scanned) * 1e3:.3f} ms"
+    )
+    print(f"{len(typed)} keystrokes agree with the scan; budget: p99 {args.budget_ms:g} ms")
+    if percentile(indexed, 0.99) * 1e3 > args.budget_ms:
+        print("FAIL: filtering lags behind typing")
+        failed = True
+
+    for matches in (1, ROWS, len(index.search("cable")), args.devices):
+        failed |= not check_window(matches)
+    failed |= not check_inactive(args.devices)
+    if failed:
+        return 1
+    print("OK")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,159 @@
+"""Cost of the profiling spans, and what a profile contains.
+
+* ``disabled span`` – the price of ``with profiler.span(...)`` while
+  profiling is off: the median of ``timeit`` runs, less the median of an
+  empty statement.
+* ``per check`` – the same synchronous worker workload as
+  ``metrics_overhead.py`` on a fake clock, with profiling off and on.
+* ``trace`` – the Chrome trace written after the profiled run must be valid
+  JSON holding enforcement, enumeration, activation and endpoint spans, and
+  turning profiling off must unwrap every endpoint again.
+* ``sampler`` – samples a real worker thread for ``--sample-seconds`` and
+  expects its stacks among the folded output.
+
+Exits non-zero if any of these fails, if a disabled span costs more than
+``--disabled-budget-ns`` or if profiling adds more than ``--budget-us`` to a
+check.
+
+    python benchmarks/profiling_overhead.py --devices 50 --ticks 20000
+"""
+
+import argparse
+import json
+import os
+import statistics
+import sys
+import tempfile
+import time
+import timeit
+from typing import Tuple
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from microphone_guardian.profiling import ProfiledEndpointVolume, Profiler, sample_stacks, write_folded  # noqa: E402
+from microphone_guardian.simulated import FakeClock, demo_source  # noqa: E402
+from microphone_guardian.worker import EnforcementSettings, EnforcementWorker, WorkerCommand  # noqa: E402
+
+EXPECTED_SPANS = {"enumerate", "activate", "enforce", "GetMasterVolumeLevelScalar", "SetMasterVolumeLevelScalar"}
+
+
+def disabled_span(iterations: int, repeat: int) -> float:
+    """Return the extra nanoseconds a disabled span adds, as the median of ``repeat`` timeit runs."""
+    namespace = {"span": Profiler().span}
+    empty = timeit.repeat("pass", number=iterations, repeat=repeat, globals=namespace)
+    spanned = timeit.repeat(
+        "with span('enforce', device='mic'): pass", number=iterations, repeat=repeat, globals=namespace
+    )
+    return (statistics.median(spanned) - statistics.median(empty)) / iterations * 1e9
+
+
+def run(devices: int, ticks: int, profile: bool) -> Tuple[float, EnforcementWorker]:
+    """Return wall-clock seconds per endpoint check, and the worker."""
+    clock = FakeClock()
+    source = demo_source(devices)
+    worker = EnforcementWorker(source, post=lambda event: None, clock=clock)
+    worker.handle(WorkerCommand("profile", profile))
+    worker.registry.start()
+    worker.handle(WorkerCommand("refresh"))
+    for device_id in source.devices:
+        worker.handle(WorkerCommand("start", (device_id, EnforcementSettings(interval=1.0, instant=False))))
+        worker.enforcers[device_id].backoff.factor = 1.0
+    volumes = [device.EndpointVolume for device in source.devices.values()]
+    checks = 0
+    elapsed = 0.0
+    round_number = 0
+    while checks < ticks:
+        clock.now = worker.scheduler.next_deadline()
+        volumes[round_number % len(volumes)].level = 0.5
+        round_number += 1
+        began = time.perf_counter()
+        checks += worker.run_due()
+        elapsed += time.perf_counter() - began
+    return elapsed / checks, worker
+
+
+def check_trace(worker: EnforcementWorker, directory: str) -> bool:
+    path = os.path.join(directory, "guardian.trace.json")
+    began = time.perf_counter()
+    spans = worker.profiler.write_chrome_trace(path)
+    written = time.perf_counter() - began
+    with open(path, encoding="utf-8") as stream:
+        document = json.load(stream)
+    events = [event for event in document["traceEvents"] if event["ph"] == "X"]
+    names = {event["name"] for event in events}
+    print(
+        f"trace: {spans} spans ({len(names)} names) in {os.path.getsize(path) / 1024:.0f} KiB, "
+        f"written in {written * 1000:.0f} ms"
+    )
+    ok = spans == len(events) and EXPECTED_SPANS <= names
+    ok = ok and all(event["dur"] >= 0 and event["ts"] >= 0 for event in events)
+    if not ok:
+        print(f"FAIL: the Chrome trace is missing {sorted(EXPECTED_SPANS - names)} or has bad timestamps")
+    worker.handle(WorkerCommand("profile", False))
+    if any(isinstance(enforcer.endpoint_volume, ProfiledEndpointVolume) for enforcer in worker.enforcers.values()):
+        print("FAIL: endpoints are still wrapped after profiling was turned off")
+        ok = False
+    return ok
+
+
+def check_sampler(seconds: float, directory: str) -> bool:
+    source = demo_source(2)
+    worker = EnforcementWorker(source, post=lambda event: None)
+    worker.start()
+    try:
+        for device_id in source.devices:
+            worker.submit("start", (device_id, EnforcementSettings(interval=0.05, instant=False)))
+        stacks = sample_stacks(seconds)
+    finally:
+        worker.shutdown()
+    samples = write_folded(stacks, os.path.join(directory, "guardian.folded"))
+    own = sum(count for stack, count in stacks.items() if stack.startswith("enforcement-worker;"))
+    print(f"sampler: {samples} samples over {seconds:g} s, {own} of them on the worker thread")
+    if not own:
+        print("FAIL: the sampler did not see the worker thread")
+    return bool(own)
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--devices", type=int, default=50)
+    parser.add_argument("--ticks", type=int, default=20000)
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--sample-seconds", type=float, default=0.5)
+    parser.add_argument("--disabled-budget-ns", type=float, default=1000.0, help="allowed median cost of a disabled span")
+    parser.add_argument("--budget-us", type=float, default=15.0, help="allowed extra cost per check while profiling")
+    args = parser.parse_args()
+
+    failed = False
+    disabled = disabled_span(100000, args.repeat * 2 + 1)
+    print(f"disabled span: {disabled:.0f} ns  budget: {args.disabled_budget_ns:g} ns")
+    if disabled > args.disabled_budget_ns:
+        print("FAIL: a disabled span is not free enough")
+        failed = True
+
+    run(args.devices, args.ticks // 10, False)  # warm up
+    baseline = profiled = float("inf")
+    worker = None
+    for _ in range(args.repeat):  # interleaved so drift in machine load hits both sides
+        baseline = min(baseline, run(args.devices, args.ticks, False)[0])
+        seconds, worker = run(args.devices, args.ticks, True)
+        profiled = min(profiled, seconds)
+    overhead = (profiled - baseline) * 1e6
+    print(f"per check, profiling off: {baseline * 1e6:.2f} us")
+    print(f"per check, profiling on:  {profiled * 1e6:.2f} us")
+    print(f"overhead: {overhead:.2f} us per check  budget: {args.budget_us:g} us")
+    if overhead > args.budget_us:
+        print("FAIL: profiling slows enforcement checks down too much")
+        failed = True
+
+    with tempfile.TemporaryDirectory() as directory:
+        failed |= not check_trace(worker, directory)
+        failed |= not check_sampler(args.sample_seconds, directory)
+    if failed:
+        return 1
+    print("OK")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,151 @@
+"""Trace size, replay speed and replay fidelity.
+
+Records ``--hours`` of a busy session on ``--devices`` simulated endpoints,
+driven on a fake clock. Another application yanks a random device to a random
+level about every ``--yank-ms`` milliseconds, one device is unplugged and
+plugged back every minute, and an endpoint call fails every ten minutes. It
+then replays the trace twice through
+:func:`~microphone_guardian.trace.replay`.
+
+Exits non-zero if the two replays disagree, if the replayed worker's reads or
+writes differ from the recorded ones by more than ``--drift``, or if the
+replay runs less than ``--min-speedup`` times faster than real time.
+
+    python benchmarks/replay.py --hours 1 --min-speedup 100
+"""
+
+import argparse
+import dataclasses
+import io
+import os
+import random
+import sys
+import time
+from typing import List, Tuple
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from microphone_guardian import trace  # noqa: E402
+from microphone_guardian.simulated import FakeClock, simulated_backend  # noqa: E402
+from microphone_guardian.trace import TraceRecorder  # noqa: E402
+from microphone_guardian.worker import EnforcementSettings, EnforcementWorker, WorkerCommand  # noqa: E402
+
+
+def script(devices: List[str], duration: float, yank: float, seed: int) -> List[Tuple[float, str, str, float]]:
+    rng = random.Random(seed)
+    actions = []
+    at = 0.0
+    while at < duration:
+        at += rng.uniform(0.5, 1.5) * yank
+        actions.append((at, "yank", rng.choice(devices), rng.uniform(0.0, 1.0)))
+    flapping = devices[-1]
+    for minute in range(int(duration // 60)):
+        actions.append((minute * 60.0 + 30.0, "unplug", flapping, 0.0))
+        actions.append((minute * 60.0 + 35.0, "plug", flapping, 0.0))
+    for tenth in range(1, int(duration // 600) + 1):
+        actions.append((tenth * 600.0 - 0.25, "fail", devices[0], 0.0))
+    return sorted(actions)
+
+
+def record(devices: int, duration: float, yank: float, seed: int) -> Tuple[bytes, int, float]:
+    clock = FakeClock()
+    backend = simulated_backend(devices, seed=seed)
+    source = backend.source
+    stream = io.BytesIO()
+    recorder = TraceRecorder(stream, clock)
+    worker = EnforcementWorker.for_backend(backend, clock=clock, recorder=recorder, retry_failures=True)  # as headless
+
+    def pump() -> None:
+        while not worker.commands.empty():
+            worker.handle(worker.commands.get())
+
+    def run_until(until: float) -> None:
+        while True:
+            deadline = worker.scheduler.next_deadline()
+            if deadline is None or deadline > until:
+                break
+            clock.now = deadline
+            worker.run_due()
+            pump()
+        clock.now = until
+
+    began = time.perf_counter()
+    worker.registry.start()
+    worker.handle(WorkerCommand("refresh"))
+    pump()
+    ids = sorted(source.devices)
+    for device_id in ids:
+        worker.handle(WorkerCommand("start", (device_id, EnforcementSettings(interval=1.0, instant=True))))
+    unplugged = {}
+    for at, action, device_id, level in script(ids, duration, yank, seed):
+        run_until(at)
+        if action == "yank" and device_id in source.devices:
+            source.devices[device_id].EndpointVolume.drift(level)
+        elif action == "unplug":
+            unplugged[device_id] = source.devices[device_id]
+            source.unplug(device_id)
+        elif action == "plug":
+            source.plug(unplugged.pop(device_id))
+        elif action == "fail":
+            source.devices[device_id].EndpointVolume.fail_next()
+        pump()
+    run_until(duration)
+    recorder.flush()
+    return stream.getvalue(), recorder.records, time.perf_counter() - began
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--devices", type=int, default=4)
+    parser.add_argument("--hours", type=float, default=1.0)
+    parser.add_argument("--yank-ms", type=float, default=300.0)
+    parser.add_argument("--seed", type=int, default=3)
+    parser.add_argument("--drift", type=float, default=0.01, help="allowed relative difference in reads and writes")
+    parser.add_argument("--min-speedup", type=float, default=100.0)
+    args = parser.parse_args()
+
+    duration = args.hours * 3600.0
+    data, records, recording_seconds = record(args.devices, duration, args.yank_ms / 1000.0, args.seed)
+    print(
+        f"recorded {records} records in {len(data) / 1024:.0f} KiB "
+        f"({len(data) / records:.1f} bytes/record, {recording_seconds:.2f} s to record)"
+    )
+    began = time.perf_counter()
+    decoded = list(trace.read_trace(io.BytesIO(data)))
+    print(f"decoded {len(decoded)} records in {time.perf_counter() - began:.3f} s")
+
+    first = trace.replay(decoded)
+    second = trace.replay(decoded)
+    print(
+        f"replayed {first.duration:.0f} s in {first.wall_seconds:.3f} s ({first.speedup:.0f}x real time), "
+        f"{first.external_moves} external moves, {first.wakeups} wakeups"
+    )
+    print(f"reads {first.reads} (recorded {first.recorded_reads})")
+    print(f"writes {first.writes} (recorded {first.recorded_writes})")
+    print(f"time off target: {first.off_target_seconds:.2f} s")
+
+    failed = False
+    ignore = {"wall_seconds"}
+    if {k: v for k, v in dataclasses.asdict(first).items() if k not in ignore} != {
+        k: v for k, v in dataclasses.asdict(second).items() if k not in ignore
+    }:
+        print("FAIL: two replays of the same trace disagree")
+        failed = True
+    for name, replayed, recorded in (
+        ("reads", first.reads, first.recorded_reads),
+        ("writes", first.writes, first.recorded_writes),
+    ):
+        if abs(replayed - recorded) > args.drift * max(1, recorded):
+            print(f"FAIL: replayed {name} differ from the recording by more than {args.drift:.0%}")
+            failed = True
+    if first.speedup < args.min_speedup:
+        print(f"FAIL: replay is only {first.speedup:.0f}x faster than real time")
+        failed = True
+    if failed:
+        return 1
+    print("OK")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,279 @@
+"""Per-tick cost and correctness of the per-application rule engine.
+
+* ``correctness`` – random devices, capturing applications and times of day
+  are checked against a naive first-match scan of the same rules.
+* ``per tick`` – one steady session evaluated once per simulated second
+  with ``--sizes`` rules. Every tick but the first should be answered from
+  the memo until a window boundary, however many rules there are; the
+  fastest of ``--repeat`` timed runs is reported alongside.
+* ``worker`` – the enforcement checks of ``--devices`` endpoints with the
+  largest rule set, compared with no rules at all in ``--repeat``
+  interleaved rounds.
+* ``scenario`` – a fake session source drives a worker through a DAW, a
+  conferencing client, a dictation tool that must be left alone, and a
+  night-time rule.
+
+Exits non-zero if any answer differs from the naive scan, if any rule set
+misses the memo more than once per simulated hour, if rules add more than
+``--budget-us`` to a check in the median round, or if the scenario goes
+wrong.
+
+    python benchmarks/rule_matching.py --sizes 10,1000,10000
+"""
+
+import argparse
+import fnmatch
+import os
+import random
+import sys
+import time
+import timeit
+from typing import FrozenSet, List, Optional, Sequence, Tuple
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from microphone_guardian.engine import EnforcementEvent  # noqa: E402
+from microphone_guardian.rules import Rule, RuleMatcher, compile_rules, process_key  # noqa: E402
+from microphone_guardian.simulated import FakeCaptureSessions, FakeClock, demo_source  # noqa: E402
+from microphone_guardian.worker import EnforcementSettings, EnforcementWorker, WorkerCommand  # noqa: E402
+
+MIDNIGHT = time.mktime((2024, 3, 4, 0, 0, 0, 0, 0, -1))  # a Monday with no DST change
+
+
+def make_rules(count: int, devices: Sequence[str], seed: int) -> List[Rule]:
+    rng = random.Random(seed)
+    rules = []
+    for index in range(count):
+        roll = rng.random()
+        target = None if rng.random() < 0.1 else rng.randint(0, 100) / 100.0
+        if roll < 0.6:
+            rules.append(Rule(f"app{index}.exe", target))
+        elif roll < 0.8:
+            rules.append(Rule(f"tool{index % 97}*", target))
+        elif roll < 0.9:
+            rules.append(Rule(f"app{rng.randrange(count)}.exe", target, device=rng.choice(devices)))
+        else:
+            start = rng.randrange(24) * 3600
+            window = (start, (start + rng.randrange(1, 12) * 3600) % 86400)
+            process = rng.choice(["", f"app{rng.randrange(count)}.exe", "tool1*"])
+            rules.append(Rule(process, target, window=window))
+    return rules
+
+
+def naive(rules: Sequence[Rule], device_id: str, processes: FrozenSet[str], now: float) -> Optional[Rule]:
+    local = time.localtime(now)
+    seconds = local.tm_hour * 3600 + local.tm_min * 60 + local.tm_sec + now % 1.0
+    keys = [process_key(process) for process in processes]
+    for rule in rules:
+        if rule.device and rule.device != device_id:
+            continue
+        wanted = process_key(rule.process)
+        if wanted and not any(fnmatch.fnmatchcase(key, wanted) for key in keys):
+            continue
+        if rule.covers(seconds):
+            return rule
+    return None
+
+
+def correctness(rules: List[Rule], devices: List[str], queries: int, seed: int) -> bool:
+    rng = random.Random(seed)
+    clock = FakeClock(MIDNIGHT)
+    matcher = RuleMatcher(rules, clock)
+    pool = [f"app{rng.randrange(len(rules))}.exe" for _ in range(50)] + [f"Tool{n}x.EXE" for n in range(20)]
+    sessions = [frozenset(rng.sample(pool, rng.randint(0, 3))) for _ in range(40)]
+    for _ in range(queries):
+        clock.now += rng.expovariate(1.0 / 600.0)
+        device_id = rng.choice(devices)
+        processes = rng.choice(sessions)
+        got = matcher.evaluate(device_id, processes)
+        expected = naive(rules, device_id, processes, clock.now)
+        if got != expected:
+            print(f"FAIL: {device_id} {sorted(processes)} at {time.ctime(clock.now)}: got {got}, expected {expected}")
+            return False
+    days = (clock.now - MIDNIGHT) / 86400
+    print(f"correctness: {queries} queries over {days:.0f} days agree, {matcher.misses} memo misses")
+    return True
+
+
+def per_tick(rules: List[Rule], devices: List[str], ticks: int, repeat: int) -> Tuple[float, int, int]:
+    """Evaluate one steady session once per simulated second, ``repeat`` runs of ``ticks``.
+
+    Returns the fastest run's wall-clock seconds per evaluation, the number
+    of evaluations, and how many of them missed the memo.
+    """
+    clock = FakeClock(MIDNIGHT)
+    matcher = RuleMatcher(rules, clock)
+    processes = frozenset({"app7.exe", "tool3-helper.exe", "explorer.exe"})
+    device_id = devices[0]
+    evaluate = matcher.evaluate
+
+    def tick() -> None:
+        clock.now += 1.0
+        evaluate(device_id, processes)
+
+    fastest = min(timeit.repeat(tick, number=ticks, repeat=repeat))
+    return fastest / ticks, ticks * repeat, matcher.misses
+
+
+def worker_checks(devices: int, ticks: int, rules: Optional[List[Rule]]) -> float:
+    """Return wall-clock seconds per endpoint check, as in ``metrics_overhead.py``."""
+    clock = FakeClock()
+    source = demo_source(devices)
+    sessions = FakeCaptureSessions()
+    for index, device_id in enumerate(source.devices):
+        sessions.set(device_id, frozenset({f"app{index}.exe", "explorer.exe"}))
+    matcher = compile_rules(rules, FakeClock(MIDNIGHT)) if rules else None
+    worker = EnforcementWorker(source, post=lambda event: None, clock=clock, sessions=sessions, rules=matcher)
+    worker.registry.start()
+    for device_id in source.devices:
+        worker.handle(WorkerCommand("start", (device_id, EnforcementSettings(interval=1.0, instant=False))))
+        worker.enforcers[device_id].backoff.factor = 1.0
+    volumes = [device.EndpointVolume for device in source.devices.values()]
+    checks = 0
+    elapsed = 0.0
+    round_number = 0
+    while checks < ticks:
+        clock.now = worker.scheduler.next_deadline()
+        volumes[round_number % len(volumes)].level = 0.5
+        round_number += 1
+        began = time.perf_counter()
+        checks += worker.run_due()
+        elapsed += time.perf_counter() - began
+    return elapsed / checks
+
+
+def scenario() -> bool:
+    clock = FakeClock()
+    wall = FakeClock(MIDNIGHT + 12 * 3600)
+    source = demo_source(2)
+    device_id, other_id = sorted(source.devices)
+    volume = source.devices[device_id].EndpointVolume
+    sessions = FakeCaptureSessions()
+    rules = [
+        Rule("Reaper.exe", 1.0, name="DAW"),
+        Rule("zoom*", 0.8, name="meetings"),
+        Rule("dictation.exe", None, name="dictation"),
+        Rule("", 0.4, device=device_id, window=(22 * 3600, 7 * 3600), name="night"),
+    ]
+    events: List[EnforcementEvent] = []
+    worker = EnforcementWorker(
+        source, post=events.append, clock=clock, sessions=sessions, rules=compile_rules(rules, wall)
+    )
+    worker.registry.start()
+    sessions.start(device_id, "dictation.exe")
+    volume.level = 0.25
+    for guarded in (device_id, other_id):
+        # Rule switches follow each other faster than fight detection allows; it is not under test here.
+        settings = EnforcementSettings(target=0.9, interval=1.0, instant=False, contention="off")
+        worker.handle(WorkerCommand("start", (guarded, settings)))
+
+    def pump() -> None:
+        while not worker.commands.empty():
+            worker.handle(worker.commands.get())
+
+    def advance(seconds: float) -> None:
+        until = clock.now + seconds
+        while worker.scheduler.next_deadline() <= until:
+            clock.now = worker.scheduler.next_deadline()
+            worker.run_due()
+            pump()
+        clock.now = until
+
+    failures = []
+
+    def expect(what: str, level: float) -> None:
+        if abs(volume.level - level) > 1e-9:
+            failures.append(f"{what}: level is {volume.level:.2f}, expected {level:.2f}")
+
+    advance(10.0)
+    expect("dictation running from the start, never touched", 0.25)
+    if volume.writes:
+        failures.append(f"dictation: {volume.writes} writes while hands off")
+    sessions.stop(device_id, "dictation.exe")
+    pump()
+    expect("dictation stopped, device target again", 0.9)
+    sessions.start(device_id, "Zoom.exe")
+    pump()
+    expect("conferencing client", 0.8)
+    sessions.start(device_id, "reaper.exe")
+    pump()
+    expect("DAW wins over the conferencing client", 1.0)
+    volume.drift(0.5)
+    advance(2.0)
+    expect("DAW held by polling", 1.0)
+    sessions.set(device_id, frozenset())
+    pump()
+    wall.now = MIDNIGHT + 23 * 3600
+    advance(2.0)
+    expect("night rule", 0.4)
+    if abs(source.devices[other_id].EndpointVolume.level - 0.9) > 1e-9:
+        failures.append("the night rule is for one device only")
+    wall.now = MIDNIGHT + 24 * 3600 + 8 * 3600
+    advance(2.0)
+    expect("morning", 0.9)
+    changes = [event.message for event in events if event.kind == "rule" and event.device_id == device_id]
+    print(f"scenario: rule changes {changes}")
+    for failure in failures:
+        print(f"FAIL: {failure}")
+    return not failures
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sizes", default="10,100,1000,10000", help="comma-separated rule counts")
+    parser.add_argument("--ticks", type=int, default=200000)
+    parser.add_argument("--queries", type=int, default=20000)
+    parser.add_argument("--devices", type=int, default=50)
+    parser.add_argument("--checks", type=int, default=20000)
+    parser.add_argument("--repeat", type=int, default=7)
+    parser.add_argument("--seed", type=int, default=7)
+    parser.add_argument("--budget-us", type=float, default=5.0, help="allowed extra cost per check with rules")
+    args = parser.parse_args()
+
+    failed = False
+    sizes = [int(size) for size in args.sizes.split(",")]
+    devices = sorted(demo_source(args.devices).devices)
+    rule_sets = {size: make_rules(size, devices, args.seed) for size in sizes}
+    failed |= not correctness(rule_sets[sorted(sizes)[len(sizes) // 2]], devices, args.queries, args.seed)
+
+    for size in sizes:
+        began = time.perf_counter()
+        RuleMatcher(rule_sets[size])
+        compiled = time.perf_counter() - began
+        cost, evaluations, misses = per_tick(rule_sets[size], devices, args.ticks, args.repeat)
+        # make_rules puts every window boundary on the hour, so a memo entry goes stale once an hour at most.
+        allowed = 1 + evaluations // 3600
+        print(
+            f"{size:>6} rules: compiled in {compiled * 1000:7.2f} ms, {cost * 1e9:6.0f} ns per tick, "
+            f"{misses} memo misses in {evaluations} ticks (allowed {allowed})"
+        )
+        if misses > allowed:
+            print(f"FAIL: with {size} rules the memo misses more often than the windows change")
+            failed = True
+
+    largest = rule_sets[max(sizes)]
+    worker_checks(args.devices, args.checks // 10, None)  # warm up
+    overheads = []
+    for _ in range(args.repeat):  # interleaved so drift in machine load hits both sides
+        baseline = worker_checks(args.devices, args.checks, None)
+        with_rules = worker_checks(args.devices, args.checks, largest)
+        overheads.append((with_rules - baseline) * 1e6)
+    overheads.sort()
+    overhead = overheads[len(overheads) // 2]
+    print(
+        f"overhead of {len(largest)} rules: {overhead:.2f} us per check in the median round "
+        f"(rounds range {overheads[0]:.2f} to {overheads[-1]:.2f} us)  budget: {args.budget_us:g} us"
+    )
+    if overhead > args.budget_us:
+        print("FAIL: rules slow enforcement checks down too much")
+        failed = True
+
+    failed |= not scenario()
+    if failed:
+        return 1
+    print("OK")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
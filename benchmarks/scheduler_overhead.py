@@ -0,0 +1,94 @@
+"""Scheduler overhead with hundreds of simulated endpoints.
+
+Drives :class:`EnforcementWorker` synchronously on a fake clock: every
+endpoint gets its own interval, the worker's single heap decides which ones
+are due, and the script reports how many wakeups that took compared with one
+timer per endpoint, plus the wall-clock cost per wakeup and per endpoint
+check.
+
+    python benchmarks/scheduler_overhead.py --devices 500 --seconds 600
+"""
+
+import argparse
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from microphone_guardian.scheduler import DeadlineScheduler  # noqa: E402
+from microphone_guardian.simulated import FakeClock, demo_source  # noqa: E402
+from microphone_guardian.worker import EnforcementSettings, EnforcementWorker, WorkerCommand  # noqa: E402
+
+
+class TimedScheduler(DeadlineScheduler):
+    """Scheduler that accumulates the wall-clock time spent inside it."""
+
+    def __init__(self) -> None:
+        super().__init__()
+        self.seconds = 0.0
+
+    def schedule(self, key, deadline):
+        began = time.perf_counter()
+        super().schedule(key, deadline)
+        self.seconds += time.perf_counter() - began
+
+    def pop_due(self, now):
+        began = time.perf_counter()
+        due = super().pop_due(now)
+        self.seconds += time.perf_counter() - began
+        return due
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--devices", type=int, default=500)
+    parser.add_argument("--seconds", type=float, default=600.0, help="simulated time to run")
+    parser.add_argument("--intervals", default="0.5,1,2,5", help="comma-separated poll intervals to draw from")
+    parser.add_argument("--drift", type=float, default=0.01, help="fraction of endpoints knocked off target per wakeup")
+    parser.add_argument("--seed", type=int, default=1)
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    intervals = [float(value) for value in args.intervals.split(",")]
+    clock = FakeClock()
+    source = demo_source(args.devices)
+    scheduler = TimedScheduler()
+    worker = EnforcementWorker(source, post=lambda event: None, clock=clock, scheduler=scheduler)
+    worker.registry.start()
+    for device_id in source.devices:
+        settings = EnforcementSettings(target=1.0, interval=rng.choice(intervals), instant=False)
+        worker.handle(WorkerCommand("start", (device_id, settings)))
+        # Pin every endpoint to its base interval so the load stays constant.
+        worker.enforcers[device_id].backoff.factor = 1.0
+    volumes = [device.EndpointVolume for device in source.devices.values()]
+    drifting = max(1, int(args.drift * len(volumes)))
+
+    scheduler.seconds = 0.0
+    worker.wakeups = 0
+    checks = 0
+    tick_seconds = 0.0
+    while clock.now < args.seconds:
+        next_deadline = scheduler.next_deadline()
+        if next_deadline is None:
+            break
+        clock.now = next_deadline
+        for volume in rng.sample(volumes, drifting):
+            volume.level = 0.5
+        began = time.perf_counter()
+        checks += worker.run_due()
+        tick_seconds += time.perf_counter() - began
+
+    wakeups = max(worker.wakeups, 1)
+    print(f"devices: {args.devices}  simulated: {args.seconds:g} s  intervals: {args.intervals}")
+    print(f"endpoint checks: {checks}  shared wakeups: {worker.wakeups}  (one timer per device: {checks} wakeups)")
+    print(f"devices per wakeup: {checks / wakeups:.1f}")
+    print(f"scheduler overhead per wakeup: {scheduler.seconds / wakeups * 1e6:.1f} us"
+          f"  per check: {scheduler.seconds / max(checks, 1) * 1e6:.2f} us")
+    print(f"full tick per wakeup: {tick_seconds / wakeups * 1e6:.1f} us  per check: {tick_seconds / max(checks, 1) * 1e6:.1f} us")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
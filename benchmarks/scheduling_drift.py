@@ -0,0 +1,119 @@
+"""Jitter and cumulative drift of the enforcement schedule on a fake clock.
+
+Each check costs a random amount of work time, every wakeup arrives a little
+late, and now and then the process stalls for longer than an interval. The
+worker's absolute-deadline schedule is compared with the old "re-arm after
+the work is done" approach. Exits non-zero if the worker's schedule drifts by
+more than one interval or any tick fires later than ``--max-late-ms``.
+
+    python benchmarks/scheduling_drift.py --ticks 5000 --interval-ms 250
+"""
+
+import argparse
+import os
+import random
+import statistics
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from microphone_guardian.simulated import FakeClock, FakeEndpointVolume, demo_source  # noqa: E402
+from microphone_guardian.worker import EnforcementSettings, EnforcementWorker, WorkerCommand  # noqa: E402
+
+
+class WorkingEndpointVolume(FakeEndpointVolume):
+    """Endpoint whose every call advances the fake clock by some work time."""
+
+    def __init__(self, clock: FakeClock, rng: random.Random, work: float) -> None:
+        super().__init__()
+        self.clock = clock
+        self.rng = rng
+        self.work = work
+
+    def _wait(self) -> None:
+        self.clock.now += self.rng.uniform(0.0, self.work)
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--ticks", type=int, default=5000)
+    parser.add_argument("--interval-ms", type=float, default=250.0)
+    parser.add_argument("--work-ms", type=float, default=3.0, help="maximum cost of one endpoint call")
+    parser.add_argument("--wake-ms", type=float, default=2.0, help="maximum wakeup latency")
+    parser.add_argument("--stall-chance", type=float, default=0.002, help="chance per tick of a long stall")
+    parser.add_argument("--max-late-ms", type=float, default=10.0, help="allowed lateness outside stalls")
+    parser.add_argument("--seed", type=int, default=7)
+    args = parser.parse_args()
+
+    interval = args.interval_ms / 1000.0
+    work = args.work_ms / 1000.0
+    wake = args.wake_ms / 1000.0
+
+    rng = random.Random(args.seed)
+    clock = FakeClock()
+    source = demo_source(1)
+    device = next(iter(source.devices.values()))
+    device.EndpointVolume = WorkingEndpointVolume(clock, rng, work)
+    worker = EnforcementWorker(source, post=lambda event: None, clock=clock)
+    worker.registry.start()
+    worker.handle(WorkerCommand("start", (device.id, EnforcementSettings(interval=interval, instant=False))))
+    # Hold the interval fixed (no stability backoff) and start the grid now.
+    backoff = worker.enforcers[device.id].backoff
+    backoff.factor = 1.0
+    backoff.reset()
+    origin = clock.now
+    worker.scheduler.schedule(device.id, origin + interval)
+
+    lateness = []
+    stalls = 0
+    fired = 0
+    while fired < args.ticks:
+        deadline = worker.scheduler.next_deadline()
+        clock.now = max(clock.now, deadline) + rng.uniform(0.0, wake)
+        stalled = rng.random() < args.stall_chance
+        if stalled:
+            clock.now += rng.uniform(1.0, 3.0) * interval
+            stalls += 1
+        if worker.run_due():
+            fired += 1
+            if not stalled:
+                lateness.append(clock.now - deadline)
+    stats = worker.enforcers[device.id].stats
+    expected_slots = fired + stats.missed_ticks
+    final_deadline = worker.scheduler.next_deadline()
+    absolute_drift = final_deadline - (origin + (expected_slots + 1) * interval)
+
+    naive_rng = random.Random(args.seed)
+    naive_now = 0.0
+    naive_lateness = []
+    for _ in range(args.ticks):
+        naive_now += interval
+        late = naive_rng.uniform(0.0, wake)
+        naive_now += late + naive_rng.uniform(0.0, work) * 2
+        naive_lateness.append(late)
+    naive_drift = naive_now - args.ticks * interval
+
+    print(f"ticks: {fired}  interval: {args.interval_ms:g} ms  stalls: {stalls}  skipped slots: {stats.missed_ticks}")
+    print(
+        f"absolute deadlines: jitter mean {statistics.mean(lateness) * 1000:.3f} ms"
+        f"  stdev {statistics.pstdev(lateness) * 1000:.3f} ms  max {max(lateness) * 1000:.3f} ms"
+        f"  cumulative drift {absolute_drift * 1000:.3f} ms"
+    )
+    print(
+        f"re-arm after work: jitter mean {statistics.mean(naive_lateness) * 1000:.3f} ms"
+        f"  cumulative drift {naive_drift * 1000:.1f} ms (stalls excluded)"
+    )
+    failed = False
+    if abs(absolute_drift) > interval:
+        print("FAIL: schedule drifted by more than one interval")
+        failed = True
+    if max(lateness) * 1000 > args.max_late_ms:
+        print("FAIL: a tick fired later than the allowed lateness")
+        failed = True
+    if not failed:
+        print("OK")
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
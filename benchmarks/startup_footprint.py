@@ -0,0 +1,93 @@
+"""Compare startup time and resident memory of the headless and GUI paths.
+
+Each path is started in a fresh interpreter. Startup time runs from spawn
+until the process reports it is enforcing (headless) or has built its window
+(GUI). Peak RSS is then read from the live process before it gets SIGTERM.
+
+    python benchmarks/startup_footprint.py --runs 5
+
+The headless run uses the simulated backend so it works anywhere. The GUI run
+needs a display; it is reported as skipped when it cannot start.
+"""
+
+import argparse
+import os
+import signal
+import subprocess
+import sys
+import time
+from typing import List, Optional, Tuple
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+
+HEADLESS = [sys.executable, "-m", "microphone_guardian", "--backend", "simulated", "-v", "run", "--interval-ms", "500"]
+GUI = [
+    sys.executable,
+    "-c",
+    "import sys, tkinter as tk; from microphone_guardian import gui; root = tk.Tk(); gui.MicrophoneApp(root); root.update();"
+    " print('ready', file=sys.stderr, flush=True); root.mainloop()",
+]
+READY_MARKERS = ("ready", "Holding", "Enforcing", "Corrected")
+
+
+def peak_rss_kb(pid: int) -> Optional[int]:
+    try:
+        with open(f"/proc/{pid}/status") as status:
+            for line in status:
+                if line.startswith("VmHWM:"):
+                    return int(line.split()[1])
+    except OSError:
+        pass
+    try:
+        import psutil
+    except ImportError:
+        return None
+    info = psutil.Process(pid).memory_info()
+    return int(getattr(info, "peak_wset", info.rss) / 1024)
+
+
+def measure(command: List[str], timeout: float) -> Optional[Tuple[float, Optional[int]]]:
+    began = time.perf_counter()
+    process = subprocess.Popen(command, cwd=ROOT, stderr=subprocess.PIPE, stdout=subprocess.DEVNULL, text=True)
+    elapsed = None
+    try:
+        while time.perf_counter() - began < timeout:
+            line = process.stderr.readline()
+            if not line:
+                break
+            if any(marker in line for marker in READY_MARKERS):
+                elapsed = time.perf_counter() - began
+                break
+        rss = peak_rss_kb(process.pid) if elapsed is not None else None
+    finally:
+        process.send_signal(signal.SIGTERM)
+        try:
+            process.wait(timeout=5)
+        except subprocess.TimeoutExpired:
+            process.kill()
+    return (elapsed, rss) if elapsed is not None else None
+
+
+def report(name: str, command: List[str], runs: int, timeout: float) -> None:
+    samples = [measure(command, timeout) for _ in range(runs)]
+    if not all(samples):
+        print(f"{name:9s} skipped (did not start in this environment)")
+        return
+    times = sorted(sample[0] * 1000.0 for sample in samples)
+    rss = [sample[1] for sample in samples if sample[1] is not None]
+    rss_text = f"{max(rss) / 1024:.1f} MiB" if rss else "n/a"
+    print(f"{name:9s} startup median {times[len(times) // 2]:.1f} ms  min {times[0]:.1f} ms  peak RSS {rss_text}")
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--timeout", type=float, default=15.0)
+    args = parser.parse_args()
+    report("headless", HEADLESS, args.runs, args.timeout)
+    report("gui", GUI, args.runs, args.timeout)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,296 @@
+"""End-to-end performance suite on the simulated backend, with JSON results.
+
+Every case runs the real :class:`~microphone_guardian.worker.EnforcementWorker`
+against :func:`~microphone_guardian.simulated.simulated_backend`, driven
+synchronously on a fake clock, so results depend on the code and not on the
+audio stack of the machine:
+
+* ``enumeration`` – cold start, cached lookups and re-enumeration of the
+  device registry.
+* ``time_to_correct`` – simulated seconds from another app moving the level
+  to the target being back, with polling only and with notifications.
+* ``tick_cost`` – CPU time per enforcement check and per scheduler wakeup.
+* ``memory_growth`` – traced allocations per simulated hour once the
+  window's view model and histories are warm.
+
+All metrics are lower-is-better. ``--output`` writes them as JSON, and
+``--compare`` checks them against an earlier file, exiting non-zero when a
+metric grew by more than ``--tolerance``.
+
+    python benchmarks/suite.py --output results.json
+    python benchmarks/suite.py --quick --compare results.json --tolerance 0.5
+"""
+
+import argparse
+import datetime
+import json
+import os
+import platform
+import subprocess
+import sys
+import time
+import tracemalloc
+from typing import Callable, Dict, List, Optional, Tuple
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from microphone_guardian.registry import DeviceRegistry  # noqa: E402
+from microphone_guardian.simulated import FakeClock, drift_schedule, simulated_backend  # noqa: E402
+from microphone_guardian.viewmodel import GuardedDevice, ViewModel  # noqa: E402
+from microphone_guardian.worker import EnforcementSettings, EnforcementWorker, WorkerCommand  # noqa: E402
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+FORMAT_VERSION = 1
+
+Metrics = Dict[str, Tuple[float, str]]
+
+
+class Harness:
+    """A worker on the simulated backend, stepped by hand on a fake clock."""
+
+    def __init__(
+        self, devices: int, settings: EnforcementSettings, seed: int, post=None, clock: Optional[FakeClock] = None
+    ) -> None:
+        self.clock = clock or FakeClock()
+        self.backend = simulated_backend(devices, seed=seed)
+        self.source = self.backend.source
+        self.worker = EnforcementWorker.for_backend(self.backend, clock=self.clock, post=post)
+        self.worker.registry.start()
+        for device_id in self.source.devices:
+            self.worker.handle(WorkerCommand("start", (device_id, settings)))
+        self.pump()
+
+    def pump(self) -> None:
+        commands = self.worker.commands
+        while not commands.empty():
+            self.worker.handle(commands.get())
+
+    def run_until(self, until: float, after_step: Optional[Callable[[], None]] = None) -> None:
+        """Run every wakeup due before ``until``, then move the clock there."""
+        while True:
+            deadline = self.worker.scheduler.next_deadline()
+            if deadline is None or deadline > until:
+                break
+            self.clock.now = deadline
+            self.worker.run_due()
+            self.pump()
+            if after_step is not None:
+                after_step()
+        self.clock.now = until
+
+    def drift_moves(self, pattern: str, duration: float, period: float, seed: int) -> List[Tuple[float, str, float]]:
+        moves = [
+            (at, device_id, level)
+            for index, device_id in enumerate(self.source.devices)
+            for at, level in drift_schedule(pattern, duration, period, seed=seed + index)
+        ]
+        return sorted(moves)
+
+
+def percentile(samples: List[float], fraction: float) -> float:
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(fraction * len(ordered)))] if ordered else 0.0
+
+
+def best_of(repeats: int, function: Callable[[], None], calls: int = 1) -> float:
+    """Fastest of ``repeats`` timings of ``calls`` calls, in seconds per call; the least noisy estimate."""
+    best = float("inf")
+    for _ in range(repeats):
+        began = time.perf_counter()
+        for _ in range(calls):
+            function()
+        best = min(best, (time.perf_counter() - began) / calls)
+    return best
+
+
+def enumeration(quick: bool) -> Metrics:
+    metrics: Metrics = {}
+    lookups = 100 if quick else 1000
+    for count in (4, 256):
+        registries = []
+
+        def cold_start() -> None:
+            registry = DeviceRegistry(simulated_backend(count).source)
+            registry.start()
+            registry.devices()
+            registries.append(registry)
+
+        metrics[f"cold_start.{count}_devices"] = (best_of(5, cold_start) * 1000, "ms")
+        registry = registries[-1]
+        metrics[f"cached_list.{count}_devices"] = (best_of(5, registry.devices, lookups) * 1e6, "us")
+        metrics[f"resync.{count}_devices"] = (best_of(5, registry.resync, lookups // 10) * 1e6, "us")
+        metrics[f"opens_per_device.{count}_devices"] = (registry.source.opens / count, "opens")
+    return metrics
+
+
+def time_to_correct(quick: bool) -> Metrics:
+    metrics: Metrics = {}
+    duration = 1800.0 if quick else 4 * 3600.0
+    for mode, instant in (("polling", False), ("instant", True)):
+        for pattern in ("step", "random"):
+            settings = EnforcementSettings(interval=1.0, instant=instant)
+            harness = Harness(4, settings, seed=7)
+            devices = harness.source.devices
+            pending: Dict[str, float] = {}
+            delays: List[float] = []
+            handling: List[float] = []
+
+            def settle() -> None:
+                for device_id, since in list(pending.items()):
+                    if abs(devices[device_id].EndpointVolume.level - settings.target) <= settings.tolerance:
+                        delays.append(harness.clock.now - since)
+                        del pending[device_id]
+
+            for at, device_id, level in harness.drift_moves(pattern, duration, 60.0, seed=11):
+                harness.run_until(at, settle)
+                began = time.perf_counter()
+                devices[device_id].EndpointVolume.drift(level)
+                if abs(level - settings.target) > settings.tolerance:
+                    pending.setdefault(device_id, at)
+                harness.pump()
+                settle()
+                if device_id not in pending:
+                    handling.append(time.perf_counter() - began)
+            harness.run_until(duration + 120.0, settle)
+            key = f"{mode}.{pattern}"
+            metrics[f"{key}.mean"] = (sum(delays) / max(1, len(delays)), "s")
+            metrics[f"{key}.p95"] = (percentile(delays, 0.95), "s")
+            metrics[f"{key}.uncorrected"] = (float(len(pending)), "drifts")
+            if instant:
+                # Corrected without waiting for a poll; what it costs in wall-clock time.
+                metrics[f"{key}.handling"] = (sum(handling) / max(1, len(handling)) * 1e6, "us")
+    return metrics
+
+
+def tick_cost(quick: bool) -> Metrics:
+    duration = 120.0 if quick else 900.0
+    per_check = per_wakeup = float("inf")
+    for _ in range(3):
+        harness = Harness(64, EnforcementSettings(interval=0.5, instant=False), seed=3)
+        moves = harness.drift_moves("random", duration, 5.0, seed=5)
+        devices = harness.source.devices
+        began = time.process_time()
+        for at, device_id, level in moves:
+            harness.run_until(at)
+            devices[device_id].EndpointVolume.drift(level)
+        harness.run_until(duration)
+        elapsed = time.process_time() - began
+        checks = sum(enforcer.stats.ticks for enforcer in harness.worker.enforcers.values())
+        per_check = min(per_check, elapsed / max(1, checks))
+        per_wakeup = min(per_wakeup, elapsed / max(1, harness.worker.wakeups))
+    return {"per_check": (per_check * 1e6, "us"), "per_wakeup": (per_wakeup * 1e6, "us")}
+
+
+def memory_growth(quick: bool) -> Metrics:
+    hours = 1 if quick else 6
+    view = ViewModel()
+    clock = FakeClock()
+    settings = EnforcementSettings(interval=0.25, instant=True)
+    harness = Harness(4, settings, seed=13, post=lambda event: view.apply(event, now=clock.now), clock=clock)
+    for device_id in harness.source.devices:
+        view.guarded[device_id] = GuardedDevice(device_id, settings)
+    view.selected = next(iter(harness.source.devices))
+    devices = harness.source.devices
+    moves = harness.drift_moves("random", (hours + 1) * 3600.0, 2.0, seed=17)
+
+    tracemalloc.start()
+    try:
+        warm = 3600.0
+        baseline = None
+        for at, device_id, level in moves:
+            if baseline is None and at >= warm:
+                harness.run_until(warm)
+                view.flush()
+                baseline = tracemalloc.get_traced_memory()[0]
+            harness.run_until(at)
+            devices[device_id].EndpointVolume.drift(level)
+            harness.pump()
+            view.flush()
+        harness.run_until((hours + 1) * 3600.0)
+        view.flush()
+        current, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return {
+        "per_hour": ((current - (baseline or current)) / hours / 1024, "KiB"),
+        "peak": (peak / 1024, "KiB"),
+    }
+
+
+CASES: Dict[str, Callable[[bool], Metrics]] = {
+    "enumeration": enumeration,
+    "time_to_correct": time_to_correct,
+    "tick_cost": tick_cost,
+    "memory_growth": memory_growth,
+}
+
+
+def revision() -> str:
+    try:
+        completed = subprocess.run(
+            ["git", "describe", "--always", "--dirty"], cwd=ROOT, capture_output=True, text=True, check=True
+        )
+    except (OSError, subprocess.CalledProcessError):
+        return "unknown"
+    return completed.stdout.strip()
+
+
+def compare(results: Dict[str, Dict[str, object]], path: str, tolerance: float) -> List[str]:
+    with open(path, encoding="utf-8") as stream:
+        previous = json.load(stream)["results"]
+    regressions = []
+    for name, entry in sorted(results.items()):
+        before = previous.get(name)
+        if before is None:
+            continue
+        old, new = float(before["value"]), float(entry["value"])
+        if new > old * (1 + tolerance) and new - old > 1e-9:
+            regressions.append(f"{name}: {old:.4g} -> {new:.4g} {entry['unit']}")
+    return regressions
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--case", action="append", choices=sorted(CASES), help="run only this case; repeatable")
+    parser.add_argument("--quick", action="store_true", help="shorter simulated runs")
+    parser.add_argument("--output", help="write results to this JSON file")
+    parser.add_argument("--compare", metavar="JSON", help="earlier results to check for regressions")
+    parser.add_argument("--tolerance", type=float, default=0.25, help="allowed relative growth per metric")
+    args = parser.parse_args()
+
+    results: Dict[str, Dict[str, object]] = {}
+    for case in args.case or list(CASES):
+        began = time.perf_counter()
+        for metric, (value, unit) in CASES[case](args.quick).items():
+            results[f"{case}.{metric}"] = {"value": round(value, 6), "unit": unit}
+            print(f"{case}.{metric:<36} {value:12.4f} {unit}")
+        print(f"  ({case} took {time.perf_counter() - began:.1f} s)")
+
+    if args.output:
+        document = {
+            "format": FORMAT_VERSION,
+            "revision": revision(),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "created": datetime.datetime.now(datetime.timezone.utc).isoformat(timespec="seconds"),
+            "quick": args.quick,
+            "results": results,
+        }
+        with open(args.output, "w", encoding="utf-8") as stream:
+            json.dump(document, stream, indent=2)
+            stream.write("\n")
+        print(f"wrote {len(results)} metrics to {args.output}")
+
+    if args.compare:
+        regressions = compare(results, args.compare, args.tolerance)
+        for line in regressions:
+            print(f"REGRESSION {line}")
+        if regressions:
+            print(f"FAIL: {len(regressions)} metrics grew by more than {args.tolerance:.0%}")
+            return 1
+    print("OK")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,113 @@
+"""Time from process start to the first enforcement of a remembered device.
+
+Writes a profile file that marks ``--devices`` simulated endpoints for
+auto-start, then launches a fresh interpreter that takes the window's start-up
+path without a display: import tkinter, load the profiles, start the worker
+and restore them. The clock runs from spawn until the child reports its first
+applied, corrected or verified event. Exits non-zero when the median exceeds
+``--budget-ms``.
+
+    python benchmarks/time_to_enforcement.py --runs 5 --budget-ms 500
+"""
+
+import argparse
+import dataclasses
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+from typing import List, Optional
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from microphone_guardian.profiles import Profile  # noqa: E402
+from microphone_guardian.simulated import demo_source  # noqa: E402
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+
+CHILD = """
+import sys
+try:
+    import tkinter  # noqa: F401  (the window pays for this before it can restore)
+except ImportError:
+    pass
+from microphone_guardian.profiles import ProfileStore, restore
+from microphone_guardian.simulated import demo_source
+from microphone_guardian.worker import EnforcementWorker
+
+def post(event):
+    if event.kind in ("applied", "corrected", "verified"):
+        print("enforcing", file=sys.stderr, flush=True)
+
+store = ProfileStore(sys.argv[1]).load()
+worker = EnforcementWorker(demo_source(int(sys.argv[2])), post=post)
+worker.start()
+restore(store, worker)
+sys.stdin.read()
+"""
+
+
+def write_profiles(path: str, devices: int) -> None:
+    profile = dataclasses.asdict(Profile(auto_start=True))
+    data = {"version": 1, "selected": None, "devices": {device_id: profile for device_id in demo_source(devices).devices}}
+    with open(path, "w", encoding="utf-8") as stream:
+        json.dump(data, stream)
+
+
+def measure(path: str, devices: int, timeout: float) -> Optional[float]:
+    began = time.perf_counter()
+    process = subprocess.Popen(
+        [sys.executable, "-c", CHILD, path, str(devices)],
+        cwd=ROOT,
+        stdin=subprocess.PIPE,
+        stderr=subprocess.PIPE,
+        text=True,
+    )
+    elapsed = None
+    try:
+        while time.perf_counter() - began < timeout:
+            line = process.stderr.readline()
+            if not line:
+                break
+            if line.startswith("enforcing"):
+                elapsed = time.perf_counter() - began
+                break
+    finally:
+        process.stdin.close()
+        try:
+            process.wait(timeout=5)
+        except subprocess.TimeoutExpired:
+            process.kill()
+    return elapsed
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--devices", type=int, default=4)
+    parser.add_argument("--timeout", type=float, default=15.0)
+    parser.add_argument("--budget-ms", type=float, default=500.0)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, "profiles.json")
+        write_profiles(path, args.devices)
+        samples: List[Optional[float]] = [measure(path, args.devices, args.timeout) for _ in range(args.runs)]
+    if not all(samples):
+        print("FAIL: the restored device was never enforced")
+        return 1
+    times = sorted(sample * 1000.0 for sample in samples)
+    median = times[len(times) // 2]
+    print(f"time to first enforcement: median {median:.1f} ms  min {times[0]:.1f} ms  max {times[-1]:.1f} ms")
+    print(f"budget: {args.budget_ms:g} ms")
+    if median > args.budget_ms:
+        print("FAIL: restoring remembered devices is too slow")
+        return 1
+    print("OK")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,78 @@
+"""Check that front-end callbacks stay fast while the audio backend is slow.
+
+Drives an :class:`EnforcementWorker` against fake endpoints that take
+``--latency`` seconds per call and times the work a Tk callback would do:
+submitting commands and draining the result queue. Exits non-zero when any
+callback exceeds ``--budget-ms``.
+
+    python benchmarks/ui_responsiveness.py --latency 0.2 --seconds 3
+"""
+
+import argparse
+import os
+import queue
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from microphone_guardian.simulated import FakeDevice, FakeEndpointSource, FakeVolumeNotifications  # noqa: E402
+from microphone_guardian.worker import EnforcementSettings, EnforcementWorker  # noqa: E402
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--latency", type=float, default=0.2, help="seconds per backend call")
+    parser.add_argument("--seconds", type=float, default=3.0, help="how long to drive the UI loop")
+    parser.add_argument("--frame-ms", type=float, default=50.0, help="UI drain interval")
+    parser.add_argument("--budget-ms", type=float, default=5.0, help="maximum allowed callback duration")
+    args = parser.parse_args()
+
+    devices = [FakeDevice(f"{{0.0.1.00000000}}.{index}", f"Mic {index}") for index in range(4)]
+    for device in devices:
+        device.EndpointVolume.latency = args.latency
+    source = FakeEndpointSource(devices, latency=args.latency)
+    results: "queue.SimpleQueue" = queue.SimpleQueue()
+    worker = EnforcementWorker(source, FakeVolumeNotifications(), post=results.put)
+    worker.start()
+
+    durations = []
+    handled = 0
+    started = False
+    deadline = time.perf_counter() + args.seconds
+    frame = 0
+    while time.perf_counter() < deadline:
+        began = time.perf_counter()
+        if frame % 10 == 0:
+            worker.submit("refresh")
+        if not started and frame == 5:
+            worker.submit("start", (devices[0].id, EnforcementSettings(target=1.0, interval=0.1, instant=True)))
+            started = True
+        if frame % 7 == 0:
+            devices[0].EndpointVolume.level = 0.3
+        while True:
+            try:
+                results.get_nowait()
+            except queue.Empty:
+                break
+            handled += 1
+        durations.append((time.perf_counter() - began) * 1000.0)
+        frame += 1
+        time.sleep(args.frame_ms / 1000.0)
+    worker.shutdown(timeout=args.latency * 10)
+
+    durations.sort()
+    worst = durations[-1]
+    p99 = durations[int(len(durations) * 0.99) - 1]
+    print(f"callbacks: {len(durations)}  results handled: {handled}")
+    print(f"callback p99: {p99:.3f} ms  worst: {worst:.3f} ms  budget: {args.budget_ms:.1f} ms")
+    print(f"backend latency per call: {args.latency * 1000:.0f} ms")
+    if worst > args.budget_ms:
+        print("FAIL: a UI callback exceeded the budget")
+        return 1
+    print("OK")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
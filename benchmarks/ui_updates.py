@@ -0,0 +1,89 @@
+"""Count Tk writes per 1,000 engine ticks with the change-only view model.
+
+Drives a synchronous :class:`EnforcementWorker` on a fake clock, feeds its
+events into :class:`~microphone_guardian.viewmodel.ViewModel` the way the
+window does, and flushes once per ``--frame-ms`` of simulated time. Every
+flushed field is counted as the Tk calls the window would make for it (the
+status line costs two: the label and the indicator). The same events are
+also counted as the old per-event updates would have written them. Exits
+non-zero when the view model needs more than ``--max-ratio`` of the
+per-event writes.
+
+    python benchmarks/ui_updates.py --devices 4 --interval-ms 50
+"""
+
+import argparse
+import os
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from microphone_guardian.simulated import FakeClock, demo_source  # noqa: E402
+from microphone_guardian.viewmodel import STATUS, GuardedDevice, ViewModel  # noqa: E402
+from microphone_guardian.worker import EnforcementSettings, EnforcementWorker, WorkerCommand  # noqa: E402
+
+
+def tk_calls(key: object) -> int:
+    return 2 if key == STATUS else 1
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--devices", type=int, default=4)
+    parser.add_argument("--interval-ms", type=float, default=50.0)
+    parser.add_argument("--ticks", type=int, default=1000)
+    parser.add_argument("--frame-ms", type=float, default=100.0)
+    parser.add_argument("--drift-every", type=int, default=50, help="knock a device off target every N ticks")
+    parser.add_argument("--max-ratio", type=float, default=0.1, help="allowed fraction of the per-event writes")
+    args = parser.parse_args()
+
+    clock = FakeClock()
+    source = demo_source(args.devices)
+    view = ViewModel()
+    events = []
+    worker = EnforcementWorker(source, post=events.append, clock=clock)
+    worker.registry.start()
+    settings = EnforcementSettings(interval=args.interval_ms / 1000.0, instant=False)
+    for device in source.devices.values():
+        view.guarded[device.id] = GuardedDevice(device.FriendlyName, settings)
+        worker.handle(WorkerCommand("start", (device.id, settings)))
+        worker.enforcers[device.id].backoff.factor = 1.0
+    volumes = [device.EndpointVolume for device in source.devices.values()]
+    view.selected = next(iter(source.devices))
+
+    naive = 0
+    ticks = 0
+    frame = args.frame_ms / 1000.0
+    next_flush = clock.now + frame
+    view.flush()
+    events.clear()
+    while ticks < args.ticks:
+        clock.now = min(worker.scheduler.next_deadline(), next_flush)
+        if ticks and ticks % args.drift_every == 0:
+            volumes[ticks % len(volumes)].level = 0.4
+        ticks += worker.run_due()
+        for event in events:
+            if view.apply(event, clock.now):
+                # Old window: one row update per event, plus three labels and
+                # the status line for the selected device.
+                naive += 1 + (3 + tk_calls(STATUS) if event.device_id == view.selected else 0)
+        events.clear()
+        if clock.now >= next_flush:
+            changed = view.flush()
+            view.writes += sum(tk_calls(key) - 1 for key in changed)
+            next_flush += frame
+
+    per_thousand = view.writes * 1000 / ticks
+    naive_per_thousand = naive * 1000 / ticks
+    print(f"{ticks} ticks over {args.devices} devices, {view.flushes} frames")
+    print(f"Tk calls per 1,000 ticks: {per_thousand:.0f} (per-event updates: {naive_per_thousand:.0f})")
+    print(f"Tk calls per frame: {view.writes / view.flushes:.2f}")
+    if per_thousand > naive_per_thousand * args.max_ratio:
+        print("FAIL: the view model pushes too many Tk writes")
+        return 1
+    print("OK")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1 @@
+"""Core building blocks for keeping a capture endpoint at its target level."""
@@ -0,0 +1,334 @@
+"""Command-line entry point: ``python -m microphone_guardian``.
+
+    python -m microphone_guardian              # open the window
+    python -m microphone_guardian list
+    python -m microphone_guardian run --device-id "{0.0.1.00000000}.{...}" --target 100 --interval-ms 500
+    python -m microphone_guardian ctl set-target 80     # talk to the instance that is already running
+    python -m microphone_guardian run --record session.trace
+    python -m microphone_guardian replay session.trace --interval-ms 1000
+    python -m microphone_guardian ctl profile-stop --output guardian.trace.json
+"""
+
+import argparse
+import dataclasses
+import json
+import logging
+import os
+import sys
+import threading
+from typing import Any, List, Optional
+
+from .engine import CONTENTION_STRATEGIES, DEFAULT_TOLERANCE
+from .worker import MIN_INTERVAL_SECONDS, Backend, EnforcementSettings
+
+
+def _backend(name: str) -> Backend:
+    if name == "simulated":
+        from .simulated import simulated_backend
+
+        return simulated_backend(inactive=2)
+    from .backend import wasapi_backend
+
+    return wasapi_backend()
+
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(prog="microphone_guardian", description="Keep a microphone at its target level.")
+    parser.add_argument("--backend", choices=("wasapi", "simulated"), default="wasapi", help=argparse.SUPPRESS)
+    parser.add_argument("-v", "--verbose", action="store_true", help="log every check, not just corrections")
+    commands = parser.add_subparsers(dest="command")
+
+    commands.add_parser("gui", help="open the window (default)")
+    commands.add_parser("list", help="list active recording devices")
+
+    run = commands.add_parser("run", help="enforce the target level without a window")
+    run.add_argument(
+        "--device-id",
+        action="append",
+        default=[],
+        help="endpoint ID from 'list'; repeat to guard several devices (default: first active device)",
+    )
+    run.add_argument("--target", type=int, default=100, help="target level in percent (default: 100)")
+    run.add_argument("--interval-ms", type=int, default=5000, help="poll interval in milliseconds (default: 5000)")
+    run.add_argument(
+        "--tolerance",
+        type=float,
+        default=DEFAULT_TOLERANCE * 100,
+        help="leave the level alone within this many percent (default: %(default)s)",
+    )
+    run.add_argument("--no-instant", action="store_true", help="poll only; ignore volume-change notifications")
+    run.add_argument(
+        "--idle-when-unused",
+        action="store_true",
+        help="stop polling while no application is recording from the device",
+    )
+    run.add_argument(
+        "--on-contention",
+        choices=CONTENTION_STRATEGIES,
+        default="backoff",
+        help="what to do when another application keeps changing the level (default: %(default)s)",
+    )
+    run.add_argument(
+        "--metrics-port",
+        type=int,
+        help="serve Prometheus metrics on 127.0.0.1:PORT/metrics (JSON at /metrics.json)",
+    )
+    run.add_argument(
+        "--no-control",
+        action="store_true",
+        help="allow several instances and do not listen for 'ctl' commands",
+    )
+    run.add_argument(
+        "--audit-log",
+        metavar="PATH",
+        help="where to append the JSON-lines audit log (default: audit/audit.jsonl in the config folder)",
+    )
+    run.add_argument("--no-audit-log", action="store_true", help="do not keep an audit log")
+    run.add_argument("--record", metavar="PATH", help="write a binary trace of the run for 'replay'")
+    run.add_argument("--profile", metavar="PATH", help="profile the run and write a Chrome trace (open in Perfetto)")
+    run.add_argument(
+        "--rules",
+        metavar="PATH",
+        help="per-application rule file (default: rules.json in the config folder, if there is one)",
+    )
+    run.add_argument("--no-rules", action="store_true", help="ignore the rule file")
+    run.add_argument("--duration", type=float, help=argparse.SUPPRESS)
+
+    replay = commands.add_parser("replay", help="run a recorded trace through the current code on a virtual clock")
+    replay.add_argument("trace", help="file written by 'run --record'")
+    replay.add_argument("--interval-ms", type=int, help="replace the recorded poll interval")
+    replay.add_argument("--no-instant", action="store_true", help="replay with notifications turned off")
+    replay.add_argument("--json", action="store_true", help="print the report as JSON")
+
+    ctl = commands.add_parser("ctl", help="send a command to the instance that is already running")
+    ctl.add_argument(
+        "action",
+        choices=(
+            "status",
+            "list-devices",
+            "set-target",
+            "pause",
+            "resume",
+            "ping",
+            "profile-start",
+            "profile-stop",
+            "profile-sample",
+        ),
+    )
+    ctl.add_argument("target", nargs="?", type=float, help="target level in percent, for set-target")
+    ctl.add_argument("--device", help="endpoint ID or name (default: every guarded device)")
+    ctl.add_argument(
+        "--output",
+        metavar="PATH",
+        help="file for profile-stop (default: guardian.trace.json) or profile-sample (default: guardian.folded)",
+    )
+    ctl.add_argument(
+        "--seconds",
+        type=float,
+        default=5.0,
+        help="how long profile-sample samples for (default: %(default)s)",
+    )
+    ctl.add_argument("--json", action="store_true", help="print the raw JSON result")
+    return parser
+
+
+def _control(args: argparse.Namespace) -> int:
+    from .control import CALL_TIMEOUT_SECONDS, ControlClient, ControlError, NotRunning
+
+    arguments: dict = {}
+    if args.device is not None:
+        arguments["device"] = args.device
+    if args.action == "set-target":
+        if args.target is None:
+            print("set-target needs a target level in percent", file=sys.stderr)
+            return 2
+        arguments["target"] = args.target
+    timeout = CALL_TIMEOUT_SECONDS + 1.0
+    if args.action in ("profile-stop", "profile-sample"):
+        default = "guardian.trace.json" if args.action == "profile-stop" else "guardian.folded"
+        # The running instance writes the file, so it needs a path that does not depend on its working directory.
+        arguments["path"] = os.path.abspath(args.output or default)
+    if args.action == "profile-sample":
+        arguments["seconds"] = args.seconds
+        timeout += args.seconds
+    try:
+        with ControlClient(timeout=timeout) as client:
+            result = client.request(args.action, **arguments)
+    except NotRunning as exc:
+        print(exc, file=sys.stderr)
+        return 3
+    except ControlError as exc:
+        print(exc, file=sys.stderr)
+        return 1
+    if args.json:
+        print(json.dumps(result, indent=2))
+    else:
+        _print_result(args.action, result)
+    return 0
+
+
+def _print_result(action: str, result: Any) -> None:
+    if action == "status":
+        for device in result["devices"]:
+            rule = f"\t{device['rule']}" if "rule" in device else ""
+            print(f"{device['id']}\t{device['name']}\t{device['state']}\t{device['target']}%{rule}")
+    elif action == "list-devices":
+        for device in result:
+            print(f"{device['id']}\t{device['name']}" + ("\tguarded" if device["guarded"] else ""))
+    elif action == "ping":
+        print(f"running as process {result['pid']}")
+    elif action == "profile-start":
+        print(f"profiling; keeping the last {result['capacity']} spans")
+    elif action == "profile-stop":
+        print(f"wrote {result['spans']} spans to {result['path']}")
+    elif action == "profile-sample":
+        print(f"wrote {result['samples']} stack samples to {result['path']}")
+    elif result:
+        print("\n".join(result))
+    else:
+        print("No guarded device was affected.", file=sys.stderr)
+
+
+def _replay(args: argparse.Namespace) -> int:
+    from . import trace
+
+    try:
+        records = trace.load(args.trace)
+    except (OSError, ValueError) as exc:
+        print(f"Cannot read {args.trace}: {exc}", file=sys.stderr)
+        return 1
+    changes: dict = {}
+    if args.interval_ms is not None:
+        changes["interval"] = max(MIN_INTERVAL_SECONDS, args.interval_ms / 1000.0)
+    if args.no_instant:
+        changes["instant"] = False
+
+    def adjust(settings: EnforcementSettings) -> EnforcementSettings:
+        return dataclasses.replace(settings, **changes)
+
+    report = trace.replay(records, adjust=adjust if changes else None)
+    if args.json:
+        print(json.dumps(dict(dataclasses.asdict(report), speedup=report.speedup), indent=2))
+        return 0
+    print(
+        f"{report.records} records, {report.duration:.1f} s replayed in "
+        f"{report.wall_seconds:.3f} s ({report.speedup:.0f}x)"
+    )
+    print(f"external moves: {report.external_moves}, wakeups: {report.wakeups}")
+    print(f"reads: {report.reads} (recorded {report.recorded_reads})")
+    print(f"writes: {report.writes} (recorded {report.recorded_writes})")
+    print(f"time off target: {report.off_target_seconds:.2f} s")
+    return 0
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    args = build_parser().parse_args(argv)
+    if args.command in (None, "gui"):
+        from .gui import main as gui_main
+
+        gui_main(_backend(args.backend))
+        return 0
+    if args.command == "ctl":
+        return _control(args)
+    if args.command == "replay":
+        return _replay(args)
+    logging.basicConfig(
+        level=logging.DEBUG if args.verbose else logging.INFO,
+        format="%(asctime)s %(levelname)s %(message)s",
+    )
+    from . import headless
+
+    backend = _backend(args.backend)
+    if args.command == "list":
+        for info in headless.list_devices(backend.source, backend.apartment):
+            print(f"{info.id}\t{info.name}")
+        return 0
+
+    if not 0 <= args.target <= 100:
+        print("--target must be between 0 and 100", file=sys.stderr)
+        return 2
+    if args.interval_ms < MIN_INTERVAL_SECONDS * 1000:
+        print(f"--interval-ms must be at least {MIN_INTERVAL_SECONDS * 1000:g}", file=sys.stderr)
+        return 2
+    settings = EnforcementSettings(
+        target=args.target / 100.0,
+        tolerance=max(0.0, args.tolerance) / 100.0,
+        interval=args.interval_ms / 1000.0,
+        instant=not args.no_instant,
+        contention=args.on_contention,
+        activity_gated=args.idle_when_unused,
+    )
+    rules = None
+    if not args.no_rules:
+        from . import rules as rule_file
+
+        try:
+            rules = rule_file.load(args.rules)
+        except (OSError, ValueError) as exc:
+            print(f"Cannot load rules from {args.rules or rule_file.default_path()}: {exc}", file=sys.stderr)
+            return 2
+    lock = None
+    if not args.no_control:
+        from .control import InstanceLock
+
+        lock = InstanceLock()
+        if not lock.acquire():
+            print(
+                "Microphone Guardian is already running; use 'ctl' to control it, or pass --no-control.",
+                file=sys.stderr,
+            )
+            return 3
+    stop = threading.Event()
+    headless.install_signal_handlers(stop)
+    metrics = server = None
+    if args.metrics_port is not None:
+        from .metrics import Metrics, MetricsServer
+
+        metrics = Metrics()
+        try:
+            server = MetricsServer(metrics, port=args.metrics_port)
+        except OSError as exc:
+            print(f"Cannot serve metrics on port {args.metrics_port}: {exc}", file=sys.stderr)
+            if lock is not None:
+                lock.release()
+            return 2
+        server.start()
+        logging.getLogger("microphone_guardian").info("Serving metrics on http://%s:%d/metrics", *server.address)
+    audit = None
+    if not args.no_audit_log:
+        from .audit import AuditLog
+
+        audit = AuditLog(args.audit_log).start()
+    try:
+        return headless.run(
+            backend.source,
+            settings,
+            device_ids=args.device_id,
+            notifications=backend.notifications,
+            apartment=backend.apartment,
+            activity=backend.activity,
+            stop=stop,
+            duration=args.duration,
+            metrics=metrics,
+            control=lock is not None,
+            record=args.record,
+            audit=audit,
+            profile=args.profile,
+            sessions=backend.sessions,
+            rules=rules,
+        )
+    finally:
+        if audit is not None:
+            audit.close()
+            if audit.dropped:
+                logging.getLogger("microphone_guardian").warning(
+                    "The audit log dropped %d events because the disk could not keep up.", audit.dropped
+                )
+        if server is not None:
+            server.close()
+        if lock is not None:
+            lock.release()
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,276 @@
+"""Durable JSON-lines record of corrections, failures and device changes.
+
+:meth:`AuditLog.record` runs on the worker thread for every event it posts.
+It checks the event kind and appends audited events to a bounded in-memory
+deque; an append takes no lock, and the writer is only signalled when it is
+asleep. When the deque is full the event is dropped and counted, so a slow
+disk can never stall enforcement. A background thread formats the queued
+events, and writes and flushes them in batches to files rotated by size.
+Events in a batch that cannot be written are counted as dropped too. Each
+batch is followed by a ``dropped`` line if events were lost since the
+previous one.
+"""
+
+import collections
+import contextlib
+import dataclasses
+import json
+import logging
+import os
+import threading
+import time
+from typing import IO, Any, Callable, Dict, List, Optional, Tuple
+
+from .engine import EnforcementEvent
+from .profiles import config_dir
+
+log = logging.getLogger("microphone_guardian")
+
+AUDITED_KINDS = frozenset(
+    (
+        "corrected",
+        "applied",
+        "error",
+        "stopped",
+        "parked",
+        "paused",
+        "configured",
+        "contention",
+        "activity",
+        "devices",
+        "notifications-unavailable",
+        "activity-unavailable",
+        "rule",
+        "sessions-unavailable",
+    )
+)
+QUEUE_SIZE = 10000
+BATCH_SIZE = 512
+LINGER_SECONDS = 0.5
+LINGER_SLICES = 10
+MAX_BYTES = 1024 * 1024
+BACKUPS = 5
+
+_encode = json.JSONEncoder(separators=(",", ":")).encode
+
+
+def default_path() -> str:
+    return os.path.join(config_dir(), "audit", "audit.jsonl")
+
+
+def _open_append(path: str) -> IO[str]:
+    return open(path, "a", encoding="utf-8")
+
+
+class AuditLog:
+    """Queue audited events and write them as JSON lines from a background thread.
+
+    ``audit.jsonl`` is renamed to ``audit.jsonl.1`` once it would grow past
+    ``max_bytes``. Older files shift up to ``backups``, and the oldest is
+    deleted. A batch is written once ``batch_size`` events are waiting, or
+    ``linger`` seconds after its first event, whichever comes first.
+    """
+
+    def __init__(
+        self,
+        path: Optional[str] = None,
+        max_bytes: int = MAX_BYTES,
+        backups: int = BACKUPS,
+        queue_size: int = QUEUE_SIZE,
+        batch_size: int = BATCH_SIZE,
+        linger: float = LINGER_SECONDS,
+        sync: bool = True,
+        opener: Callable[[str], IO[str]] = _open_append,
+    ) -> None:
+        self.path = path or default_path()
+        self.max_bytes = max_bytes
+        self.backups = backups
+        self.batch_size = batch_size
+        self.linger = linger
+        self.sync = sync
+        self.opener = opener
+        self.overflowed = 0
+        self.unwritten = 0
+        self.written = 0
+        self.batches = 0
+        self.rotations = 0
+        self.queue_size = queue_size
+        self._pending: "collections.deque[Tuple[float, EnforcementEvent]]" = collections.deque()
+        self._wake = threading.Event()
+        self._stopping = False
+        self._reported_drops = 0
+        self._devices: Optional[Dict[str, str]] = None
+        self._stream: Optional[IO[str]] = None
+        self._size = 0
+        self._timestamp = _Timestamps()
+        self._thread = threading.Thread(target=self._run, name="audit-writer", daemon=True)
+
+    def start(self) -> "AuditLog":
+        self._thread.start()
+        return self
+
+    def record(self, event: EnforcementEvent) -> None:
+        """Queue ``event`` if it is audited; never blocks."""
+        if event.kind not in AUDITED_KINDS:
+            return
+        pending = self._pending
+        if len(pending) >= self.queue_size:
+            self.overflowed += 1
+            return
+        pending.append((time.time(), event))
+        if not self._wake.is_set():
+            self._wake.set()
+
+    @property
+    def dropped(self) -> int:
+        """Events lost to a full queue or to failed writes."""
+        return self.overflowed + self.unwritten
+
+    def tee(self, post: Callable[[EnforcementEvent], None]) -> Callable[[EnforcementEvent], None]:
+        """Wrap a worker ``post`` callback so every event is also recorded."""
+        record = self.record
+
+        def both(event: EnforcementEvent) -> None:
+            record(event)
+            post(event)
+
+        return both
+
+    def close(self, timeout: Optional[float] = 5.0) -> None:
+        """Write what is still queued and stop the writer."""
+        if not self._thread.is_alive():
+            return
+        self._stopping = True
+        self._wake.set()
+        self._thread.join(timeout)
+        if self._thread.is_alive():
+            log.warning("Audit log writer is stuck; %d queued events are lost.", len(self._pending))
+
+    def _run(self) -> None:
+        pending = self._pending
+        while not self._stopping:
+            self._wake.wait()
+            self._wake.clear()
+            # Nap while a batch fills up instead of waking for every event.
+            closes_at = time.monotonic() + self.linger
+            while len(pending) < self.batch_size and not self._stopping:
+                remaining = closes_at - time.monotonic()
+                if remaining <= 0:
+                    break
+                time.sleep(min(remaining, self.linger / LINGER_SLICES))
+            self._write_pending(len(pending))
+        self._write_pending(len(pending))
+        if self._stream is not None:
+            self._stream.close()
+
+    def _write_pending(self, count: int) -> None:
+        """Write the oldest ``count`` queued events, ``batch_size`` at a time."""
+        while count:
+            size = min(self.batch_size, count)
+            self._write_batch([self._pending.popleft() for _ in range(size)])
+            count -= size
+
+    def _write_batch(self, batch: List[Tuple[float, EnforcementEvent]]) -> None:
+        entries = [entry for stamp, event in batch for entry in self._entries(stamp, event)]
+        count = len(entries)
+        dropped, self._reported_drops = self.dropped - self._reported_drops, self.dropped
+        if dropped:
+            entries.append({"time": self._timestamp(time.time()), "kind": "dropped", "count": dropped})
+        if not entries:
+            return
+        # ASCII-only JSON, so characters are bytes for the size limit.
+        data = "".join(_encode(entry) + "\n" for entry in entries)
+        try:
+            if self._stream is None or (self._size and self._size + len(data) > self.max_bytes):
+                self._open(len(data))
+            self._stream.write(data)
+            self._stream.flush()
+            if self.sync and hasattr(self._stream, "fileno"):
+                os.fsync(self._stream.fileno())
+        except OSError as exc:
+            log.warning("Could not write %d audit events to %s: %s", count, self.path, exc)
+            self.unwritten += len(batch)  # the writer thread is the only one that touches this counter
+            self._reported_drops -= dropped  # the dropped line did not make it either
+            if self._stream is not None:
+                with contextlib.suppress(OSError):
+                    self._stream.close()
+                self._stream = None
+            return
+        self._size += len(data)
+        self.written += count
+        self.batches += 1
+
+    def _open(self, incoming: int) -> None:
+        """(Re)open the log, first rotating it if ``incoming`` more bytes would not fit."""
+        if self._stream is not None:
+            self._stream.close()
+            self._stream = None
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        size = os.path.getsize(self.path) if os.path.exists(self.path) else 0
+        if size and size + incoming > self.max_bytes:
+            for index in range(self.backups - 1, 0, -1):
+                older = f"{self.path}.{index}"
+                if os.path.exists(older):
+                    os.replace(older, f"{self.path}.{index + 1}")
+            if self.backups:
+                os.replace(self.path, f"{self.path}.1")
+            else:
+                os.remove(self.path)
+            self.rotations += 1
+            size = 0
+        self._stream = self.opener(self.path)
+        self._size = size
+
+    def _entries(self, stamp: float, event: EnforcementEvent) -> List[Dict[str, Any]]:
+        """Turn one event into log entries; device lists become added/removed entries."""
+        base: Dict[str, Any] = {"time": self._timestamp(stamp), "kind": event.kind}
+        if event.device_id:
+            base["device"] = event.device_id
+        if event.kind == "devices":
+            current = {info.id: info.name for info in event.payload}
+            previous, self._devices = self._devices, current
+            if previous is None:
+                base["devices"] = [{"id": device_id, "name": name} for device_id, name in current.items()]
+                return [base]
+            entries = [
+                dict(base, kind="device-added", device=device_id, name=name)
+                for device_id, name in current.items()
+                if device_id not in previous
+            ]
+            entries.extend(
+                dict(base, kind="device-removed", device=device_id, name=name)
+                for device_id, name in previous.items()
+                if device_id not in current
+            )
+            return entries
+        base["level"] = round(event.level, 4)
+        if event.message:
+            base["message"] = event.message
+        if event.kind in ("corrected", "applied") and event.payload is not None:
+            base["observed"] = round(event.payload, 4)
+        elif event.kind == "contention":
+            base["fighting"] = bool(event.payload)
+        elif event.kind == "activity":
+            base["capturing"] = bool(event.payload)
+        elif event.kind == "rule":
+            base["rule"] = dataclasses.asdict(event.payload) if event.payload is not None else None
+        elif dataclasses.is_dataclass(event.payload):
+            base["settings"] = dataclasses.asdict(event.payload)
+        return [base]
+
+
+class _Timestamps:
+    """UTC ISO 8601 times with milliseconds; the seconds part is formatted once per second."""
+
+    def __init__(self) -> None:
+        self._second = -1
+        self._prefix = ""
+
+    def __call__(self, stamp: float) -> str:
+        second = int(stamp)
+        if second != self._second:
+            self._second = second
+            self._prefix = time.strftime("%Y-%m-%dT%H:%M:%S", time.gmtime(second))
+        return f"{self._prefix}.{int((stamp - second) * 1000):03d}Z"
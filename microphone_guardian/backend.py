@@ -0,0 +1,302 @@
+"""Windows audio backend built on pycaw and comtypes.
+
+Nothing here imports pycaw or comtypes at module load; the first call that
+needs them does. That keeps ``import microphone_guardian`` cheap and lets the
+core run on machines without the Windows audio stack.
+"""
+
+import contextlib
+import ntpath
+import sys
+import threading
+from typing import Callable, Dict, FrozenSet, Iterator, List, Optional, Tuple
+
+from .registry import DEVICE_STATE_ACTIVE, DeviceEventListener
+from .worker import Backend
+
+FRIENDLY_NAME_FMTID = "{a45c254e-df1c-4efd-8020-67d146a850e0}"
+FRIENDLY_NAME_PID = 14
+COINIT_MULTITHREADED = 0x0
+
+
+def _flow(direction: str) -> int:
+    from pycaw.pycaw import EDataFlow
+
+    return EDataFlow.eCapture.value if direction == "in" else EDataFlow.eRender.value
+
+
+def _create_enumerator():
+    import comtypes
+    from pycaw.constants import CLSID_MMDeviceEnumerator
+    from pycaw.pycaw import IMMDeviceEnumerator
+
+    return comtypes.CoCreateInstance(
+        CLSID_MMDeviceEnumerator,
+        IMMDeviceEnumerator,
+        comtypes.CLSCTX_INPROC_SERVER,
+    )
+
+
+def get_audio_devices(direction: str = "in", state: int = DEVICE_STATE_ACTIVE) -> List:
+    """Return a list of audio endpoint devices for the requested direction."""
+    from pycaw.pycaw import AudioUtilities
+
+    devices: List = []
+    device_enumerator = _create_enumerator()
+    if device_enumerator is None:
+        return devices
+    collection = device_enumerator.EnumAudioEndpoints(_flow(direction), state)
+    if collection is None:
+        return devices
+    for index in range(collection.GetCount()):
+        imm_device = collection.Item(index)
+        devices.append(AudioUtilities.CreateDevice(imm_device))
+    return devices
+
+
+@contextlib.contextmanager
+def com_apartment() -> Iterator[None]:
+    """Initialise a multithreaded COM apartment for the calling thread."""
+    if "comtypes" not in sys.modules:
+        # comtypes initialises COM on the importing thread using this flag.
+        sys.coinit_flags = COINIT_MULTITHREADED  # type: ignore[attr-defined]
+    import comtypes
+
+    comtypes.CoInitializeEx(COINIT_MULTITHREADED)
+    try:
+        yield
+    finally:
+        comtypes.CoUninitialize()
+
+
+class PycawEndpointSource:
+    """Endpoint source that keeps one ``IMMDeviceEnumerator`` for the lifetime of the app."""
+
+    def __init__(self) -> None:
+        self._enumerator = None
+
+    @property
+    def enumerator(self):
+        if self._enumerator is None:
+            self._enumerator = _create_enumerator()
+        return self._enumerator
+
+    def enumerate(self, direction: str, state: int) -> List[str]:
+        collection = self.enumerator.EnumAudioEndpoints(_flow(direction), state)
+        if collection is None:
+            return []
+        return [collection.Item(index).GetId() for index in range(collection.GetCount())]
+
+    def open(self, device_id: str) -> object:
+        from pycaw.pycaw import AudioUtilities
+
+        return AudioUtilities.CreateDevice(self.enumerator.GetDevice(device_id))
+
+    def direction(self, device_id: str) -> str:
+        # Endpoint IDs encode the data flow: {0.0.1.…} is capture, {0.0.0.…} is render.
+        return "in" if device_id.startswith("{0.0.1.") else "out"
+
+    def subscribe(self, listener: DeviceEventListener) -> Callable[[], None]:
+        try:
+            from pycaw.callbacks import MMNotificationClient
+        except ImportError:  # older pycaw releases ship without callback helpers
+            raise RuntimeError("this pycaw version does not support device notifications") from None
+
+        class _Client(MMNotificationClient):
+            def on_device_added(self, added_device_id):
+                listener.on_device_added(added_device_id)
+
+            def on_device_removed(self, removed_device_id):
+                listener.on_device_removed(removed_device_id)
+
+            def on_device_state_changed(self, device_id, new_state, new_state_id):
+                listener.on_device_state_changed(device_id, new_state_id)
+
+            def on_property_value_changed(self, device_id, key, fmtid, pid):
+                if str(fmtid).lower() == FRIENDLY_NAME_FMTID and pid == FRIENDLY_NAME_PID:
+                    listener.on_property_changed(device_id)
+
+        client = _Client()
+        enumerator = self.enumerator
+        enumerator.RegisterEndpointNotificationCallback(client)
+        return lambda: enumerator.UnregisterEndpointNotificationCallback(client)
+
+
+class EndpointVolumeNotifications:
+    """Deliver ``IAudioEndpointVolume`` change notifications to the enforcement engine."""
+
+    def register(self, endpoint_volume: object, callback: Callable[[float, bool], None]) -> Callable[[], None]:
+        try:
+            from pycaw.callbacks import AudioEndpointVolumeCallback
+        except ImportError:  # older pycaw releases ship without callback helpers
+            raise RuntimeError("this pycaw version does not support volume notifications") from None
+
+        class _Sink(AudioEndpointVolumeCallback):
+            def on_notify(self, new_volume, new_mute, event_context, channels, channel_volumes):
+                callback(new_volume, bool(new_mute))
+
+        sink = _Sink()
+        endpoint_volume.RegisterControlChangeNotify(sink)
+        return lambda: endpoint_volume.UnregisterControlChangeNotify(sink)
+
+
+AUDIO_SESSION_STATE_ACTIVE = 1
+AUDIO_SESSION_STATE_EXPIRED = 2
+PROCESS_QUERY_LIMITED_INFORMATION = 0x1000
+
+
+def process_name(pid: int) -> str:
+    """Executable file name of process ``pid``, or ``""`` when it cannot be queried."""
+    import ctypes
+    from ctypes import wintypes
+
+    kernel32 = ctypes.WinDLL("kernel32", use_last_error=True)
+    kernel32.OpenProcess.restype = wintypes.HANDLE
+    kernel32.OpenProcess.argtypes = (wintypes.DWORD, wintypes.BOOL, wintypes.DWORD)
+    kernel32.QueryFullProcessImageNameW.argtypes = (
+        wintypes.HANDLE,
+        wintypes.DWORD,
+        wintypes.LPWSTR,
+        ctypes.POINTER(wintypes.DWORD),
+    )
+    kernel32.CloseHandle.argtypes = (wintypes.HANDLE,)
+    handle = kernel32.OpenProcess(PROCESS_QUERY_LIMITED_INFORMATION, False, pid)
+    if not handle:
+        return ""
+    try:
+        size = wintypes.DWORD(32768)
+        buffer = ctypes.create_unicode_buffer(size.value)
+        if not kernel32.QueryFullProcessImageNameW(handle, 0, buffer, ctypes.byref(size)):
+            return ""
+        return ntpath.basename(buffer.value)
+    finally:
+        kernel32.CloseHandle(handle)
+
+
+class CaptureSessionActivity:
+    """Report whether any application has an active capture session on an endpoint.
+
+    Uses ``IAudioSessionManager2`` session-created notifications plus
+    per-session state events, so nothing is polled.
+    """
+
+    def watch(self, device: object, callback: Callable[[bool], None]) -> Callable[[], None]:
+        return self._watch(device, callback)
+
+    def _summarize(self, pids: List[int]) -> object:
+        """What ``callback`` is told, given the process IDs of the active sessions."""
+        return bool(pids)
+
+    def _watch(self, device: object, callback: Callable[[object], None]) -> Callable[[], None]:
+        import comtypes
+        from pycaw.pycaw import IAudioSessionControl2, IAudioSessionManager2
+
+        try:
+            from pycaw.callbacks import AudioSessionEvents, AudioSessionNotification
+        except ImportError:  # older pycaw releases ship without callback helpers
+            raise RuntimeError("this pycaw version does not support session notifications") from None
+
+        imm_device = getattr(device, "_dev", device)
+        manager = imm_device.Activate(IAudioSessionManager2._iid_, comtypes.CLSCTX_ALL, None)
+        manager = manager.QueryInterface(IAudioSessionManager2)
+        states: Dict[int, int] = {}
+        pids: Dict[int, int] = {}
+        sinks: List[Tuple[object, Optional[object]]] = []
+        reported: List[object] = []
+        lock = threading.RLock()  # session events arrive on COM worker threads
+
+        def report() -> None:
+            with lock:
+                summary = self._summarize(
+                    [pids[key] for key, state in states.items() if state == AUDIO_SESSION_STATE_ACTIVE]
+                )
+                if reported and reported[-1] == summary:
+                    return
+                reported[:] = [summary]
+            callback(summary)
+
+        def follow(control) -> None:
+            control = control.QueryInterface(IAudioSessionControl2)
+            with lock:
+                key = len(sinks)
+                sinks.append((control, None))
+                pids[key] = control.GetProcessId()
+
+            class _Events(AudioSessionEvents):
+                def on_state_changed(self, new_state, new_state_id):
+                    with lock:
+                        if new_state_id == AUDIO_SESSION_STATE_EXPIRED:
+                            states.pop(key, None)
+                        else:
+                            states[key] = new_state_id
+                    report()
+
+            events = _Events()
+            control.RegisterAudioSessionNotification(events)
+            with lock:
+                sinks[key] = (control, events)
+                states[key] = control.GetState()
+
+        class _Sessions(AudioSessionNotification):
+            def on_session_created(self, new_session):
+                follow(new_session)
+                report()
+
+        notification = _Sessions()
+        # Session notifications only start flowing once the sessions have been enumerated.
+        enumerator = manager.GetSessionEnumerator()
+        manager.RegisterSessionNotification(notification)
+        for index in range(enumerator.GetCount()):
+            follow(enumerator.GetSession(index))
+        report()
+
+        def unregister() -> None:
+            manager.UnregisterSessionNotification(notification)
+            for control, events in sinks:
+                if events is None:
+                    continue
+                try:
+                    control.UnregisterAudioSessionNotification(events)
+                except Exception:  # noqa: BLE001
+                    pass
+
+        return unregister
+
+
+class CaptureSessionProcesses(CaptureSessionActivity):
+    """Report the executable names of the applications capturing from an endpoint."""
+
+    def watch(self, device: object, callback: Callable[[FrozenSet[str]], None]) -> Callable[[], None]:
+        return self._watch(device, callback)  # type: ignore[arg-type]
+
+    def _summarize(self, pids: List[int]) -> object:
+        # PID 0 is the system sounds session.
+        return frozenset(name for name in map(process_name, set(pids) - {0}) if name)
+
+
+class EndpointPeakMeter:
+    """Read an endpoint's ``IAudioMeterInformation`` peak value.
+
+    Windows only meters a capture endpoint while some stream is open on it;
+    otherwise the peak reads as zero.
+    """
+
+    def open(self, device: object) -> Callable[[], float]:
+        import comtypes
+        from pycaw.pycaw import IAudioMeterInformation
+
+        imm_device = getattr(device, "_dev", device)
+        meter = imm_device.Activate(IAudioMeterInformation._iid_, comtypes.CLSCTX_ALL, None)
+        return meter.QueryInterface(IAudioMeterInformation).GetPeakValue
+
+
+def wasapi_backend() -> Backend:
+    """The Windows audio stack; nothing is imported until the worker first uses it."""
+    return Backend(
+        PycawEndpointSource(),
+        EndpointVolumeNotifications(),
+        apartment=com_apartment,
+        activity=CaptureSessionActivity(),
+        meter=EndpointPeakMeter(),
+        sessions=CaptureSessionProcesses(),
+    )
@@ -0,0 +1,437 @@
+"""Single-instance guard and local control channel for a running instance.
+
+The process that guards microphones holds an exclusive lock on
+``instance.lock`` in the config directory and listens on a local socket: a
+Unix socket where the platform has one, a loopback TCP port on Windows.
+Clients find it through ``control.json`` next to the lock, which holds the
+address and a random token that every request must carry.
+
+The protocol is line-delimited JSON. Each request is one object such as
+``{"id": 1, "token": "...", "command": "set-target", "target": 80}`` and each
+response one line back, ``{"id": 1, "ok": true, "result": ...}`` or
+``{"id": 1, "ok": false, "error": "..."}``. Requests may be pipelined on one
+connection; responses come back in order.
+
+Requests are served on daemon threads and executed on the enforcement
+worker's thread, so neither a slow client nor a busy window can block the
+other. The exceptions are writing a profile and sampling stacks, which run
+on the request's own thread.
+"""
+
+import concurrent.futures
+import contextlib
+import dataclasses
+import hmac
+import json
+import logging
+import os
+import secrets
+import socket
+import socketserver
+import sys
+import tempfile
+import threading
+from typing import IO, Any, Callable, Dict, Iterable, List, Optional
+
+from .engine import EnforcementEvent
+from .profiles import config_dir
+from .profiling import MAX_SAMPLE_SECONDS, sample_stacks, write_folded
+from .registry import display_names
+from .worker import EnforcementWorker, WorkerCommand
+
+log = logging.getLogger("microphone_guardian")
+
+LOCK_FILE = "instance.lock"
+INFO_FILE = "control.json"
+SOCKET_FILE = "control.sock"
+MAX_LINE_BYTES = 64 * 1024
+CALL_TIMEOUT_SECONDS = 5.0
+COMMANDS = (
+    "ping",
+    "status",
+    "list-devices",
+    "set-target",
+    "pause",
+    "resume",
+    "profile-start",
+    "profile-stop",
+    "profile-sample",
+)
+# Run on the request thread; they call into the worker themselves when they need to.
+LOCAL_COMMANDS = ("profile-stop", "profile-sample")
+
+Handler = Callable[[Dict[str, Any]], Any]
+
+
+class ControlError(RuntimeError):
+    """A control request failed; the message is meant for the person who sent it."""
+
+
+class NotRunning(ControlError):
+    """No instance is listening for control requests."""
+
+
+def default_transport() -> str:
+    return "unix" if hasattr(socket, "AF_UNIX") and sys.platform != "win32" else "tcp"
+
+
+class InstanceLock:
+    """Exclusive, advisory lock that keeps a second guardian from starting.
+
+    The operating system drops the lock when the process exits, so a crash
+    never leaves a stale lock behind.
+    """
+
+    def __init__(self, directory: Optional[str] = None) -> None:
+        self.path = os.path.join(directory or config_dir(), LOCK_FILE)
+        self._stream: Optional[IO[str]] = None
+
+    def acquire(self) -> bool:
+        """Take the lock; ``False`` means another instance holds it."""
+        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        stream = open(self.path, "a+")
+        try:
+            if sys.platform == "win32":
+                import msvcrt
+
+                stream.seek(0)
+                msvcrt.locking(stream.fileno(), msvcrt.LK_NBLCK, 1)
+            else:
+                import fcntl
+
+                fcntl.flock(stream.fileno(), fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except OSError:
+            stream.close()
+            return False
+        self._stream = stream
+        return True
+
+    def release(self) -> None:
+        stream, self._stream = self._stream, None
+        if stream is not None:
+            stream.close()
+
+
+class ControlServer:
+    """Serve control requests from daemon threads and advertise them in ``control.json``.
+
+    Only start one while holding the :class:`InstanceLock` for ``directory``;
+    a leftover socket file from a crashed instance is removed on start.
+    """
+
+    def __init__(self, handler: Handler, directory: Optional[str] = None, transport: Optional[str] = None) -> None:
+        self.handler = handler
+        self.directory = directory or config_dir()
+        self.transport = transport or default_transport()
+        self.token = secrets.token_hex(16)
+        self.info_path = os.path.join(self.directory, INFO_FILE)
+        server = self
+
+        class RequestHandler(socketserver.StreamRequestHandler):
+            # Answers are small; on TCP send each one right away.
+            disable_nagle_algorithm = self.transport == "tcp"
+
+            def handle(handler) -> None:  # noqa: N805
+                while True:
+                    line = handler.rfile.readline(MAX_LINE_BYTES)
+                    if not line:
+                        return
+                    try:
+                        handler.wfile.write(server.respond(line))
+                    except OSError:
+                        return
+
+        os.makedirs(self.directory, exist_ok=True)
+        if self.transport == "unix":
+            path = os.path.join(self.directory, SOCKET_FILE)
+            with contextlib.suppress(FileNotFoundError):
+                os.unlink(path)
+            self._server: socketserver.BaseServer = socketserver.ThreadingUnixStreamServer(path, RequestHandler)
+            os.chmod(path, 0o600)
+            self.address = f"unix:{path}"
+        else:
+            self._server = socketserver.ThreadingTCPServer(("127.0.0.1", 0), RequestHandler)
+            self.address = "tcp:%s:%d" % self._server.server_address[:2]
+        self._server.daemon_threads = True
+        self._thread = threading.Thread(target=self._server.serve_forever, name="control-server", daemon=True)
+
+    def start(self) -> None:
+        _write_private(self.info_path, {"pid": os.getpid(), "address": self.address, "token": self.token})
+        self._thread.start()
+
+    def close(self) -> None:
+        self._server.shutdown()
+        self._server.server_close()
+        with contextlib.suppress(OSError):
+            os.unlink(self.info_path)
+        if self.transport == "unix":
+            with contextlib.suppress(OSError):
+                os.unlink(self.address[len("unix:") :])
+
+    def respond(self, line: bytes) -> bytes:
+        """Answer one request line with one response line."""
+        request_id = None
+        try:
+            request = json.loads(line)
+            if not isinstance(request, dict):
+                raise ControlError("requests must be JSON objects")
+            request_id = request.get("id")
+            if not hmac.compare_digest(str(request.get("token", "")), self.token):
+                raise ControlError("bad or missing token")
+            response = {"id": request_id, "ok": True, "result": self.handler(request)}
+        except ValueError as exc:
+            response = {"id": request_id, "ok": False, "error": f"invalid request: {exc}"}
+        except ControlError as exc:
+            response = {"id": request_id, "ok": False, "error": str(exc)}
+        except Exception as exc:  # noqa: BLE001
+            log.exception("Control request failed")
+            response = {"id": request_id, "ok": False, "error": f"internal error: {exc}"}
+        return json.dumps(response, separators=(",", ":")).encode("utf-8") + b"\n"
+
+
+def _write_private(path: str, data: Dict[str, Any]) -> None:
+    """Atomically write ``data`` as JSON readable by the current user only."""
+    handle, temporary = tempfile.mkstemp(prefix=".control-", suffix=".tmp", dir=os.path.dirname(path))
+    try:
+        with os.fdopen(handle, "w", encoding="utf-8") as stream:
+            json.dump(data, stream)
+        os.replace(temporary, path)
+    except BaseException:
+        with contextlib.suppress(OSError):
+            os.unlink(temporary)
+        raise
+
+
+class ControlClient:
+    """Send requests to the running instance advertised in ``directory``."""
+
+    def __init__(self, directory: Optional[str] = None, timeout: float = CALL_TIMEOUT_SECONDS + 1.0) -> None:
+        path = os.path.join(directory or config_dir(), INFO_FILE)
+        try:
+            with open(path, encoding="utf-8") as stream:
+                info = json.load(stream)
+            self.token = str(info["token"])
+            self._socket = _connect(str(info["address"]), timeout)
+        except (OSError, ValueError, KeyError, TypeError) as exc:
+            raise NotRunning(f"Microphone Guardian is not running ({exc}).") from None
+        self._reader = self._socket.makefile("rb")
+        self._next_id = 0
+
+    def __enter__(self) -> "ControlClient":
+        return self
+
+    def __exit__(self, *exc_info: object) -> None:
+        self.close()
+
+    def request(self, command: str, **arguments: Any) -> Any:
+        """Send one request and return its result; raises :class:`ControlError` on failure."""
+        self.send(command, **arguments)
+        return self.receive()
+
+    def send(self, command: str, **arguments: Any) -> int:
+        """Send a request without waiting for it; returns its ID."""
+        self._next_id += 1
+        request = dict(arguments, id=self._next_id, token=self.token, command=command)
+        try:
+            self._socket.sendall(json.dumps(request, separators=(",", ":")).encode("utf-8") + b"\n")
+        except OSError as exc:
+            raise ControlError(f"Lost the connection to the running instance: {exc}") from None
+        return self._next_id
+
+    def receive(self) -> Any:
+        """Read the next response and return its result."""
+        try:
+            line = self._reader.readline(MAX_LINE_BYTES)
+        except OSError as exc:
+            raise ControlError(f"Lost the connection to the running instance: {exc}") from None
+        if not line:
+            raise ControlError("The running instance closed the connection.")
+        response = json.loads(line)
+        if not response.get("ok"):
+            raise ControlError(response.get("error") or "request failed")
+        return response.get("result")
+
+    def close(self) -> None:
+        self._reader.close()
+        self._socket.close()
+
+
+def _connect(address: str, timeout: float) -> socket.socket:
+    transport, _, rest = address.partition(":")
+    if transport == "unix":
+        sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        target: Any = rest
+    elif transport == "tcp":
+        host, _, port = rest.rpartition(":")
+        sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+        sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        target = (host, int(port))
+    else:
+        raise ValueError(f"unknown transport {transport!r}")
+    sock.settimeout(timeout)
+    try:
+        sock.connect(target)
+    except OSError:
+        sock.close()
+        raise
+    return sock
+
+
+class WorkerControl:
+    """Answer control requests by running them on the enforcement worker's thread.
+
+    ``device`` arguments accept an endpoint ID or a friendly name and default
+    to every guarded device. Targets are percentages, as on the command line.
+    """
+
+    def __init__(self, worker: EnforcementWorker, timeout: float = CALL_TIMEOUT_SECONDS) -> None:
+        self.worker = worker
+        self.timeout = timeout
+
+    def __call__(self, request: Dict[str, Any]) -> Any:
+        command = request.get("command")
+        if command not in COMMANDS:
+            raise ControlError(f"unknown command {command!r}; expected one of {', '.join(COMMANDS)}")
+        method = getattr(self, "_" + command.replace("-", "_"))
+        if command in LOCAL_COMMANDS:
+            return method(request)
+        return self._call(lambda: method(request))
+
+    def _call(self, function: Callable[[], Any]) -> Any:
+        try:
+            return self.worker.call(function, self.timeout)
+        except concurrent.futures.TimeoutError:
+            raise ControlError("The enforcement worker did not answer in time.") from None
+
+    def _ping(self, request: Dict[str, Any]) -> Dict[str, Any]:
+        return {"pid": os.getpid()}
+
+    def _status(self, request: Dict[str, Any]) -> Dict[str, Any]:
+        worker = self.worker
+        names = display_names(worker.registry.devices())
+        devices = []
+        for state, held in (("guarding", worker.settings), ("disconnected", worker.parked), ("paused", worker.paused)):
+            for device_id, settings in held.items():
+                entry: Dict[str, Any] = {
+                    "id": device_id,
+                    "name": names.get(device_id, device_id),
+                    "state": _state(worker, device_id, state),
+                    "target": int(round(settings.target * 100)),
+                    "tolerance": round(settings.tolerance * 100, 2),
+                    "interval": settings.interval,
+                }
+                enforcer = worker.enforcers.get(device_id)
+                if enforcer is not None:
+                    entry["stats"] = dataclasses.asdict(enforcer.stats)
+                rule = worker.rule_for.get(device_id)
+                if rule is not None:
+                    entry["rule"] = rule.describe()
+                devices.append(entry)
+        return {"pid": os.getpid(), "devices": devices}
+
+    def _list_devices(self, request: Dict[str, Any]) -> List[Dict[str, Any]]:
+        devices = self.worker.registry.devices()
+        names = display_names(devices)
+        return [
+            {"id": info.id, "name": names[info.id], "guarded": self.worker.settings_for(info.id) is not None}
+            for info in devices
+        ]
+
+    def _set_target(self, request: Dict[str, Any]) -> List[str]:
+        target = request.get("target")
+        if isinstance(target, bool) or not isinstance(target, (int, float)) or not 0 <= target <= 100:
+            raise ControlError("target must be a number between 0 and 100")
+        worker = self.worker
+        device_ids = self._resolve(request, self._guarded())
+        for device_id in device_ids:
+            worker.handle(WorkerCommand("set-target", (device_id, target / 100.0)))
+            settings = worker.settings_for(device_id)
+            # Tell the front end, which did not make this change itself.
+            worker.post(
+                EnforcementEvent(
+                    "configured", settings.target, "Changed by remote control.", payload=settings, device_id=device_id
+                )
+            )
+        return device_ids
+
+    def _pause(self, request: Dict[str, Any]) -> List[str]:
+        device_ids = self._resolve(request, list(self.worker.settings) + list(self.worker.parked))
+        for device_id in device_ids:
+            self.worker.handle(WorkerCommand("pause", device_id))
+        return device_ids
+
+    def _resume(self, request: Dict[str, Any]) -> List[str]:
+        device_ids = self._resolve(request, list(self.worker.paused))
+        for device_id in device_ids:
+            self.worker.handle(WorkerCommand("resume", device_id))
+        return device_ids
+
+    def _profile_start(self, request: Dict[str, Any]) -> Dict[str, Any]:
+        self.worker.handle(WorkerCommand("profile", True))
+        return {"capacity": self.worker.profiler.capacity}
+
+    def _profile_stop(self, request: Dict[str, Any]) -> Dict[str, Any]:
+        path = _output_path(request)
+        self._call(lambda: self.worker.handle(WorkerCommand("profile", False)))
+        try:
+            spans = self.worker.profiler.write_chrome_trace(path)
+        except OSError as exc:
+            raise ControlError(f"Cannot write {path}: {exc}") from None
+        return {"path": path, "spans": spans}
+
+    def _profile_sample(self, request: Dict[str, Any]) -> Dict[str, Any]:
+        path = _output_path(request)
+        seconds = request.get("seconds", 5)
+        if isinstance(seconds, bool) or not isinstance(seconds, (int, float)) or not 0 < seconds <= MAX_SAMPLE_SECONDS:
+            raise ControlError(f"seconds must be a number between 0 and {MAX_SAMPLE_SECONDS:g}")
+        try:
+            samples = write_folded(sample_stacks(seconds), path)
+        except OSError as exc:
+            raise ControlError(f"Cannot write {path}: {exc}") from None
+        return {"path": path, "samples": samples}
+
+    def _guarded(self) -> List[str]:
+        return list(self.worker.settings) + list(self.worker.parked) + list(self.worker.paused)
+
+    def _resolve(self, request: Dict[str, Any], candidates: Iterable[str]) -> List[str]:
+        candidates = list(candidates)
+        device = request.get("device")
+        if device is None:
+            return candidates
+        if device in candidates:
+            return [device]
+        matches = [info.id for info in self.worker.registry.find(str(device)) if info.id in candidates]
+        if len(matches) > 1:
+            raise ControlError(f"Several devices are called {device!r}; pass an endpoint ID instead.")
+        if not matches:
+            # Duplicates are listed as "Name #2" and so on; accept those labels too.
+            labels = display_names(self.worker.registry.devices())
+            matches = [device_id for device_id in candidates if labels.get(device_id) == device]
+        if not matches:
+            raise ControlError(f"No device matching {device!r} is in a state that allows this.")
+        return matches
+
+
+def _state(worker: EnforcementWorker, device_id: str, state: str) -> str:
+    if device_id in worker.hands_off:
+        return "hands-off"
+    return "idle" if device_id in worker.idle else state
+
+
+def _output_path(request: Dict[str, Any]) -> str:
+    path = request.get("path")
+    if not isinstance(path, str) or not os.path.isabs(path):
+        raise ControlError("path must be an absolute file name")
+    return path
+
+
+def serve(worker: EnforcementWorker, directory: Optional[str] = None) -> Optional[ControlServer]:
+    """Start the control channel for ``worker``; ``None`` (and a warning) if it cannot listen."""
+    try:
+        server = ControlServer(WorkerControl(worker), directory)
+        server.start()
+    except OSError as exc:
+        log.warning("Remote control unavailable: %s", exc)
+        return None
+    log.info("Listening for control commands on %s", server.address)
+    return server
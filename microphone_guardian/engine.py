@@ -0,0 +1,314 @@
+"""Enforcement core that keeps an endpoint at its target volume.
+
+The engine never imports tkinter or the Windows audio stack. It talks to an
+endpoint volume object (``IAudioEndpointVolume`` or a fake with the same
+methods) and to a pluggable notification source that reports level changes.
+"""
+
+import collections
+import threading
+import time
+from dataclasses import dataclass
+from typing import Any, Callable, FrozenSet, Optional, Protocol
+
+
+VolumeCallback = Callable[[float, bool], None]
+ActivityCallback = Callable[[bool], None]
+SessionsCallback = Callable[[FrozenSet[str]], None]
+Unregister = Callable[[], None]
+
+DEFAULT_TOLERANCE = 0.005
+SAFETY_NET_SECONDS = 30
+BACKOFF_FACTOR = 2.0
+MAX_BACKOFF_SECONDS = 60
+
+CONTENTION_STRATEGIES = ("backoff", "rate-limit", "hysteresis", "off")
+CONTENTION_WINDOW_SECONDS = 10.0
+CONTENTION_THRESHOLD = 4
+CONTENTION_BAND = 0.05
+CONTENTION_MIN_GAP_SECONDS = 5.0
+
+
+class VolumeNotificationSource(Protocol):
+    """Something that can report volume changes on an endpoint."""
+
+    def register(self, endpoint_volume: object, callback: VolumeCallback) -> Unregister:
+        """Start delivering ``callback(level, muted)`` and return an unregister function."""
+
+
+class CaptureActivitySource(Protocol):
+    """Something that can tell whether any application is capturing from an endpoint."""
+
+    def watch(self, device: object, callback: ActivityCallback) -> Unregister:
+        """Call ``callback(active)`` now and on every change; return an unregister function."""
+
+
+class CaptureSessionSource(Protocol):
+    """Something that can tell which applications are capturing from an endpoint."""
+
+    def watch(self, device: object, callback: SessionsCallback) -> Unregister:
+        """Call ``callback(process_names)`` now and on every change; return an unregister function."""
+
+
+@dataclass(frozen=True)
+class EnforcementEvent:
+    """Outcome of one enforcement step, reported to the front end."""
+
+    kind: str
+    level: float
+    message: str = ""
+    payload: Any = None
+    device_id: str = ""
+
+
+@dataclass
+class EnforcementStats:
+    """Per-endpoint counters: endpoint I/O, drift and failures."""
+
+    ticks: int = 0
+    drifts: int = 0
+    failures: int = 0
+    reads: int = 0
+    writes: int = 0
+    skipped_writes: int = 0
+    missed_ticks: int = 0
+    fights: int = 0
+    yielded: int = 0
+
+
+class Backoff:
+    """Exponential poll interval that grows while stable and resets on drift."""
+
+    def __init__(self, minimum: float, maximum: float, factor: float = BACKOFF_FACTOR) -> None:
+        self.factor = factor
+        self.current = minimum
+        self.configure(minimum, maximum)
+
+    def configure(self, minimum: float, maximum: float) -> None:
+        """Change the bounds, keeping the current interval inside them."""
+        self.minimum = minimum
+        self.maximum = max(minimum, maximum)
+        self.current = max(self.minimum, min(self.maximum, self.current))
+
+    def reset(self) -> None:
+        self.current = self.minimum
+
+    def grow(self) -> None:
+        self.current = min(self.maximum, self.current * self.factor)
+
+
+class ContentionGuard:
+    """Notice a write war with another application and stop feeding it.
+
+    A fight starts when ``threshold`` corrections land within ``window``
+    seconds, and ends once a whole window passes without any drift. While
+    fighting, ``strategy`` decides whether a drift is corrected:
+
+    * ``"hysteresis"`` ignores drift inside a wider ``band``;
+    * ``"rate-limit"`` corrects at most once every ``min_gap`` seconds;
+    * ``"backoff"`` starts at ``min_gap`` and doubles the wait after every
+      correction, up to ``max_gap``.
+    """
+
+    def __init__(
+        self,
+        strategy: str = "backoff",
+        window: float = CONTENTION_WINDOW_SECONDS,
+        threshold: int = CONTENTION_THRESHOLD,
+        band: float = CONTENTION_BAND,
+        min_gap: float = CONTENTION_MIN_GAP_SECONDS,
+        max_gap: float = MAX_BACKOFF_SECONDS,
+    ) -> None:
+        if strategy not in CONTENTION_STRATEGIES or strategy == "off":
+            raise ValueError(f"unknown contention strategy {strategy!r}")
+        self.strategy = strategy
+        self.window = window
+        self.threshold = threshold
+        self.band = band
+        self.min_gap = min_gap
+        self.max_gap = max_gap
+        self.fighting = False
+        self._corrections: "collections.deque[float]" = collections.deque()
+        self._last_drift = float("-inf")
+        self._gap = min_gap
+        self._hold_until = float("-inf")
+
+    def settle(self, now: float) -> bool:
+        """End the fight if no drift was seen for a whole window; returns ``True`` if it ended."""
+        if not self.fighting or now - self._last_drift <= self.window:
+            return False
+        self.fighting = False
+        self._corrections.clear()
+        self._gap = self.min_gap
+        self._hold_until = float("-inf")
+        return True
+
+    def allow(self, level: float, target: float, now: float) -> bool:
+        """Note a drift and decide whether to correct it now.
+
+        Returns ``False`` when the guard wants the drift left alone.
+        """
+        self.settle(now)
+        self._last_drift = now
+        if not self.fighting:
+            return True
+        if self.strategy == "hysteresis":
+            return abs(level - target) > self.band
+        return now >= self._hold_until
+
+    def record(self, now: float) -> bool:
+        """Note a correction; returns ``True`` if it started a fight."""
+        corrections = self._corrections
+        corrections.append(now)
+        while corrections and now - corrections[0] > self.window:
+            corrections.popleft()
+        started = not self.fighting and len(corrections) >= self.threshold
+        if started:
+            self.fighting = True
+        if self.fighting and self.strategy != "hysteresis":
+            self._hold_until = now + self._gap
+            if self.strategy == "backoff":
+                self._gap = min(self.max_gap, self._gap * 2)
+        return started
+
+
+class VolumeEnforcer:
+    """Keep a single endpoint volume at ``target`` (a scalar between 0 and 1)."""
+
+    def __init__(
+        self,
+        endpoint_volume: object,
+        target: float,
+        notifications: Optional[VolumeNotificationSource] = None,
+        listener: Optional[Callable[[EnforcementEvent], None]] = None,
+        tolerance: float = DEFAULT_TOLERANCE,
+        read_before_write: bool = True,
+        unmute: bool = False,
+        backoff: Optional[Backoff] = None,
+        device_id: str = "",
+        contention: Optional[ContentionGuard] = None,
+        clock: Callable[[], float] = time.monotonic,
+    ) -> None:
+        self.device_id = device_id
+        self.endpoint_volume = endpoint_volume
+        self.target = max(0.0, min(1.0, target))
+        self.notifications = notifications
+        self.listener = listener
+        self.tolerance = tolerance
+        self.read_before_write = read_before_write
+        self.unmute = unmute
+        self.backoff = backoff
+        self.contention = contention
+        self.clock = clock
+        self.stats = EnforcementStats()
+        self._lock = threading.Lock()
+        self._unregister: Optional[Unregister] = None
+
+    @property
+    def notifying(self) -> bool:
+        return self._unregister is not None
+
+    def start(self, enforce: bool = True) -> None:
+        """Subscribe to change notifications if possible and, unless told not to, apply the target once."""
+        if self.notifications is not None and self._unregister is None:
+            try:
+                self._unregister = self.notifications.register(self.endpoint_volume, self.handle_volume_change)
+            except Exception as exc:  # noqa: BLE001
+                self._unregister = None
+                self._emit("notifications-unavailable", self.target, str(exc))
+        if enforce:
+            self.enforce()
+
+    def stop(self) -> None:
+        unregister, self._unregister = self._unregister, None
+        if unregister is None:
+            return
+        try:
+            unregister()
+        except Exception:  # noqa: BLE001
+            pass
+
+    def set_target(self, target: float) -> None:
+        self.target = max(0.0, min(1.0, target))
+
+    @property
+    def next_interval(self) -> Optional[float]:
+        """Seconds until the next poll, or ``None`` when no backoff policy is set."""
+        return self.backoff.current if self.backoff else None
+
+    def enforce(self) -> bool:
+        """Polling entry point. Returns ``True`` when the endpoint had drifted."""
+        self.stats.ticks += 1
+        if not self.read_before_write:
+            self._apply("applied", unmute=self.unmute)
+            return True
+        try:
+            level = self.endpoint_volume.GetMasterVolumeLevelScalar()
+            muted = bool(self.endpoint_volume.GetMute()) if self.unmute else False
+        except Exception as exc:  # noqa: BLE001
+            self.stats.failures += 1
+            self._emit("error", self.target, str(exc))
+            return False
+        self.stats.reads += 1
+        return self._correct(level, muted)
+
+    def handle_volume_change(self, level: float, muted: bool) -> None:
+        """Notification entry point; corrects drift as soon as it is reported.
+
+        Echoes of our own writes arrive here too, so in-tolerance levels are
+        ignored without touching the counters.
+        """
+        if self._in_tolerance(level, muted):
+            return
+        self._correct(level, muted)
+
+    def _in_tolerance(self, level: float, muted: bool) -> bool:
+        return abs(level - self.target) <= self.tolerance and not (self.unmute and muted)
+
+    def _correct(self, level: float, muted: bool) -> bool:
+        if self._in_tolerance(level, muted):
+            self.stats.skipped_writes += 1
+            if self.backoff:
+                self.backoff.grow()
+            if self.contention is not None and self.contention.settle(self.clock()):
+                self._emit("contention", level, payload=False)
+            self._emit("verified", level)
+            return False
+        self.stats.drifts += 1
+        if self.backoff:
+            self.backoff.reset()
+        contention = self.contention
+        if contention is not None:
+            now = self.clock()
+            if contention.settle(now):
+                self._emit("contention", level, payload=False)
+            if not contention.allow(level, self.target, now):
+                self.stats.yielded += 1
+                self._emit("yielded", level)
+                return False
+        if not self._apply("corrected", unmute=self.unmute and muted, observed=level):
+            return True
+        if contention is not None and contention.record(now):
+            self.stats.fights += 1
+            self._emit("contention", level, f"Another application keeps changing the level; using {contention.strategy}.", True)
+        return True
+
+    def _apply(self, kind: str, unmute: bool = False, observed: Optional[float] = None) -> bool:
+        """Write the target; ``observed`` (the drifted level) rides along as the event payload."""
+        target = self.target
+        with self._lock:
+            try:
+                self.endpoint_volume.SetMasterVolumeLevelScalar(target, None)
+                if unmute:
+                    self.endpoint_volume.SetMute(0, None)
+            except Exception as exc:  # noqa: BLE001
+                self.stats.failures += 1
+                self._emit("error", target, str(exc))
+                return False
+            self.stats.writes += 1
+        self._emit(kind, target, payload=observed)
+        return True
+
+    def _emit(self, kind: str, level: float, message: str = "", payload: Any = None) -> None:
+        if self.listener is not None:
+            self.listener(EnforcementEvent(kind, level, message, payload, device_id=self.device_id))
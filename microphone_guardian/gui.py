@@ -0,0 +1,994 @@
+"""Tk front end. Every audio call goes through the enforcement worker."""
+
+import bisect
+import queue
+import time
+import tkinter as tk
+
+from tkinter import ttk, filedialog, messagebox
+from datetime import datetime
+from typing import Any, Callable, Dict, Hashable, List, Optional, Sequence, Tuple
+
+from .audit import AuditLog
+from .backend import wasapi_backend
+from .control import InstanceLock, serve
+from .engine import EnforcementEvent
+from .history import sparkline_points
+from .picker import DeviceIndex, RowWindow
+from .profiles import ProfileStore, restore
+from .profiling import traced
+from .registry import (
+    DEVICE_STATE_ACTIVE,
+    DEVICE_STATE_DISABLED,
+    DEVICE_STATE_NOTPRESENT,
+    DEVICE_STATE_UNPLUGGED,
+    DeviceInfo,
+    display_names,
+)
+from .rules import RuleMatcher, default_path as rules_path, load as load_rules
+from .viewmodel import (
+    IO_STATS,
+    LAST_APPLIED,
+    METER,
+    METER_IDLE,
+    NEXT_CHECK,
+    STATUS,
+    GuardedDevice,
+    ViewModel,
+    row_key,
+)
+from .worker import MIN_INTERVAL_SECONDS, Backend, EnforcementSettings, EnforcementWorker
+
+FRAME_MS = 100
+SPARKLINE_REDRAW_SECONDS = 0.25
+SPARKLINE_SAMPLES = 120
+SPARKLINE_HEIGHT = 48
+PICKER_ROWS = 6
+PICKER_ROW_HEIGHT = 22
+PICKER_WHEEL_ROWS = 3
+INACTIVE_LABELS = {
+    DEVICE_STATE_DISABLED: "disabled",
+    DEVICE_STATE_NOTPRESENT: "not present",
+    DEVICE_STATE_UNPLUGGED: "unplugged",
+}
+CONTENTION_LABELS = {
+    "backoff": "Back off further each time",
+    "rate-limit": "Correct at most every 5 s",
+    "hysteresis": "Ignore small changes (±5%)",
+    "off": "Keep correcting",
+}
+STATUS_COLORS = {
+    "info": "#90a4ae",
+    "success": "#1faa00",
+    "warning": "#ffb300",
+    "error": "#d32f2f",
+}
+
+
+class DeviceList:
+    """Scrollable list that keeps ``rows`` canvas rows and redraws only those.
+
+    However many devices match, the canvas holds the same few rectangles and
+    text items; scrolling changes which labels they show, and a row whose
+    label and highlight are unchanged is not touched at all.
+    """
+
+    def __init__(self, parent: tk.Misc, palette: Dict[str, str], rows: int, on_pick: Callable[[int], None]) -> None:
+        self.frame = ttk.Frame(parent, style="Card.TFrame")
+        self.canvas = tk.Canvas(
+            self.frame,
+            height=rows * PICKER_ROW_HEIGHT,
+            highlightthickness=1,
+            highlightbackground="#e0e4ec",
+            bg=palette["card"],
+            bd=0,
+        )
+        self.canvas.pack(side=tk.LEFT, fill=tk.X, expand=True)
+        self.scrollbar = ttk.Scrollbar(self.frame, orient=tk.VERTICAL, command=self._on_scrollbar)
+        self.scrollbar.pack(side=tk.LEFT, fill=tk.Y)
+        self.palette = palette
+        self.on_pick = on_pick
+        self.window = RowWindow(rows)
+        self.labels: Sequence[str] = ()
+        self.selected: Optional[int] = None
+        self._slots: List[Tuple[int, int]] = []
+        for slot in range(rows):
+            top = slot * PICKER_ROW_HEIGHT
+            background = self.canvas.create_rectangle(
+                0, top, 4000, top + PICKER_ROW_HEIGHT, fill=palette["card"], outline=""
+            )
+            text = self.canvas.create_text(
+                8, top + PICKER_ROW_HEIGHT // 2, anchor=tk.W, fill=palette["text"], font=("Segoe UI", 10)
+            )
+            self._slots.append((background, text))
+        self._drawn: List[Optional[Tuple[str, bool]]] = [None] * rows
+        self.canvas.bind("<Button-1>", self._on_click)
+        for sequence in ("<MouseWheel>", "<Button-4>", "<Button-5>"):
+            self.canvas.bind(sequence, self._on_wheel)
+
+    def show(self, labels: Sequence[str], selected: Optional[int]) -> None:
+        """Replace the rows, highlighting and scrolling to ``selected`` if given."""
+        self.labels = labels
+        self.window.reset(len(labels))
+        self.select(selected)
+
+    def select(self, index: Optional[int]) -> None:
+        self.selected = index
+        if index is not None:
+            self.window.reveal(index)
+        self._draw()
+
+    def scroll(self, rows: int) -> None:
+        self.window.scroll(rows)
+        self._draw()
+
+    def _on_scrollbar(self, action: str, amount: str, unit: str = "units") -> None:
+        if action == "moveto":
+            self.window.move_to(float(amount))
+        else:
+            self.window.scroll(int(amount) * (self.window.rows if unit == "pages" else 1))
+        self._draw()
+
+    def _on_wheel(self, event: tk.Event) -> str:
+        self.scroll(-PICKER_WHEEL_ROWS if event.num == 4 or event.delta > 0 else PICKER_WHEEL_ROWS)
+        return "break"  # keep the page behind the list still
+
+    def _on_click(self, event: tk.Event) -> None:
+        index = self.window.top + int(event.y) // PICKER_ROW_HEIGHT
+        if index in self.window.visible():
+            self.on_pick(index)
+
+    def _draw(self) -> None:
+        visible = self.window.visible()
+        for slot, (background, text) in enumerate(self._slots):
+            index = visible.start + slot
+            row = (self.labels[index], index == self.selected) if index in visible else ("", False)
+            if self._drawn[slot] == row:
+                continue
+            self._drawn[slot] = row
+            label, chosen = row
+            self.canvas.itemconfigure(background, fill=self.palette["accent"] if chosen else self.palette["card"])
+            self.canvas.itemconfigure(text, text=label, fill="#ffffff" if chosen else self.palette["text"])
+        self.scrollbar.set(*self.window.fractions())
+
+
+class MicrophoneApp:
+    """Interactive Tk application that keeps the microphone at the target volume."""
+
+    def __init__(
+        self,
+        root: tk.Tk,
+        store: Optional[ProfileStore] = None,
+        control: bool = False,
+        backend: Optional[Backend] = None,
+        audit: Optional[AuditLog] = None,
+        rules: Optional[RuleMatcher] = None,
+    ) -> None:
+        # Resume remembered devices first; the worker runs while the window is built.
+        self.events: "queue.SimpleQueue[EnforcementEvent]" = queue.SimpleQueue()
+        self.audit = audit
+        post = audit.tee(self.events.put) if audit is not None else self.events.put
+        self.worker = EnforcementWorker.for_backend(backend or wasapi_backend(), post=post, rules=rules)
+        self.profiler = self.worker.profiler
+        self.worker.start()
+        self.store = store if store is not None else ProfileStore().load()
+        restored = restore(self.store, self.worker)
+        self.control = serve(self.worker) if control else None
+
+        self.root = root
+        self.root.title("Microphone volume control")
+        self.root.geometry("480x700")
+        self.root.minsize(480, 400)
+        self.root.configure(bg="#f5f7fb")
+        self.root.protocol("WM_DELETE_WINDOW", self.on_close)
+
+        self.style = ttk.Style(self.root)
+        self._configure_styles()
+
+        self.devices: List[DeviceInfo] = []
+        self.inactive_devices: List[DeviceInfo] = []
+        self.device_map: Dict[str, DeviceInfo] = {}
+        self.device_labels: Dict[str, str] = {}
+        self.picker_entries: List[DeviceInfo] = []
+        self.picker_labels: List[str] = []
+        self.picker_positions: Dict[str, int] = {}
+        self.device_index = DeviceIndex([])
+        self.matches: List[int] = []
+        self.preferred_id: Optional[str] = self.store.selected
+        self.current_device: Optional[DeviceInfo] = None
+
+        self.view = ViewModel()
+        self.guarded: Dict[str, GuardedDevice] = self.view.guarded
+        self.events_after_id: Optional[str] = None
+        self.frequency_seconds = 5.0
+        self._sparkline_drawn: Tuple[int, int] = (0, 0)
+        self._sparkline_drawn_at = 0.0
+
+        self.device_filter_var = tk.StringVar()
+        self.show_inactive_var = tk.BooleanVar(value=False)
+        self.picker_count_var = tk.StringVar(value="")
+        self.frequency_var = tk.StringVar(value="5")
+        self.target_volume_var = tk.IntVar(value=100)
+        self.instant_var = tk.BooleanVar(value=True)
+        self.idle_var = tk.BooleanVar(value=False)
+        self.contention_var = tk.StringVar(value=CONTENTION_LABELS["backoff"])
+        self.tolerance_var = tk.DoubleVar(value=0.5)
+        self.io_stats_var = tk.StringVar(value="Reads: 0 · writes: 0 · skipped: 0")
+        self.status_message_var = tk.StringVar(value="Select a microphone to begin.")
+        self.device_details_var = tk.StringVar(value="No device selected.")
+        self.last_applied_var = tk.StringVar(value="Last applied: —")
+        self.next_check_var = tk.StringVar(value="Next check in: —")
+        self.target_display_var = tk.StringVar(value="Target: 100%")
+        self.meter_text_var = tk.StringVar(value=METER_IDLE[1])
+        self.metered_device: Optional[str] = None
+        self.window_visible = True
+
+        self._build_layout()
+        for device_id in restored:
+            self.guarded[device_id] = GuardedDevice(device_id, self.store.get(device_id).settings, status="Resuming…")
+            self.guarded_tree.insert("", tk.END, iid=device_id)
+            self.view.update_row(device_id)
+        self.update_status("Looking for recording devices…", level="info")
+        self.events_after_id = self.root.after(FRAME_MS, self._poll_events)
+
+    def _configure_styles(self) -> None:
+        try:
+            self.style.theme_use("clam")
+        except tk.TclError:
+            pass
+        palette = {
+            "background": "#f5f7fb",
+            "card": "#ffffff",
+            "accent": "#2962ff",
+            "accent_hover": "#1c43b5",
+            "danger": "#d32f2f",
+            "text": "#1a1c2d",
+            "muted": "#5c6270",
+        }
+        self.style.configure("TFrame", background=palette["background"])
+        self.style.configure("Card.TFrame", background=palette["card"], relief="flat")
+        self.style.configure(
+            "Title.TLabel",
+            background=palette["card"],
+            foreground=palette["text"],
+            font=("Segoe UI", 16, "bold"),
+        )
+        self.style.configure(
+            "Body.TLabel",
+            background=palette["card"],
+            foreground=palette["muted"],
+            font=("Segoe UI", 10),
+            wraplength=360,
+        )
+        self.style.configure(
+            "Section.TLabel",
+            background=palette["card"],
+            foreground=palette["text"],
+            font=("Segoe UI", 11, "bold"),
+        )
+        self.style.configure(
+            "TButton",
+            font=("Segoe UI", 10, "bold"),
+            padding=(14, 8),
+        )
+        self.style.configure(
+            "Accent.TButton",
+            background=palette["accent"],
+            foreground="#ffffff",
+        )
+        self.style.map(
+            "Accent.TButton",
+            background=[("active", palette["accent_hover"]), ("disabled", "#aeb8fb")],
+            foreground=[("disabled", "#f5f7fb")],
+        )
+        self.style.configure(
+            "Danger.TButton",
+            background=palette["danger"],
+            foreground="#ffffff",
+        )
+        self.style.map(
+            "Danger.TButton",
+            background=[("active", "#9a2424"), ("disabled", "#f0b8b8")],
+            foreground=[("disabled", "#f5f7fb")],
+        )
+        self.style.configure(
+            "Info.TLabel",
+            background=palette["card"],
+            foreground=palette["muted"],
+            font=("Segoe UI", 9),
+        )
+        self.palette = palette
+
+    def _build_layout(self) -> None:
+        # The content is taller than fits on a 768-pixel screen, so it scrolls inside a canvas.
+        self.page = tk.Canvas(self.root, bg=self.palette["background"], highlightthickness=0, bd=0)
+        page_scrollbar = ttk.Scrollbar(self.root, orient=tk.VERTICAL, command=self.page.yview)
+        self.page.configure(yscrollcommand=page_scrollbar.set)
+        page_scrollbar.pack(side=tk.RIGHT, fill=tk.Y)
+        self.page.pack(side=tk.LEFT, fill=tk.BOTH, expand=True)
+        content = ttk.Frame(self.page)
+        window = self.page.create_window(0, 0, window=content, anchor=tk.NW)
+        content.bind("<Configure>", lambda _event: self.page.configure(scrollregion=self.page.bbox(window)))
+        self.page.bind("<Configure>", lambda event: self.page.itemconfigure(window, width=event.width))
+        for sequence in ("<MouseWheel>", "<Button-4>", "<Button-5>"):
+            self.root.bind_all(sequence, self._on_page_wheel)
+
+        main = ttk.Frame(content, style="Card.TFrame", padding=24)
+        main.pack(fill=tk.BOTH, expand=True, padx=24, pady=24)
+
+        header = ttk.Frame(main, style="Card.TFrame")
+        header.pack(fill=tk.X)
+
+        ttk.Label(header, text="Microphone guardian", style="Title.TLabel").pack(anchor=tk.W)
+        ttk.Label(
+            header,
+            text=(
+                "Keep your input level locked where you want it. Refresh the device list,"
+                " set a custom enforcement interval, and monitor live status updates."
+            ),
+            style="Body.TLabel",
+        ).pack(anchor=tk.W, pady=(6, 18))
+
+        device_section = ttk.Frame(main, style="Card.TFrame")
+        device_section.pack(fill=tk.X, pady=(0, 18))
+
+        ttk.Label(device_section, text="Recording device", style="Section.TLabel").pack(anchor=tk.W)
+
+        search_row = ttk.Frame(device_section, style="Card.TFrame")
+        search_row.pack(fill=tk.X, pady=(8, 0))
+
+        self.device_filter = ttk.Entry(search_row, textvariable=self.device_filter_var, width=34)
+        self.device_filter.pack(side=tk.LEFT, expand=True, fill=tk.X)
+        self.device_filter.bind("<Down>", lambda _event: self._move_selection(1))
+        self.device_filter.bind("<Up>", lambda _event: self._move_selection(-1))
+        self.device_filter_var.trace_add("write", lambda *_args: self._apply_filter())
+
+        ttk.Button(
+            search_row,
+            text="Refresh",
+            command=self.refresh_devices,
+            style="TButton",
+        ).pack(side=tk.LEFT, padx=(8, 0))
+
+        self.device_list = DeviceList(device_section, self.palette, PICKER_ROWS, self._on_device_selected)
+        self.device_list.frame.pack(fill=tk.X, pady=(6, 0))
+
+        picker_row = ttk.Frame(device_section, style="Card.TFrame")
+        picker_row.pack(fill=tk.X, pady=(4, 0))
+
+        ttk.Checkbutton(
+            picker_row,
+            text="Show disconnected devices",
+            variable=self.show_inactive_var,
+            command=self._on_show_inactive,
+        ).pack(side=tk.LEFT)
+        ttk.Label(picker_row, textvariable=self.picker_count_var, style="Info.TLabel").pack(side=tk.RIGHT)
+
+        ttk.Label(device_section, textvariable=self.device_details_var, style="Info.TLabel").pack(
+            anchor=tk.W, pady=(6, 0)
+        )
+
+        controls_section = ttk.Frame(main, style="Card.TFrame")
+        controls_section.pack(fill=tk.X, pady=(0, 18))
+
+        ttk.Label(controls_section, text="Enforcement settings", style="Section.TLabel").pack(anchor=tk.W)
+
+        freq_frame = ttk.Frame(controls_section, style="Card.TFrame")
+        freq_frame.pack(fill=tk.X, pady=(10, 0))
+
+        ttk.Label(freq_frame, text="Check every", style="Body.TLabel").pack(side=tk.LEFT)
+        freq_entry = ttk.Entry(freq_frame, textvariable=self.frequency_var, width=6, justify="center")
+        freq_entry.pack(side=tk.LEFT, padx=(8, 6))
+        ttk.Label(freq_frame, text="seconds", style="Body.TLabel").pack(side=tk.LEFT)
+        self.frequency_entry = freq_entry
+        freq_entry.bind("<Return>", self._on_frequency_change)
+        freq_entry.bind("<FocusOut>", self._on_frequency_change)
+
+        ttk.Checkbutton(
+            controls_section,
+            text="Correct changes instantly (interval becomes a safety net)",
+            variable=self.instant_var,
+            command=self._on_option_change,
+        ).pack(anchor=tk.W, pady=(8, 0))
+        ttk.Checkbutton(
+            controls_section,
+            text="Pause checks while no app is recording",
+            variable=self.idle_var,
+            command=self._on_option_change,
+        ).pack(anchor=tk.W, pady=(4, 0))
+
+        tolerance_frame = ttk.Frame(controls_section, style="Card.TFrame")
+        tolerance_frame.pack(fill=tk.X, pady=(8, 0))
+
+        ttk.Label(tolerance_frame, text="Leave alone within ±", style="Body.TLabel").pack(side=tk.LEFT)
+        tolerance_spinbox = ttk.Spinbox(
+            tolerance_frame,
+            from_=0,
+            to=10,
+            increment=0.5,
+            textvariable=self.tolerance_var,
+            width=5,
+            justify="center",
+            command=self._on_option_change,
+        )
+        tolerance_spinbox.pack(side=tk.LEFT, padx=(8, 6))
+        tolerance_spinbox.bind("<Return>", lambda _event: self._on_option_change())
+        tolerance_spinbox.bind("<FocusOut>", lambda _event: self._on_option_change())
+        ttk.Label(tolerance_frame, text="%", style="Body.TLabel").pack(side=tk.LEFT)
+
+        contention_frame = ttk.Frame(controls_section, style="Card.TFrame")
+        contention_frame.pack(fill=tk.X, pady=(8, 0))
+
+        ttk.Label(contention_frame, text="If another app fights back", style="Body.TLabel").pack(side=tk.LEFT)
+        contention_combo = ttk.Combobox(
+            contention_frame,
+            textvariable=self.contention_var,
+            values=list(CONTENTION_LABELS.values()),
+            state="readonly",
+            width=24,
+        )
+        contention_combo.pack(side=tk.LEFT, padx=(8, 0))
+        contention_combo.bind("<<ComboboxSelected>>", lambda _event: self._on_option_change())
+
+        volume_frame = ttk.Frame(controls_section, style="Card.TFrame")
+        volume_frame.pack(fill=tk.X, pady=(14, 0))
+
+        ttk.Label(volume_frame, textvariable=self.target_display_var, style="Body.TLabel").pack(anchor=tk.W)
+        self.volume_slider = ttk.Scale(
+            volume_frame,
+            from_=0,
+            to=100,
+            orient=tk.HORIZONTAL,
+            variable=self.target_volume_var,
+            command=self._on_volume_change,
+        )
+        self.volume_slider.pack(fill=tk.X, pady=(6, 10))
+
+        self.target_progress = ttk.Progressbar(volume_frame, maximum=100, value=100)
+        self.target_progress.pack(fill=tk.X)
+
+        self.meter_bar = ttk.Progressbar(volume_frame, maximum=100, value=0)
+        self.meter_bar.pack(fill=tk.X, pady=(8, 0))
+        ttk.Label(volume_frame, textvariable=self.meter_text_var, style="Info.TLabel").pack(anchor=tk.W, pady=(2, 0))
+        self.root.bind("<Unmap>", self._on_visibility_change, add="+")
+        self.root.bind("<Map>", self._on_visibility_change, add="+")
+
+        actions = ttk.Frame(main, style="Card.TFrame")
+        actions.pack(fill=tk.X, pady=(0, 18))
+
+        self.start_button = ttk.Button(actions, text="Start monitoring", style="Accent.TButton", command=self.start_monitoring)
+        self.start_button.pack(side=tk.LEFT, expand=True, fill=tk.X)
+
+        self.stop_button = ttk.Button(
+            actions,
+            text="Stop",
+            style="Danger.TButton",
+            command=self.stop_monitoring,
+            state=tk.DISABLED,
+        )
+        self.stop_button.pack(side=tk.LEFT, expand=True, fill=tk.X, padx=(12, 0))
+
+        guarded_section = ttk.Frame(main, style="Card.TFrame")
+        guarded_section.pack(fill=tk.X, pady=(0, 18))
+
+        ttk.Label(guarded_section, text="Guarded devices", style="Section.TLabel").pack(anchor=tk.W)
+        self.guarded_tree = ttk.Treeview(
+            guarded_section,
+            columns=("device", "target", "status", "last"),
+            show="headings",
+            height=4,
+            selectmode="browse",
+        )
+        for column, title, width in (
+            ("device", "Device", 150),
+            ("target", "Target", 55),
+            ("status", "Status", 110),
+            ("last", "Last applied", 75),
+        ):
+            self.guarded_tree.heading(column, text=title)
+            self.guarded_tree.column(column, width=width, stretch=column in ("device", "status"))
+        self.guarded_tree.pack(fill=tk.X, pady=(8, 0))
+        self.guarded_tree.bind("<<TreeviewSelect>>", lambda _event: self._on_row_selected())
+
+        status_section = ttk.Frame(main, style="Card.TFrame")
+        status_section.pack(fill=tk.BOTH, expand=True)
+
+        ttk.Label(status_section, text="Live status", style="Section.TLabel").pack(anchor=tk.W)
+
+        status_row = ttk.Frame(status_section, style="Card.TFrame")
+        status_row.pack(fill=tk.X, pady=(10, 6))
+
+        self.status_indicator = tk.Canvas(
+            status_row,
+            width=14,
+            height=14,
+            highlightthickness=0,
+            bg=self.palette["card"],
+            bd=0,
+        )
+        self.status_indicator.pack(side=tk.LEFT, pady=2)
+        self.status_indicator_circle = self.status_indicator.create_oval(2, 2, 12, 12, fill="#b0b7c3", outline="")
+
+        ttk.Label(status_row, textvariable=self.status_message_var, style="Body.TLabel").pack(side=tk.LEFT, padx=(10, 0))
+
+        ttk.Label(status_section, textvariable=self.last_applied_var, style="Info.TLabel").pack(anchor=tk.W, pady=(6, 0))
+        ttk.Label(status_section, textvariable=self.next_check_var, style="Info.TLabel").pack(anchor=tk.W)
+        ttk.Label(status_section, textvariable=self.io_stats_var, style="Info.TLabel").pack(anchor=tk.W)
+
+        self.sparkline = tk.Canvas(
+            status_section,
+            height=SPARKLINE_HEIGHT,
+            highlightthickness=1,
+            highlightbackground="#e0e4ec",
+            bg=self.palette["card"],
+            bd=0,
+        )
+        self.sparkline.pack(fill=tk.X, pady=(10, 6))
+        self.sparkline.bind("<Configure>", lambda _event: self._redraw_sparkline(force=True))
+
+        ttk.Button(status_section, text="Export history…", command=self.export_history).pack(anchor=tk.E)
+
+    def _on_page_wheel(self, event: tk.Event) -> None:
+        if isinstance(event.widget, ttk.Treeview):
+            return  # the guarded devices list scrolls itself
+        self.page.yview_scroll(-1 if event.num == 4 or event.delta > 0 else 1, "units")
+
+    @property
+    def monitoring(self) -> bool:
+        """Whether the device selected in the picker is being enforced."""
+        return self.current_device is not None and self.current_device.id in self.guarded
+
+    @traced("refresh_devices")
+    def refresh_devices(self) -> None:
+        """Ask the worker for the current list of active recording devices."""
+        self.update_status("Refreshing recording devices…", level="info")
+        self.worker.submit("refresh")
+
+    def _show_devices(self, devices: List[DeviceInfo]) -> None:
+        """Rebuild the picker by endpoint ID, keeping the preferred device selected."""
+        self.devices = devices
+        self._rebuild_picker()
+        active = {info.id for info in devices}
+        for device_id, guarded in self.guarded.items():
+            label = self.device_labels.get(device_id)
+            if device_id in active and label != guarded.name:
+                guarded.name = label
+                self.view.update_row(device_id)
+        if self.show_inactive_var.get():
+            self.worker.submit("inactive")
+
+        if not devices and not self.guarded:
+            self.device_details_var.set("No active recording devices detected.")
+            self.current_device = None
+            self.view.selected = None
+            self.update_status("Connect or enable a microphone, then refresh.", level="warning")
+            self._sync_controls()
+            return
+
+        if self.preferred_id in self.device_map or self.preferred_id in self.guarded:
+            self._select(self.preferred_id)
+        else:
+            self._select(devices[0].id if devices else next(iter(self.guarded)))
+
+    def _show_inactive(self, devices: List[DeviceInfo]) -> None:
+        if not self.show_inactive_var.get():
+            return  # the box was unticked while the worker was listing them
+        self.inactive_devices = devices
+        self._rebuild_picker()
+
+    def _on_show_inactive(self) -> None:
+        """Disabled and unplugged endpoints are only listed once somebody asks for them."""
+        if self.show_inactive_var.get():
+            self.worker.submit("inactive")
+        else:
+            self.inactive_devices = []
+            self._rebuild_picker()
+
+    def _rebuild_picker(self) -> None:
+        """Index active devices, then inactive ones, for the search box."""
+        active = {info.id for info in self.devices}
+        entries = self.devices + [info for info in self.inactive_devices if info.id not in active]
+        self.device_map = {info.id: info for info in entries}
+        self.device_labels = display_names(entries)
+        self.picker_entries = entries
+        self.picker_labels = [
+            self.device_labels[info.id] if info.id in active
+            else f"{self.device_labels[info.id]} ({INACTIVE_LABELS.get(info.state, 'disconnected')})"
+            for info in entries
+        ]
+        self.picker_positions = {info.id: position for position, info in enumerate(entries)}
+        self.device_index = DeviceIndex([(info.id, label) for info, label in zip(entries, self.picker_labels)])
+        self._apply_filter()
+
+    @traced("filter_devices")
+    def _apply_filter(self) -> None:
+        """Show the devices whose name or ID words start with what was typed."""
+        self.matches = self.device_index.search(self.device_filter_var.get())
+        self.device_list.show([self.picker_labels[position] for position in self.matches], self._selected_row())
+        total = len(self.picker_entries)
+        shown = len(self.matches)
+        self.picker_count_var.set(f"{total} devices" if shown == total else f"Showing {shown} of {total}")
+
+    def _selected_row(self) -> Optional[int]:
+        """Row of the selected device among the matches, or ``None`` if it is filtered out."""
+        position = self.picker_positions.get(self.current_device.id) if self.current_device else None
+        if position is None:
+            return None
+        row = bisect.bisect_left(self.matches, position)
+        return row if row < len(self.matches) and self.matches[row] == position else None
+
+    def _move_selection(self, delta: int) -> str:
+        if self.matches:
+            row = self._selected_row()
+            self._on_device_selected(0 if row is None else max(0, min(len(self.matches) - 1, row + delta)))
+        return "break"
+
+    @traced("on_device_selected")
+    def _on_device_selected(self, row: int) -> None:
+        if 0 <= row < len(self.matches):
+            self.preferred_id = self.picker_entries[self.matches[row]].id
+            self.store.select(self.preferred_id)
+            self._select(self.preferred_id)
+
+    def _select(self, device_id: str) -> None:
+        """Show ``device_id`` in the picker; guarded devices may be disconnected."""
+        guarded = self.guarded.get(device_id)
+        info = self.device_map.get(device_id)
+        if info is None and guarded is not None:
+            info = DeviceInfo(device_id, guarded.name, DEVICE_STATE_UNPLUGGED)
+        self.current_device = info
+        self.view.selected = device_id if info else None
+        self._sync_controls()
+        self._sync_meter()
+        self.device_list.select(self._selected_row())
+        if info is None:
+            self.device_details_var.set("No device selected.")
+            return
+        details = f"Friendly name: {info.name}\nDevice ID: {device_id}"
+        if device_id not in self.device_map or info.state != DEVICE_STATE_ACTIVE:
+            details += "\nNot connected: guarding starts when it is plugged in or enabled."
+        self.device_details_var.set(details)
+        if guarded is None:
+            profile = self.store.get(device_id)
+            if profile is not None:
+                self._load_settings(profile.settings)
+            self.view.set(LAST_APPLIED, "Last applied: —")
+            self.view.set(NEXT_CHECK, "Next check in: —")
+            self.update_status("Select a microphone to start monitoring.", level="info")
+            return
+        self._load_settings(guarded.settings)
+        self.view.show(device_id)
+        if self.guarded_tree.selection() != (device_id,):
+            self.guarded_tree.selection_set(device_id)
+
+    def _on_row_selected(self) -> None:
+        selection = self.guarded_tree.selection()
+        if not selection or (self.current_device and self.current_device.id == selection[0]):
+            return
+        if selection[0] in self.guarded:
+            self.preferred_id = selection[0]
+            self.store.select(self.preferred_id)
+            self._select(selection[0])
+
+    def _sync_controls(self) -> None:
+        if self.monitoring:
+            self.start_button.state(["disabled"])
+            self.stop_button.state(["!disabled"])
+        else:
+            self.start_button.state(["!disabled"] if self.current_device else ["disabled"])
+            self.stop_button.state(["disabled"])
+
+    def _load_settings(self, settings: EnforcementSettings) -> None:
+        percent = int(round(settings.target * 100))
+        self.target_volume_var.set(percent)
+        self.target_display_var.set(f"Target: {percent}%")
+        self.target_progress["value"] = percent
+        self.frequency_seconds = settings.interval
+        self.frequency_var.set(f"{settings.interval:g}")
+        self.tolerance_var.set(round(settings.tolerance * 100, 2))
+        self.instant_var.set(settings.instant)
+        self.idle_var.set(settings.activity_gated)
+        self.contention_var.set(CONTENTION_LABELS.get(settings.contention, CONTENTION_LABELS["backoff"]))
+
+    def _on_volume_change(self, value: str) -> None:
+        try:
+            numeric = int(float(value))
+        except ValueError:
+            numeric = self.target_volume_var.get()
+        numeric = max(0, min(100, numeric))
+        self.target_volume_var.set(numeric)
+        self.target_display_var.set(f"Target: {numeric}%")
+        self.target_progress["value"] = numeric
+        if self.monitoring:
+            device_id = self.current_device.id
+            guarded = self.guarded[device_id]
+            if int(round(guarded.settings.target * 100)) != numeric:
+                guarded.settings = self._current_settings()
+                self.store.remember(device_id, guarded.settings)
+                self.worker.submit("set-target", (device_id, numeric / 100.0))
+                self.view.update_row(device_id)
+
+    def _on_frequency_change(self, _event: object = None) -> None:
+        """Validate the interval once, when the user commits an edit."""
+        if self.frequency_var.get().strip() == f"{self.frequency_seconds:g}":
+            return
+        frequency = self.get_frequency_seconds()
+        if frequency is None or frequency == self.frequency_seconds:
+            return
+        self.frequency_seconds = frequency
+        if not self.monitoring:
+            return
+        device_id = self.current_device.id
+        self.guarded[device_id].settings = self._current_settings()
+        self.store.remember(device_id, self.guarded[device_id].settings)
+        self.worker.submit("configure", (device_id, self.guarded[device_id].settings))
+
+    def get_frequency_seconds(self) -> Optional[float]:
+        """Parse the interval entry; millisecond resolution, at least ``MIN_INTERVAL_SECONDS``."""
+        raw = self.frequency_var.get().strip()
+        try:
+            value = round(float(raw), 3)
+            if not MIN_INTERVAL_SECONDS <= value <= 24 * 3600:
+                raise ValueError
+            return value
+        except ValueError:
+            messagebox.showerror(
+                "Invalid frequency",
+                f"Please enter a number of seconds of at least {MIN_INTERVAL_SECONDS:g} (e.g. 5 or 0.25).",
+            )
+            self.frequency_var.set(f"{self.frequency_seconds:g}")
+            return None
+
+    def get_contention(self) -> str:
+        label = self.contention_var.get()
+        return next((key for key, text in CONTENTION_LABELS.items() if text == label), "backoff")
+
+    def _on_option_change(self) -> None:
+        """Push a changed option (instant correction, tolerance, fight strategy, idle) to the guarded device."""
+        if not self.monitoring:
+            return
+        device_id = self.current_device.id
+        self.guarded[device_id].settings = self._current_settings()
+        self.store.remember(device_id, self.guarded[device_id].settings)
+        self.worker.submit("configure", (device_id, self.guarded[device_id].settings))
+
+    def get_tolerance(self) -> float:
+        try:
+            percent = float(self.tolerance_var.get())
+        except (tk.TclError, ValueError):
+            percent = 0.5
+            self.tolerance_var.set(percent)
+        return max(0.0, min(10.0, percent)) / 100.0
+
+    def _current_settings(self) -> EnforcementSettings:
+        return EnforcementSettings(
+            target=max(0, min(100, self.target_volume_var.get())) / 100.0,
+            tolerance=self.get_tolerance(),
+            interval=self.frequency_seconds,
+            instant=self.instant_var.get(),
+            contention=self.get_contention(),
+            activity_gated=self.idle_var.get(),
+        )
+
+    @traced("start_monitoring")
+    def start_monitoring(self) -> None:
+        """Start guarding the selected device with the current settings."""
+        if self.monitoring:
+            return
+        if self.current_device is None:
+            messagebox.showinfo("No device selected", "Please choose a microphone before starting monitoring.")
+            return
+        device = self.device_map.get(self.current_device.id)
+        if not device:
+            messagebox.showwarning("Device unavailable", "The selected microphone is no longer available. Refresh the list.")
+            return
+        frequency = self.get_frequency_seconds()
+        if frequency is None:
+            return
+        self.frequency_seconds = frequency
+        settings = self._current_settings()
+        name = self.device_labels.get(device.id, device.name)
+        self.guarded[device.id] = GuardedDevice(name, settings, status=f"Monitoring '{name}'.", level="success")
+        self.guarded_tree.insert("", tk.END, iid=device.id)
+        self.view.update_row(device.id)
+        self.guarded_tree.selection_set(device.id)
+        self._sync_controls()
+        self.view.show(device.id)
+        self.store.remember(device.id, settings, auto_start=True)
+        self.worker.submit("start", (device.id, settings))
+
+    @traced("poll_events")
+    def _poll_events(self) -> None:
+        self._drain_events()
+        self._flush_view()
+        self._redraw_sparkline()
+        self.events_after_id = self.root.after(FRAME_MS, self._poll_events)
+
+    def _drain_events(self) -> None:
+        """Apply worker results to the UI; this is the only place the UI learns about devices."""
+        while True:
+            try:
+                event = self.events.get_nowait()
+            except queue.Empty:
+                return
+            if event.kind == "devices":
+                self._show_devices(event.payload)
+                continue
+            if event.kind == "inactive-devices":
+                self._show_inactive(event.payload)
+                continue
+            if not event.device_id:
+                if event.kind == "error":
+                    self.update_status(event.message, level="error")
+                continue
+            if event.kind in ("meter", "meter-unavailable"):
+                self.view.apply(event)
+                continue
+            guarded = self.guarded.get(event.device_id)
+            if guarded is None:
+                continue
+            if event.kind == "stopped":
+                if guarded.level == "error":
+                    self._forget_guarded(event.device_id)
+                continue
+            if event.kind == "configured":
+                self._on_remote_configure(event.device_id, event.payload)
+            self.view.apply(event)
+
+    def _on_remote_configure(self, device_id: str, settings: EnforcementSettings) -> None:
+        """Remember settings changed through the control channel and show them."""
+        self.store.remember(device_id, settings)
+        if self.current_device and self.current_device.id == device_id:
+            self._load_settings(settings)
+
+    def _flush_view(self) -> None:
+        """Push the fields that changed since the last frame, and nothing else."""
+        for key, value in self.view.flush().items():
+            self._push(key, value)
+
+    def _push(self, key: Hashable, value: Any) -> None:
+        if key == STATUS:
+            message, level = value
+            self.status_message_var.set(message)
+            color = STATUS_COLORS.get(level, STATUS_COLORS["info"])
+            self.status_indicator.itemconfig(self.status_indicator_circle, fill=color)
+        elif key == LAST_APPLIED:
+            self.last_applied_var.set(value)
+        elif key == NEXT_CHECK:
+            self.next_check_var.set(value)
+        elif key == IO_STATS:
+            self.io_stats_var.set(value)
+        elif key == METER:
+            percent, text = value
+            self.meter_bar["value"] = percent
+            self.meter_text_var.set(text)
+        elif isinstance(key, tuple) and self.guarded_tree.exists(key[1]):
+            self.guarded_tree.item(key[1], values=value)
+
+    @traced("redraw_sparkline")
+    def _redraw_sparkline(self, force: bool = False) -> None:
+        """Draw the selected device's recent levels, at most every ``SPARKLINE_REDRAW_SECONDS``.
+
+        Corrections are drawn as red dots at the level that was observed
+        before the write, drifts left alone during a fight as amber dots; the
+        dashed line is the target.
+        """
+        guarded = self.guarded.get(self.current_device.id) if self.current_device else None
+        key = (id(guarded), guarded.history.version if guarded else 0)
+        now = time.monotonic()
+        if not force and (key == self._sparkline_drawn or now - self._sparkline_drawn_at < SPARKLINE_REDRAW_SECONDS):
+            return
+        self._sparkline_drawn = key
+        self._sparkline_drawn_at = now
+        canvas = self.sparkline
+        canvas.delete("all")
+        if guarded is None:
+            return
+        width = max(1, canvas.winfo_width())
+        height = max(1, canvas.winfo_height())
+        target_y = sparkline_points([(0.0, guarded.settings.target, "applied")], width, height)[0][1]
+        canvas.create_line(0, target_y, width, target_y, fill="#b0b7c3", dash=(3, 3))
+        points = sparkline_points(guarded.history.samples(SPARKLINE_SAMPLES), width, height)
+        if len(points) > 1:
+            coordinates = [coordinate for x, y, _action in points for coordinate in (x, y)]
+            canvas.create_line(*coordinates, fill=self.palette["accent"])
+        markers = {"corrected": self.palette["danger"], "yielded": STATUS_COLORS["warning"]}
+        for x, y, action in points:
+            if action in markers:
+                canvas.create_oval(x - 2, y - 2, x + 2, y + 2, fill=markers[action], outline="")
+
+    @traced("export_history")
+    def export_history(self) -> None:
+        """Save the selected device's level history as CSV."""
+        guarded = self.guarded.get(self.current_device.id) if self.current_device else None
+        if guarded is None or not len(guarded.history):
+            messagebox.showinfo("No history", "Start monitoring a microphone to record its level history.")
+            return
+        path = filedialog.asksaveasfilename(
+            title="Export level history",
+            defaultextension=".csv",
+            filetypes=[("CSV files", "*.csv"), ("All files", "*.*")],
+            initialfile=f"microphone-history-{datetime.now():%Y%m%d-%H%M%S}.csv",
+        )
+        if not path:
+            return
+        try:
+            with open(path, "w", newline="", encoding="utf-8") as stream:
+                rows = guarded.history.write_csv(stream)
+        except OSError as exc:
+            messagebox.showerror("Export failed", f"Could not write {path}: {exc}")
+            return
+        self.update_status(f"Exported {rows} samples to {path}.", level="info")
+
+    def _forget_guarded(self, device_id: str) -> None:
+        guarded = self.guarded.pop(device_id, None)
+        if guarded is not None:
+            self.store.remember(device_id, guarded.settings)
+        self.view.forget(row_key(device_id))
+        if self.guarded_tree.exists(device_id):
+            self.guarded_tree.delete(device_id)
+        self._sync_controls()
+        if self.current_device and self.current_device.id == device_id:
+            self.view.set(NEXT_CHECK, "Next check in: —")
+
+    @traced("stop_monitoring")
+    def stop_monitoring(self) -> None:
+        """Stop guarding the selected device."""
+        if not self.monitoring:
+            return
+        self.worker.submit("stop", self.current_device.id)
+        self.store.remember(self.current_device.id, self.guarded[self.current_device.id].settings, auto_start=False)
+        self._forget_guarded(self.current_device.id)
+        self.update_status("Monitoring paused.", level="info")
+
+    def update_status(self, message: str, level: str = "info") -> None:
+        """Stage a status line; it reaches the window on the next frame if it changed."""
+        self.view.set(STATUS, (message, level))
+
+    def _on_visibility_change(self, event: tk.Event) -> None:
+        if event.widget is self.root:
+            self.window_visible = event.type == tk.EventType.Map
+            self._sync_meter()
+
+    def _sync_meter(self) -> None:
+        """Meter only the selected device, and nothing while the window is minimised."""
+        wanted = self.view.selected if self.window_visible else None
+        if wanted == self.metered_device:
+            return
+        self.metered_device = wanted
+        self.view.set(METER, METER_IDLE)
+        self.worker.submit("meter", wanted)
+
+    def on_close(self) -> None:
+        if self.events_after_id:
+            self.root.after_cancel(self.events_after_id)
+        if self.control is not None:
+            self.control.close()
+        self.worker.shutdown()
+        if self.audit is not None:
+            self.audit.close()
+        self.store.close()
+        self.root.destroy()
+
+
+def main(backend: Optional[Backend] = None) -> None:
+    root = tk.Tk()
+    lock = InstanceLock()
+    if not lock.acquire():
+        root.withdraw()
+        messagebox.showinfo(
+            "Already running",
+            "Microphone Guardian is already running. Use 'python -m microphone_guardian ctl' to control it.",
+        )
+        root.destroy()
+        return
+    rules = None
+    try:
+        rules = load_rules()
+    except (OSError, ValueError) as exc:
+        messagebox.showwarning("Rules not loaded", f"Ignoring {rules_path()}: {exc}")
+    try:
+        MicrophoneApp(root, control=True, backend=backend, audit=AuditLog().start(), rules=rules)
+        root.mainloop()
+    finally:
+        lock.release()
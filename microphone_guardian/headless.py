@@ -0,0 +1,221 @@
+"""Headless enforcement loop for unattended machines.
+
+Runs the same :class:`~microphone_guardian.worker.EnforcementWorker` as the
+GUI, without importing tkinter. SIGINT and SIGTERM (and Ctrl+Break on
+Windows) stop it cleanly.
+"""
+
+import contextlib
+import logging
+import queue
+import signal
+import threading
+import time
+from typing import TYPE_CHECKING, Any, Callable, ContextManager, List, Optional, Sequence, Set
+
+from .engine import CaptureActivitySource, CaptureSessionSource, EnforcementEvent, VolumeNotificationSource
+from .metrics import Metrics
+from .registry import DeviceInfo, EndpointSource
+from .worker import EnforcementSettings, EnforcementWorker, WorkerCommand
+
+if TYPE_CHECKING:
+    from .audit import AuditLog
+    from .rules import RuleMatcher
+
+log = logging.getLogger("microphone_guardian")
+
+EVENT_WAIT_SECONDS = 0.5
+
+
+def install_signal_handlers(stop: threading.Event) -> None:
+    """Set ``stop`` on SIGINT/SIGTERM (and SIGBREAK where it exists)."""
+    for name in ("SIGINT", "SIGTERM", "SIGBREAK"):
+        signum = getattr(signal, name, None)
+        if signum is not None:
+            signal.signal(signum, lambda _signum, _frame: stop.set())
+
+
+def list_devices(
+    source: EndpointSource,
+    apartment: Optional[Callable[[], ContextManager[Any]]] = None,
+    timeout: float = 10.0,
+) -> List[DeviceInfo]:
+    """Enumerate active capture endpoints through a short-lived worker."""
+    events: "queue.SimpleQueue[EnforcementEvent]" = queue.SimpleQueue()
+    worker = EnforcementWorker(source, post=events.put, apartment=apartment or contextlib.nullcontext)
+    worker.start()
+    try:
+        while True:
+            event = events.get(timeout=timeout)
+            if event.kind == "devices":
+                return event.payload
+            if event.kind == "error":
+                raise RuntimeError(event.message)
+    finally:
+        worker.shutdown()
+
+
+def run(
+    source: EndpointSource,
+    settings: EnforcementSettings,
+    device_ids: Sequence[str] = (),
+    notifications: Optional[VolumeNotificationSource] = None,
+    apartment: Optional[Callable[[], ContextManager[Any]]] = None,
+    stop: Optional[threading.Event] = None,
+    duration: Optional[float] = None,
+    metrics: Optional[Metrics] = None,
+    activity: Optional[CaptureActivitySource] = None,
+    control: bool = False,
+    record: Optional[str] = None,
+    audit: Optional["AuditLog"] = None,
+    profile: Optional[str] = None,
+    sessions: Optional[CaptureSessionSource] = None,
+    rules: Optional["RuleMatcher"] = None,
+) -> int:
+    """Enforce ``settings`` on every device in ``device_ids`` until ``stop`` is set.
+
+    With no IDs the first active recording device is used. With ``control``
+    the run also listens for ``ctl`` commands; the caller must hold the
+    instance lock. With ``record`` a trace of the run is written to that path
+    for ``replay``. Events also go to ``audit`` when given. With ``profile``
+    the run is profiled from the start and a Chrome trace is written to that
+    path on the way out. ``rules`` pick per-application targets from what
+    ``sessions`` reports is capturing. Failed endpoint calls are retried
+    with backoff instead of ending the run. Returns an exit code.
+    """
+    stop = stop or threading.Event()
+    recorder = None
+    if record is not None:
+        from .trace import TraceRecorder
+
+        try:
+            recorder = TraceRecorder.open(record)
+        except OSError as exc:
+            log.error("Cannot write the trace to %s: %s", record, exc)
+            return 2
+    events: "queue.SimpleQueue[EnforcementEvent]" = queue.SimpleQueue()
+    worker = EnforcementWorker(
+        source,
+        notifications,
+        post=audit.tee(events.put) if audit is not None else events.put,
+        apartment=apartment or contextlib.nullcontext,
+        metrics=metrics,
+        activity=activity,
+        recorder=recorder,
+        sessions=sessions,
+        rules=rules,
+        retry_failures=True,
+    )
+    if profile is not None:
+        worker.handle(WorkerCommand("profile", True))  # before start, so the first enumeration is profiled too
+    worker.start()
+    server = None
+    if control:
+        from .control import serve
+
+        server = serve(worker)
+    ends_at = time.monotonic() + duration if duration is not None else None
+    exit_code = 0
+    started = False
+    active: Set[str] = set()
+    try:
+        while not stop.is_set():
+            if ends_at is not None and time.monotonic() >= ends_at:
+                break
+            try:
+                event = events.get(timeout=EVENT_WAIT_SECONDS)
+            except queue.Empty:
+                continue
+            if event.kind == "devices" and not started:
+                picked = _pick_devices(event.payload, device_ids)
+                if not picked:
+                    exit_code = 2
+                    break
+                for device_id in picked:
+                    worker.submit("start", (device_id, settings))
+                active.update(picked)
+                started = True
+            elif event.kind == "error":
+                log.error("%s%s", _prefix(event), event.message)
+                if not event.device_id:
+                    exit_code = 1
+                    break
+            elif event.kind == "stopped":
+                active.discard(event.device_id)
+                if not active:
+                    exit_code = 1
+                    break
+            else:
+                _log_event(event)
+    finally:
+        log.info("Shutting down.")
+        if server is not None:
+            server.close()
+        worker.shutdown(timeout=5.0)
+        if recorder is not None:
+            recorder.close()
+            log.info("Wrote %d trace records to %s.", recorder.records, record)
+        if profile is not None:
+            try:
+                log.info("Wrote %d profile spans to %s.", worker.profiler.write_chrome_trace(profile), profile)
+            except OSError as exc:
+                log.error("Cannot write the profile to %s: %s", profile, exc)
+    return exit_code
+
+
+def _pick_devices(devices: List[DeviceInfo], device_ids: Sequence[str]) -> List[str]:
+    if not device_ids:
+        if not devices:
+            log.error("No active recording devices detected.")
+            return []
+        log.warning("No --device-id given; using '%s' (%s).", devices[0].name, devices[0].id)
+        return [devices[0].id]
+    known = {info.id for info in devices}
+    missing = [device_id for device_id in device_ids if device_id not in known]
+    for device_id in missing:
+        log.error("Device %s is not an active recording device.", device_id)
+    return [] if missing else list(dict.fromkeys(device_ids))
+
+
+def _prefix(event: EnforcementEvent) -> str:
+    return f"[{event.device_id}] " if event.device_id else ""
+
+
+def _log_event(event: EnforcementEvent) -> None:
+    percent = int(round(event.level * 100))
+    prefix = _prefix(event)
+    if event.kind == "corrected":
+        log.info("%sCorrected level to %d%%.", prefix, percent)
+    elif event.kind == "applied":
+        log.info("%sEnforcing %d%%.", prefix, percent)
+    elif event.kind == "verified":
+        log.debug("%sHolding %d%%.", prefix, percent)
+    elif event.kind == "contention":
+        if event.payload:
+            log.warning("%s%s", prefix, event.message)
+        else:
+            log.info("%sContention over; correcting normally again.", prefix)
+    elif event.kind == "yielded":
+        log.debug("%sLeaving %d%% alone during a fight.", prefix, percent)
+    elif event.kind == "activity":
+        if event.payload:
+            log.info("%sCapture started; enforcing.", prefix)
+        else:
+            log.info("%sNothing is capturing; pausing checks.", prefix)
+    elif event.kind in ("activity-unavailable", "sessions-unavailable"):
+        log.warning("%s%s", prefix, event.message)
+    elif event.kind == "rule":
+        if event.payload is None:
+            log.info("%sNo rule applies; back to %d%%.", prefix, percent)
+        else:
+            log.info("%sRule %s.", prefix, event.message)
+    elif event.kind == "paused":
+        log.info("%sPaused by remote control.", prefix)
+    elif event.kind == "configured":
+        log.info("%sTarget set to %d%% by remote control.", prefix, percent)
+    elif event.kind == "parked":
+        log.warning("%sDevice disconnected; enforcement resumes when it is back.", prefix)
+    elif event.kind == "notifications-unavailable":
+        log.warning("%sInstant correction unavailable, polling only: %s", prefix, event.message)
+    elif event.kind == "scheduled":
+        log.debug("%sNext check in %.3g s.", prefix, event.payload)
@@ -0,0 +1,92 @@
+"""Fixed-size history of observed levels and corrections for one endpoint.
+
+Samples live in preallocated :mod:`array` buffers, so memory stays the same
+after weeks of uptime no matter how fast the device is polled.
+"""
+
+import csv
+import time
+from array import array
+from typing import IO, Iterator, List, Optional, Sequence, Tuple
+
+DEFAULT_CAPACITY = 3600
+ACTIONS = ("verified", "corrected", "applied", "yielded")
+
+Sample = Tuple[float, float, str]
+
+
+class LevelHistory:
+    """Ring buffer of ``(monotonic timestamp, observed level, action)`` samples."""
+
+    def __init__(self, capacity: int = DEFAULT_CAPACITY) -> None:
+        if capacity < 1:
+            raise ValueError("capacity must be at least 1")
+        self.capacity = capacity
+        self._timestamps = array("d", bytes(8 * capacity))
+        self._levels = array("d", bytes(8 * capacity))
+        self._actions = array("B", bytes(capacity))
+        self._next = 0
+        self._count = 0
+        self.version = 0
+
+    def __len__(self) -> int:
+        return self._count
+
+    def append(self, timestamp: float, level: float, action: str) -> None:
+        """Record one sample, overwriting the oldest once the buffer is full."""
+        index = self._next
+        self._timestamps[index] = timestamp
+        self._levels[index] = level
+        self._actions[index] = ACTIONS.index(action)
+        self._next = (index + 1) % self.capacity
+        self._count = min(self._count + 1, self.capacity)
+        self.version += 1
+
+    def clear(self) -> None:
+        self._next = 0
+        self._count = 0
+        self.version += 1
+
+    def _indices(self, last: Optional[int] = None) -> Iterator[int]:
+        count = self._count if last is None else max(0, min(last, self._count))
+        start = (self._next - count) % self.capacity
+        for offset in range(count):
+            yield (start + offset) % self.capacity
+
+    def samples(self, last: Optional[int] = None) -> List[Sample]:
+        """The most recent ``last`` samples (all by default), oldest first."""
+        return [(self._timestamps[i], self._levels[i], ACTIONS[self._actions[i]]) for i in self._indices(last)]
+
+    def write_csv(self, stream: IO[str], wall_clock_offset: Optional[float] = None) -> int:
+        """Write every sample as CSV and return how many rows were written.
+
+        ``wall_clock_offset`` converts monotonic timestamps to Unix time; it
+        defaults to the current difference between the two clocks.
+        """
+        if wall_clock_offset is None:
+            wall_clock_offset = time.time() - time.monotonic()
+        writer = csv.writer(stream, lineterminator="\n")
+        writer.writerow(("monotonic", "wall_clock", "level_percent", "action"))
+        rows = 0
+        for timestamp, level, action in self.samples():
+            wall = time.strftime("%Y-%m-%dT%H:%M:%S", time.localtime(timestamp + wall_clock_offset))
+            writer.writerow((f"{timestamp:.3f}", wall, f"{level * 100:.2f}", action))
+            rows += 1
+        return rows
+
+
+def sparkline_points(
+    samples: Sequence[Sample], width: float, height: float, padding: float = 2.0
+) -> List[Tuple[float, float, str]]:
+    """Map samples onto a ``width`` x ``height`` canvas, spread evenly left to right.
+
+    Levels are scaled so 0 is the bottom edge and 1 the top edge.
+    """
+    if not samples:
+        return []
+    usable_height = max(1.0, height - 2 * padding)
+    step = (width - 2 * padding) / max(1, len(samples) - 1)
+    return [
+        (padding + index * step, padding + (1.0 - max(0.0, min(1.0, level))) * usable_height, action)
+        for index, (_timestamp, level, action) in enumerate(samples)
+    ]
@@ -0,0 +1,99 @@
+"""Input peak meter samples and their sliding-window statistics.
+
+Samples go into a preallocated NumPy ring buffer, and statistics are
+computed over the most recent window in one vectorised pass. NumPy is only
+needed for the meter: without it :class:`PeakRing` raises ``RuntimeError``
+and the worker reports the meter as unavailable, while enforcement carries
+on as usual.
+"""
+
+import math
+from dataclasses import dataclass
+from typing import Any, Callable, Optional, Protocol, Sequence
+
+try:
+    import numpy
+except ImportError:  # optional; only the input meter needs it
+    numpy = None
+
+CLIP_THRESHOLD = 0.99
+DEFAULT_CAPACITY = 3000
+
+PeakReader = Callable[[], float]
+
+
+class PeakMeterSource(Protocol):
+    """Something that can read an endpoint's peak meter."""
+
+    def open(self, device: object) -> PeakReader:
+        """Return a function that reads the current peak (0..1) of ``device``."""
+
+
+@dataclass(frozen=True)
+class MeterStats:
+    """Peak meter summary over the last ``samples`` readings."""
+
+    current: float = 0.0
+    peak: float = 0.0
+    rms: float = 0.0
+    clipping: float = 0.0
+    samples: int = 0
+
+
+class PeakRing:
+    """Fixed-size float32 ring of peak samples with windowed statistics.
+
+    A sample at or above ``clip_threshold`` counts as clipped. Raises
+    ``RuntimeError`` when NumPy is not installed.
+    """
+
+    def __init__(self, capacity: int = DEFAULT_CAPACITY, clip_threshold: float = CLIP_THRESHOLD) -> None:
+        if numpy is None:
+            raise RuntimeError("the input meter needs NumPy (pip install numpy)")
+        if capacity < 1:
+            raise ValueError("capacity must be at least 1")
+        self.capacity = capacity
+        self.clip_threshold = clip_threshold
+        self._buffer: Any = numpy.zeros(capacity, dtype=numpy.float32)
+        self._next = 0
+        self._count = 0
+
+    def __len__(self) -> int:
+        return self._count
+
+    def append(self, value: float) -> None:
+        self._buffer[self._next] = value
+        self._next = (self._next + 1) % self.capacity
+        self._count = min(self._count + 1, self.capacity)
+
+    def extend(self, values: Sequence[float]) -> None:
+        """Append many samples with at most two slice copies."""
+        values = numpy.asarray(values, dtype=numpy.float32)[-self.capacity :]
+        count = len(values)
+        first = min(count, self.capacity - self._next)
+        self._buffer[self._next : self._next + first] = values[:first]
+        if count > first:
+            self._buffer[: count - first] = values[first:]
+        self._next = (self._next + count) % self.capacity
+        self._count = min(self._count + count, self.capacity)
+
+    def window(self, size: Optional[int] = None) -> Any:
+        """The most recent ``size`` samples, oldest first, as one contiguous array."""
+        size = self._count if size is None else max(0, min(size, self._count))
+        start = (self._next - size) % self.capacity
+        if start + size <= self.capacity:
+            return self._buffer[start : start + size]
+        return numpy.concatenate((self._buffer[start:], self._buffer[: size - (self.capacity - start)]))
+
+    def stats(self, size: Optional[int] = None) -> MeterStats:
+        """RMS, peak and share of clipped samples over the last ``size`` samples."""
+        samples = self.window(size)
+        count = len(samples)
+        if not count:
+            return MeterStats()
+        current = float(samples[-1])
+        samples = samples.astype(numpy.float64)  # exact copies of the stored float32 values
+        peak = float(samples.max())
+        rms = math.sqrt(float(numpy.dot(samples, samples)) / count)
+        clipped = int(numpy.count_nonzero(samples >= self.clip_threshold))
+        return MeterStats(current, peak, rms, clipped / count, count)
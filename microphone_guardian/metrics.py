@@ -0,0 +1,257 @@
+"""Counters and latency histograms for the enforcement path.
+
+Counters come straight from each enforcer's
+:class:`~microphone_guardian.engine.EnforcementStats`, which the engine
+updates anyway, so counting adds no per-tick work. Endpoint call latency is
+measured by wrapping the endpoint volume in :class:`TimedEndpointVolume`.
+:class:`MetricsServer` optionally serves everything on localhost in
+Prometheus text format (``/metrics``) and as JSON (``/metrics.json``).
+"""
+
+import bisect
+import dataclasses
+import json
+import threading
+import time
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple
+
+from .engine import EnforcementStats
+
+# Seconds; WASAPI calls normally land in the sub-millisecond buckets.
+DEFAULT_BUCKETS = (0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 1.0)
+DEFAULT_PORT = 9464
+
+COUNTER_HELP = {
+    "ticks": "Scheduled checks run.",
+    "drifts": "Times the level was found outside the tolerance.",
+    "writes": "Successful corrections written to the endpoint.",
+    "failures": "Endpoint calls that raised.",
+    "reads": "Level reads before deciding whether to write.",
+    "skipped_writes": "Checks that found the level in tolerance and wrote nothing.",
+    "missed_ticks": "Scheduled checks skipped because the worker fell behind.",
+    "fights": "Times another application was caught repeatedly undoing corrections.",
+    "yielded": "Drifts deliberately left alone during a fight.",
+}
+
+
+class Histogram:
+    """Fixed-bucket histogram; ``observe`` is a bisect and three increments."""
+
+    __slots__ = ("buckets", "counts", "count", "sum")
+
+    def __init__(self, buckets: Sequence[float] = DEFAULT_BUCKETS) -> None:
+        self.buckets = tuple(buckets)
+        self.counts = [0] * (len(self.buckets) + 1)
+        self.count = 0
+        self.sum = 0.0
+
+    def observe(self, value: float) -> None:
+        self.counts[bisect.bisect_left(self.buckets, value)] += 1
+        self.count += 1
+        self.sum += value
+
+    def cumulative(self) -> List[Tuple[str, int]]:
+        """Return ``(le, cumulative count)`` pairs including ``+Inf``."""
+        total = 0
+        pairs = []
+        for bound, count in zip(self.buckets + (float("inf"),), self.counts):
+            total += count
+            pairs.append(("+Inf" if bound == float("inf") else repr(bound), total))
+        return pairs
+
+
+class TimedEndpointVolume:
+    """Proxy around an endpoint volume that times the calls the engine makes."""
+
+    def __init__(self, inner: object, histograms: Dict[str, Histogram], clock: Callable[[], float]) -> None:
+        self._inner = inner
+        self._histograms = histograms
+        self._clock = clock
+
+    def __getattr__(self, name: str) -> Any:
+        return getattr(self._inner, name)
+
+    def _timed(self, operation: str, call: Callable[..., Any], *args: Any) -> Any:
+        began = self._clock()
+        try:
+            return call(*args)
+        finally:
+            self._histograms[operation].observe(self._clock() - began)
+
+    def GetMasterVolumeLevelScalar(self) -> float:
+        return self._timed("get_level", self._inner.GetMasterVolumeLevelScalar)
+
+    def SetMasterVolumeLevelScalar(self, level: float, event_context: Optional[object]) -> None:
+        self._timed("set_level", self._inner.SetMasterVolumeLevelScalar, level, event_context)
+
+    def GetMute(self) -> int:
+        return self._timed("get_mute", self._inner.GetMute)
+
+    def SetMute(self, muted: int, event_context: Optional[object]) -> None:
+        self._timed("set_mute", self._inner.SetMute, muted, event_context)
+
+
+class Metrics:
+    """Per-device counters and endpoint call latency histograms."""
+
+    OPERATIONS = ("get_level", "set_level", "get_mute", "set_mute")
+
+    def __init__(self, clock: Callable[[], float] = time.perf_counter, buckets: Sequence[float] = DEFAULT_BUCKETS) -> None:
+        self.clock = clock
+        self.buckets = tuple(buckets)
+        self._lock = threading.Lock()
+        self._live: Dict[str, EnforcementStats] = {}
+        self._retired: Dict[str, EnforcementStats] = {}
+        self._histograms: Dict[str, Dict[str, Histogram]] = {}
+        self._wakeups: Optional[Callable[[], Tuple[int, float]]] = None
+
+    def wrap(self, device_id: str, endpoint_volume: object) -> TimedEndpointVolume:
+        with self._lock:
+            histograms = self._histograms.setdefault(
+                device_id, {operation: Histogram(self.buckets) for operation in self.OPERATIONS}
+            )
+        return TimedEndpointVolume(endpoint_volume, histograms, self.clock)
+
+    def watch_wakeups(self, source: Callable[[], Tuple[int, float]]) -> None:
+        """Report the worker's enforcement wakeups; ``source()`` returns ``(count, seconds)``."""
+        self._wakeups = source
+
+    def wakeups(self) -> Dict[str, float]:
+        if self._wakeups is None:
+            return {}
+        count, seconds = self._wakeups()
+        return {"wakeups": count, "wakeups_per_hour": count * 3600.0 / seconds if seconds > 0 else 0.0}
+
+    def track(self, device_id: str, stats: EnforcementStats) -> None:
+        """Start reporting a live enforcer's counters."""
+        with self._lock:
+            self._live[device_id] = stats
+
+    def retire(self, device_id: str) -> None:
+        """Fold a stopped enforcer's counters into the totals so they never go backwards."""
+        with self._lock:
+            stats = self._live.pop(device_id, None)
+            if stats is None:
+                return
+            retired = self._retired.setdefault(device_id, EnforcementStats())
+            for field in dataclasses.fields(EnforcementStats):
+                setattr(retired, field.name, getattr(retired, field.name) + getattr(stats, field.name))
+
+    def counters(self) -> Dict[str, Dict[str, int]]:
+        with self._lock:
+            devices = set(self._live) | set(self._retired)
+            result = {}
+            for device_id in sorted(devices):
+                totals = {}
+                for field in dataclasses.fields(EnforcementStats):
+                    totals[field.name] = sum(
+                        getattr(stats, field.name)
+                        for stats in (self._live.get(device_id), self._retired.get(device_id))
+                        if stats is not None
+                    )
+                result[device_id] = totals
+            return result
+
+    def snapshot(self) -> Dict[str, Any]:
+        """JSON-serialisable view of every counter and histogram."""
+        counters = self.counters()
+        with self._lock:
+            histograms = {
+                device_id: {
+                    operation: {
+                        "count": histogram.count,
+                        "sum": histogram.sum,
+                        "buckets": dict(histogram.cumulative()),
+                    }
+                    for operation, histogram in operations.items()
+                    if histogram.count
+                }
+                for device_id, operations in self._histograms.items()
+            }
+        devices = sorted(set(counters) | set(histograms))
+        return {
+            "worker": self.wakeups(),
+            "devices": {
+                device_id: {"counters": counters.get(device_id, {}), "latency_seconds": histograms.get(device_id, {})}
+                for device_id in devices
+            },
+        }
+
+    def render_prometheus(self) -> str:
+        """Render the Prometheus text exposition format (version 0.0.4)."""
+        lines: List[str] = []
+        wakeups = self.wakeups()
+        if wakeups:
+            lines.append("# HELP microphone_guardian_wakeups_total Times the worker woke up to run due checks.")
+            lines.append("# TYPE microphone_guardian_wakeups_total counter")
+            lines.append(f"microphone_guardian_wakeups_total {wakeups['wakeups']}")
+            lines.append("# HELP microphone_guardian_wakeups_per_hour Average enforcement wakeups per hour since start.")
+            lines.append("# TYPE microphone_guardian_wakeups_per_hour gauge")
+            lines.append(f"microphone_guardian_wakeups_per_hour {wakeups['wakeups_per_hour']:.3f}")
+        counters = self.counters()
+        for name, help_text in COUNTER_HELP.items():
+            metric = f"microphone_guardian_{name}_total"
+            lines.append(f"# HELP {metric} {help_text}")
+            lines.append(f"# TYPE {metric} counter")
+            for device_id, totals in counters.items():
+                lines.append(f'{metric}{{device="{_escape(device_id)}"}} {totals.get(name, 0)}')
+        metric = "microphone_guardian_endpoint_call_seconds"
+        lines.append(f"# HELP {metric} Latency of endpoint volume calls.")
+        lines.append(f"# TYPE {metric} histogram")
+        with self._lock:
+            for device_id, operations in sorted(self._histograms.items()):
+                for operation, histogram in operations.items():
+                    labels = f'device="{_escape(device_id)}",operation="{operation}"'
+                    for bound, count in histogram.cumulative():
+                        lines.append(f'{metric}_bucket{{{labels},le="{bound}"}} {count}')
+                    lines.append(f"{metric}_sum{{{labels}}} {histogram.sum!r}")
+                    lines.append(f"{metric}_count{{{labels}}} {histogram.count}")
+        return "\n".join(lines) + "\n"
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+class MetricsServer:
+    """Serve :class:`Metrics` on a local port from a daemon thread."""
+
+    def __init__(self, metrics: Metrics, host: str = "127.0.0.1", port: int = DEFAULT_PORT) -> None:
+        from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+        self.metrics = metrics
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(handler) -> None:  # noqa: N805
+                if handler.path in ("/metrics", "/"):
+                    body = metrics.render_prometheus().encode("utf-8")
+                    content_type = "text/plain; version=0.0.4; charset=utf-8"
+                elif handler.path == "/metrics.json":
+                    body = json.dumps(metrics.snapshot(), indent=2).encode("utf-8")
+                    content_type = "application/json"
+                else:
+                    handler.send_error(404)
+                    return
+                handler.send_response(200)
+                handler.send_header("Content-Type", content_type)
+                handler.send_header("Content-Length", str(len(body)))
+                handler.end_headers()
+                handler.wfile.write(body)
+
+            def log_message(handler, format: str, *args: Any) -> None:  # noqa: A002,N805
+                pass
+
+        self._server = ThreadingHTTPServer((host, port), Handler)
+        self._server.daemon_threads = True
+        self._thread = threading.Thread(target=self._server.serve_forever, name="metrics-server", daemon=True)
+
+    @property
+    def address(self) -> Tuple[str, int]:
+        return self._server.server_address[:2]
+
+    def start(self) -> None:
+        self._thread.start()
+
+    def close(self) -> None:
+        self._server.shutdown()
+        self._server.server_close()
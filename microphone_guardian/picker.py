@@ -0,0 +1,117 @@
+"""Search index and row windowing for the device picker.
+
+Virtual-cable and remote-desktop hosts can expose hundreds of capture
+endpoints. The picker builds a :class:`DeviceIndex` once per device list,
+so each keystroke in the search box costs a few set operations rather than
+a pass over every label. :class:`RowWindow` tracks which slice of the
+matches is on screen, and the window only draws those rows.
+
+Labels and endpoint IDs are split into lowercase alphanumeric tokens. A
+query matches a device when every query token is a prefix of one of the
+device's tokens, so ``usb 3`` finds ``Microphone (USB Audio #3)`` and
+``{0.0.1.00000000}.{4f2a...}`` is found by ``4f2``. Postings are kept as
+integer bit masks, one bit per device, and the mask for each query token is
+cached, so typing one more character only looks up the new prefix.
+"""
+
+import bisect
+import re
+from typing import Dict, List, Sequence, Tuple
+
+TERM_CACHE_SIZE = 256
+
+_TOKEN = re.compile(r"[0-9a-z]+")
+
+
+def tokens(text: str) -> List[str]:
+    return _TOKEN.findall(text.lower())
+
+
+class DeviceIndex:
+    """Prefix index over ``(device ID, label)`` pairs; results keep the pairs' order."""
+
+    def __init__(self, entries: Sequence[Tuple[str, str]]) -> None:
+        self.size = len(entries)
+        postings: Dict[str, int] = {}
+        for position, (device_id, label) in enumerate(entries):
+            bit = 1 << position
+            for token in set(tokens(label)).union(tokens(device_id)):
+                postings[token] = postings.get(token, 0) | bit
+        self._tokens = sorted(postings)
+        self._postings = [postings[token] for token in self._tokens]
+        self._terms: Dict[str, int] = {}
+
+    def search(self, query: str) -> List[int]:
+        """Positions of the entries matching ``query``; all of them for a blank query."""
+        terms = tokens(query)
+        if not terms:
+            return list(range(self.size))
+        mask = -1
+        for term in sorted(set(terms), key=len, reverse=True):  # longest first: the smallest masks
+            mask &= self._mask(term)
+            if not mask:
+                return []
+        return _positions(mask)
+
+    def _mask(self, term: str) -> int:
+        mask = self._terms.get(term)
+        if mask is None:
+            # Tokens only hold [0-9a-z], all of which sort before "\x7f".
+            start = bisect.bisect_left(self._tokens, term)
+            end = bisect.bisect_left(self._tokens, term + "\x7f", start)
+            mask = 0
+            for posting in self._postings[start:end]:
+                mask |= posting
+            if len(self._terms) >= TERM_CACHE_SIZE:
+                self._terms.clear()
+            self._terms[term] = mask
+        return mask
+
+
+def _positions(mask: int) -> List[int]:
+    bits = bin(mask)[:1:-1]  # lowest bit first, without the "0b"
+    positions = []
+    position = bits.find("1")
+    while position >= 0:
+        positions.append(position)
+        position = bits.find("1", position + 1)
+    return positions
+
+
+class RowWindow:
+    """The ``rows`` consecutive entries of a ``total``-long list that are on screen."""
+
+    def __init__(self, rows: int) -> None:
+        self.rows = rows
+        self.total = 0
+        self.top = 0
+
+    def reset(self, total: int) -> None:
+        self.total = total
+        self.top = self._clamp(self.top)
+
+    def visible(self) -> range:
+        return range(self.top, min(self.total, self.top + self.rows))
+
+    def scroll(self, delta: int) -> None:
+        self.top = self._clamp(self.top + delta)
+
+    def move_to(self, fraction: float) -> None:
+        """Put the entry at ``fraction`` of the list at the top, as a scrollbar drag does."""
+        self.top = self._clamp(int(round(fraction * self.total)))
+
+    def reveal(self, index: int) -> None:
+        """Scroll as little as possible to bring ``index`` into view."""
+        if index < self.top:
+            self.top = self._clamp(index)
+        elif index >= self.top + self.rows:
+            self.top = self._clamp(index - self.rows + 1)
+
+    def fractions(self) -> Tuple[float, float]:
+        """The visible part as scrollbar ``(first, last)`` fractions."""
+        if self.total <= self.rows:
+            return 0.0, 1.0
+        return self.top / self.total, (self.top + self.rows) / self.total
+
+    def _clamp(self, top: int) -> int:
+        return max(0, min(top, self.total - self.rows))
@@ -0,0 +1,222 @@
+"""Per-device settings remembered between runs.
+
+Profiles are keyed by endpoint ID and kept in one small JSON file. Changes
+are coalesced: the first change arms a timer and everything that arrives
+before it fires goes out in a single write, so dragging the target slider
+costs one write per ``delay`` at most. Each write replaces the file
+atomically, so a crash never leaves a half-written profile behind.
+"""
+
+import json
+import logging
+import os
+import sys
+import tempfile
+import threading
+from dataclasses import asdict, dataclass
+from typing import Any, Dict, List, Optional
+
+from .engine import CONTENTION_STRATEGIES, DEFAULT_TOLERANCE
+from .worker import MIN_INTERVAL_SECONDS, EnforcementSettings, EnforcementWorker
+
+log = logging.getLogger("microphone_guardian")
+
+SAVE_DELAY_SECONDS = 1.0
+FORMAT_VERSION = 1
+
+
+def config_dir() -> str:
+    """``%APPDATA%\\MicrophoneGuardian`` on Windows, the XDG config directory elsewhere."""
+    if sys.platform == "win32" and os.environ.get("APPDATA"):
+        return os.path.join(os.environ["APPDATA"], "MicrophoneGuardian")
+    config = os.environ.get("XDG_CONFIG_HOME") or os.path.join(os.path.expanduser("~"), ".config")
+    return os.path.join(config, "microphone_guardian")
+
+
+def default_path() -> str:
+    return os.path.join(config_dir(), "profiles.json")
+
+
+@dataclass(frozen=True)
+class Profile:
+    """What is remembered for one endpoint."""
+
+    target: float = 1.0
+    tolerance: float = DEFAULT_TOLERANCE
+    interval: float = 5.0
+    instant: bool = True
+    auto_start: bool = False
+    contention: str = "backoff"
+    activity_gated: bool = False
+
+    @classmethod
+    def from_settings(cls, settings: EnforcementSettings, auto_start: bool = False) -> "Profile":
+        return cls(
+            settings.target,
+            settings.tolerance,
+            settings.interval,
+            settings.instant,
+            auto_start,
+            settings.contention,
+            settings.activity_gated,
+        )
+
+    @property
+    def settings(self) -> EnforcementSettings:
+        return EnforcementSettings(
+            self.target, self.tolerance, self.interval, self.instant, self.contention, self.activity_gated
+        )
+
+
+def _parse(raw: Any) -> Optional[Profile]:
+    try:
+        contention = raw.get("contention", "backoff")
+        if contention not in CONTENTION_STRATEGIES:
+            contention = "backoff"
+        return Profile(
+            target=max(0.0, min(1.0, float(raw["target"]))),
+            tolerance=max(0.0, min(0.1, float(raw["tolerance"]))),
+            interval=max(MIN_INTERVAL_SECONDS, float(raw["interval"])),
+            instant=bool(raw.get("instant", True)),
+            auto_start=bool(raw.get("auto_start", False)),
+            contention=contention,
+            activity_gated=bool(raw.get("activity_gated", False)),
+        )
+    except (AttributeError, KeyError, TypeError, ValueError):
+        return None
+
+
+class ProfileStore:
+    """Load, edit and persist device profiles; safe to use from any thread."""
+
+    def __init__(self, path: Optional[str] = None, delay: float = SAVE_DELAY_SECONDS) -> None:
+        self.path = path or default_path()
+        self.delay = delay
+        self.profiles: Dict[str, Profile] = {}
+        self.selected: Optional[str] = None
+        self.writes = 0
+        self._lock = threading.Lock()
+        self._write_lock = threading.Lock()
+        self._timer: Optional[threading.Timer] = None
+        self._dirty = False
+
+    def load(self) -> "ProfileStore":
+        """Read the file; a missing or damaged file just means no profiles yet."""
+        try:
+            with open(self.path, encoding="utf-8") as stream:
+                data = json.load(stream)
+        except FileNotFoundError:
+            return self
+        except (OSError, ValueError) as exc:
+            log.warning("Ignoring unreadable profile file %s: %s", self.path, exc)
+            return self
+        if not isinstance(data, dict):
+            return self
+        devices = data.get("devices")
+        with self._lock:
+            for device_id, raw in (devices.items() if isinstance(devices, dict) else ()):
+                profile = _parse(raw)
+                if profile is not None:
+                    self.profiles[str(device_id)] = profile
+            selected = data.get("selected")
+            self.selected = selected if isinstance(selected, str) else None
+        return self
+
+    def get(self, device_id: str) -> Optional[Profile]:
+        with self._lock:
+            return self.profiles.get(device_id)
+
+    def auto_start(self) -> List[str]:
+        """IDs of the devices that were being guarded when the app last closed."""
+        with self._lock:
+            return [device_id for device_id, profile in self.profiles.items() if profile.auto_start]
+
+    def remember(self, device_id: str, settings: EnforcementSettings, auto_start: Optional[bool] = None) -> None:
+        """Store ``settings`` for ``device_id``; ``auto_start=None`` keeps the current flag."""
+        with self._lock:
+            if auto_start is None:
+                current = self.profiles.get(device_id)
+                auto_start = current.auto_start if current is not None else False
+            profile = Profile.from_settings(settings, auto_start)
+            if self.profiles.get(device_id) == profile:
+                return
+            self.profiles[device_id] = profile
+        self._changed()
+
+    def select(self, device_id: Optional[str]) -> None:
+        with self._lock:
+            if self.selected == device_id:
+                return
+            self.selected = device_id
+        self._changed()
+
+    def _changed(self) -> None:
+        with self._lock:
+            self._dirty = True
+            if self._timer is not None:
+                return
+            self._timer = threading.Timer(self.delay, self.flush)
+            self._timer.daemon = True
+            self._timer.start()
+
+    def flush(self) -> bool:
+        """Write pending changes now; returns ``False`` if the write failed."""
+        with self._write_lock:
+            return self._flush()
+
+    def _flush(self) -> bool:
+        with self._lock:
+            timer, self._timer = self._timer, None
+            if timer is not None and timer is not threading.current_thread():
+                timer.cancel()
+            if not self._dirty:
+                return True
+            data = {
+                "version": FORMAT_VERSION,
+                "selected": self.selected,
+                "devices": {device_id: asdict(profile) for device_id, profile in self.profiles.items()},
+            }
+            self._dirty = False
+        try:
+            self._write(data)
+        except OSError as exc:
+            log.warning("Could not save profiles to %s: %s", self.path, exc)
+            with self._lock:
+                self._dirty = True
+            return False
+        return True
+
+    def close(self) -> None:
+        self.flush()
+
+    def _write(self, data: Dict[str, Any]) -> None:
+        directory = os.path.dirname(os.path.abspath(self.path))
+        os.makedirs(directory, exist_ok=True)
+        handle, temporary = tempfile.mkstemp(prefix=".profiles-", suffix=".tmp", dir=directory)
+        try:
+            with os.fdopen(handle, "w", encoding="utf-8") as stream:
+                json.dump(data, stream, separators=(",", ":"))
+                stream.flush()
+                os.fsync(stream.fileno())
+            os.replace(temporary, self.path)
+        except BaseException:
+            try:
+                os.unlink(temporary)
+            except OSError:
+                pass
+            raise
+        self.writes += 1
+
+
+def restore(store: ProfileStore, worker: EnforcementWorker) -> List[str]:
+    """Ask ``worker`` to resume every auto-start profile; returns the device IDs.
+
+    The worker enumerates before it reads commands, so this can run before
+    any window exists.
+    """
+    device_ids = store.auto_start()
+    for device_id in device_ids:
+        profile = store.get(device_id)
+        if profile is not None:
+            worker.submit("start", (device_id, profile.settings))
+    return device_ids
@@ -0,0 +1,205 @@
+"""Opt-in timing spans with Chrome trace export, and an on-demand stack sampler.
+
+The worker and the window wrap their interesting steps in
+:meth:`Profiler.span`. While profiling is off, ``span`` returns one shared
+do-nothing context manager, and endpoint calls are not wrapped at all.
+While it is on, each span appends one tuple to a bounded ring. Steps covered:
+Tk callbacks, device enumeration, endpoint activation, enforcement checks,
+worker commands, and every endpoint read and write.
+
+:meth:`Profiler.write_chrome_trace` writes the spans in Chrome's trace-event
+JSON format, which https://ui.perfetto.dev and ``chrome://tracing`` open
+directly. :func:`sample_stacks` briefly samples every thread's Python stack
+and :func:`write_folded` saves the result as folded stacks for flame-graph
+tools such as speedscope.
+"""
+
+import collections
+import functools
+import json
+import os
+import sys
+import threading
+import time
+from typing import Any, Callable, Counter, Dict, Optional, Tuple, TypeVar
+
+CAPACITY = 100000
+SAMPLE_INTERVAL_SECONDS = 0.005
+MAX_SAMPLE_SECONDS = 60.0
+
+Method = TypeVar("Method", bound=Callable[..., Any])
+# (name, category, start ns, duration ns, thread ident, device ID)
+SpanRecord = Tuple[str, str, int, int, int, str]
+
+
+class _DisabledSpan:
+    __slots__ = ()
+
+    def __enter__(self) -> None:
+        return None
+
+    def __exit__(self, exc_type: object, exc: object, traceback: object) -> None:
+        return None
+
+
+_DISABLED = _DisabledSpan()
+
+
+class _Span:
+    __slots__ = ("profiler", "name", "category", "device", "start")
+
+    def __init__(self, profiler: "Profiler", name: str, category: str, device: str) -> None:
+        self.profiler = profiler
+        self.name = name
+        self.category = category
+        self.device = device
+
+    def __enter__(self) -> None:
+        self.start = time.perf_counter_ns()
+
+    def __exit__(self, *exc_info: object) -> None:
+        self.profiler.add(self.name, self.category, self.start, time.perf_counter_ns() - self.start, self.device)
+
+
+class ProfiledEndpointVolume:
+    """Proxy around an endpoint volume that times every call as an ``endpoint`` span."""
+
+    def __init__(self, inner: object, profiler: "Profiler", device_id: str) -> None:
+        self.inner = inner
+        self._profiler = profiler
+        self._device_id = device_id
+
+    def __getattr__(self, name: str) -> Any:
+        return getattr(self.inner, name)
+
+    def _timed(self, name: str, call: Callable[..., Any], *args: Any) -> Any:
+        start = time.perf_counter_ns()
+        try:
+            return call(*args)
+        finally:
+            self._profiler.add(name, "endpoint", start, time.perf_counter_ns() - start, self._device_id)
+
+    def GetMasterVolumeLevelScalar(self) -> float:
+        return self._timed("GetMasterVolumeLevelScalar", self.inner.GetMasterVolumeLevelScalar)
+
+    def SetMasterVolumeLevelScalar(self, level: float, event_context: Optional[object]) -> None:
+        self._timed("SetMasterVolumeLevelScalar", self.inner.SetMasterVolumeLevelScalar, level, event_context)
+
+    def GetMute(self) -> int:
+        return self._timed("GetMute", self.inner.GetMute)
+
+    def SetMute(self, muted: int, event_context: Optional[object]) -> None:
+        self._timed("SetMute", self.inner.SetMute, muted, event_context)
+
+
+class Profiler:
+    """Collect spans from any thread while :attr:`enabled`; keeps the last ``capacity``.
+
+    Turn it on and off through the worker's ``profile`` command, which also
+    wraps and unwraps the endpoints of running enforcers.
+    """
+
+    def __init__(self, capacity: int = CAPACITY) -> None:
+        self.enabled = False
+        self.capacity = capacity
+        self._spans: "collections.deque[SpanRecord]" = collections.deque(maxlen=capacity)
+        self._threads: Dict[int, str] = {}
+        self._epoch = time.perf_counter_ns()
+
+    def clear(self) -> None:
+        self._spans.clear()
+        self._epoch = time.perf_counter_ns()
+
+    def __len__(self) -> int:
+        return len(self._spans)
+
+    def span(self, name: str, category: str = "worker", device: str = "") -> Any:
+        """Context manager timing the enclosed block; free while disabled."""
+        if not self.enabled:
+            return _DISABLED
+        return _Span(self, name, category, device)
+
+    def add(self, name: str, category: str, start: int, duration: int, device: str = "") -> None:
+        ident = threading.get_ident()
+        if ident not in self._threads:
+            self._threads[ident] = threading.current_thread().name
+        self._spans.append((name, category, start, duration, ident, device))
+
+    def wrap(self, device_id: str, endpoint_volume: object) -> object:
+        if isinstance(endpoint_volume, ProfiledEndpointVolume):
+            return endpoint_volume
+        return ProfiledEndpointVolume(endpoint_volume, self, device_id)
+
+    def chrome_trace(self) -> Dict[str, Any]:
+        """The collected spans as a Chrome trace-event document."""
+        pid = os.getpid()
+        events: list = [{"name": "process_name", "ph": "M", "pid": pid, "args": {"name": "Microphone Guardian"}}]
+        for ident, thread_name in list(self._threads.items()):
+            events.append({"name": "thread_name", "ph": "M", "pid": pid, "tid": ident, "args": {"name": thread_name}})
+        epoch = self._epoch
+        for name, category, start, duration, ident, device in list(self._spans):
+            event: Dict[str, Any] = {
+                "name": name,
+                "cat": category,
+                "ph": "X",
+                "ts": (start - epoch) / 1000.0,
+                "dur": duration / 1000.0,
+                "pid": pid,
+                "tid": ident,
+            }
+            if device:
+                event["args"] = {"device": device}
+            events.append(event)
+        return {"traceEvents": events, "displayTimeUnit": "ms"}
+
+    def write_chrome_trace(self, path: str) -> int:
+        """Write :meth:`chrome_trace` to ``path``; returns the number of spans."""
+        document = self.chrome_trace()
+        with open(path, "w", encoding="utf-8") as stream:
+            json.dump(document, stream, separators=(",", ":"))
+        return sum(event["ph"] == "X" for event in document["traceEvents"])
+
+
+def traced(name: str) -> Callable[[Method], Method]:
+    """Decorate a method of an object with a ``profiler`` attribute to run it in a ``tk`` span."""
+
+    def decorate(method: Method) -> Method:
+        @functools.wraps(method)
+        def wrapper(self: Any, *args: Any, **kwargs: Any) -> Any:
+            with self.profiler.span(name, "tk"):
+                return method(self, *args, **kwargs)
+
+        return wrapper  # type: ignore[return-value]
+
+    return decorate
+
+
+def sample_stacks(seconds: float, interval: float = SAMPLE_INTERVAL_SECONDS) -> Counter[str]:
+    """Sample every other thread's Python stack for ``seconds``; returns folded stacks and their counts."""
+    names = {thread.ident: thread.name for thread in threading.enumerate()}
+    own = threading.get_ident()
+    stacks: Counter[str] = collections.Counter()
+    ends_at = time.monotonic() + min(seconds, MAX_SAMPLE_SECONDS)
+    while time.monotonic() < ends_at:
+        for ident, frame in sys._current_frames().items():
+            if ident == own:
+                continue
+            calls = []
+            while frame is not None:
+                code = frame.f_code
+                calls.append(f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})")
+                frame = frame.f_back
+            if ident not in names:
+                names.update((thread.ident, thread.name) for thread in threading.enumerate())
+            calls.append(names.get(ident, str(ident)))
+            stacks[";".join(reversed(calls))] += 1
+        time.sleep(interval)
+    return stacks
+
+
+def write_folded(stacks: Counter[str], path: str) -> int:
+    """Write ``stack count`` lines, most frequent first; returns the number of samples."""
+    with open(path, "w", encoding="utf-8") as stream:
+        for stack, count in stacks.most_common():
+            stream.write(f"{stack} {count}\n")
+    return sum(stacks.values())
@@ -0,0 +1,322 @@
+"""Long-lived, notification-driven cache of audio endpoints.
+
+The registry enumerates once, opens each endpoint at most once and then keeps
+itself current from device added/removed/state-changed notifications. When
+the source cannot deliver notifications it falls back to re-enumerating on
+every listing, which is what the app used to do on each refresh.
+
+Notifications arrive on the audio service's callback thread, which must not
+block. With a ``defer`` hook the callbacks only queue the change and ask the
+owning thread to run :meth:`DeviceRegistry.apply_changes`; the endpoint
+calls and the cache updates happen there.
+
+Devices are keyed by endpoint ID, which survives reconnects and driver
+updates. Friendly names are only a secondary index for display and search:
+two identical USB microphones share a name but never an ID.
+"""
+
+import collections
+import threading
+from dataclasses import dataclass
+from typing import Callable, Deque, Dict, Iterable, List, Optional, Protocol, Tuple
+
+from .engine import Unregister
+
+DEVICE_STATE_ACTIVE = 0x1
+DEVICE_STATE_DISABLED = 0x2
+DEVICE_STATE_NOTPRESENT = 0x4
+DEVICE_STATE_UNPLUGGED = 0x8
+DEVICE_STATE_INACTIVE = DEVICE_STATE_DISABLED | DEVICE_STATE_NOTPRESENT | DEVICE_STATE_UNPLUGGED
+
+
+class DeviceEventListener(Protocol):
+    """Receiver for endpoint hot-plug notifications."""
+
+    def on_device_added(self, device_id: str) -> None: ...
+
+    def on_device_removed(self, device_id: str) -> None: ...
+
+    def on_device_state_changed(self, device_id: str, new_state: int) -> None: ...
+
+    def on_property_changed(self, device_id: str) -> None: ...
+
+
+class EndpointSource(Protocol):
+    """Where endpoints come from: pycaw on Windows, a fake elsewhere."""
+
+    def enumerate(self, direction: str, state: int) -> List[str]:
+        """Return the IDs of endpoints with the given direction and state mask."""
+
+    def open(self, device_id: str) -> object:
+        """Return a device exposing ``id``, ``FriendlyName``, ``state`` and ``EndpointVolume``."""
+
+    def direction(self, device_id: str) -> str:
+        """Return ``"in"`` or ``"out"`` for an endpoint ID."""
+
+    def subscribe(self, listener: DeviceEventListener) -> Unregister:
+        """Deliver hot-plug notifications to ``listener`` until unregistered."""
+
+
+@dataclass(frozen=True)
+class DeviceInfo:
+    """Cached display properties of an endpoint."""
+
+    id: str
+    name: str
+    state: int
+
+
+def display_names(devices: Iterable[DeviceInfo]) -> Dict[str, str]:
+    """Map device IDs to labels that stay unique when friendly names collide.
+
+    The first device with a name keeps it; later ones get `` #2``, `` #3``…
+    in enumeration order.
+    """
+    seen: Dict[str, int] = {}
+    labels: Dict[str, str] = {}
+    for info in devices:
+        count = seen[info.name] = seen.get(info.name, 0) + 1
+        labels[info.id] = info.name if count == 1 else f"{info.name} #{count}"
+    return labels
+
+
+@dataclass
+class RegistryStats:
+    """Cache effectiveness counters."""
+
+    hits: int = 0
+    misses: int = 0
+    enumerations: int = 0
+    invalidations: int = 0
+
+
+class DeviceRegistry:
+    """Keep endpoint objects and their properties cached by device ID."""
+
+    def __init__(
+        self,
+        source: EndpointSource,
+        direction: str = "in",
+        state: int = DEVICE_STATE_ACTIVE,
+        defer: Optional[Callable[[Callable[[], None]], None]] = None,
+    ) -> None:
+        self.source = source
+        self.direction = direction
+        self.state = state
+        self.stats = RegistryStats()
+        self._lock = threading.RLock()
+        self._devices: Dict[str, object] = {}
+        self._infos: Dict[str, DeviceInfo] = {}
+        self._by_name: Dict[str, List[str]] = {}
+        self._order: List[str] = []
+        self._names: Dict[str, str] = {}
+        self._loaded = False
+        self._unsubscribe: Optional[Unregister] = None
+        self._listeners: List[Callable[[], None]] = []
+        self._defer = defer
+        self._changes: Deque[Tuple[str, str, int]] = collections.deque()
+        self._changes_lock = threading.Lock()
+
+    @property
+    def live(self) -> bool:
+        """Whether hot-plug notifications keep the cache current."""
+        return self._unsubscribe is not None
+
+    def start(self) -> None:
+        if self._unsubscribe is None:
+            try:
+                self._unsubscribe = self.source.subscribe(self)
+            except Exception:  # noqa: BLE001
+                self._unsubscribe = None
+        self.resync()
+
+    def close(self) -> None:
+        unsubscribe, self._unsubscribe = self._unsubscribe, None
+        if unsubscribe is not None:
+            try:
+                unsubscribe()
+            except Exception:  # noqa: BLE001
+                pass
+
+    def add_listener(self, listener: Callable[[], None]) -> None:
+        """Call ``listener()`` (from any thread) whenever the device set changes."""
+        self._listeners.append(listener)
+
+    def resync(self) -> None:
+        """Re-enumerate IDs, reusing every endpoint that is already cached."""
+        with self._lock:
+            self.stats.enumerations += 1
+            ids = self.source.enumerate(self.direction, self.state)
+            for device_id in set(self._devices) - set(ids):
+                self._forget(device_id)
+            self._order = []
+            for device_id in ids:
+                if self._cache(device_id):
+                    self._order.append(device_id)
+            self._loaded = True
+
+    def devices(self) -> List[DeviceInfo]:
+        """Return the cached endpoints in enumeration order."""
+        if not self._loaded or not self.live:
+            self.resync()
+        with self._lock:
+            return [self._infos[device_id] for device_id in self._order]
+
+    def inactive(self, states: int = DEVICE_STATE_INACTIVE) -> List[DeviceInfo]:
+        """Endpoints in ``states`` (disabled, missing or unplugged by default), for display only.
+
+        These are listed on demand rather than kept current: each call
+        enumerates once per state, but an endpoint is only opened the first
+        time it is seen, to read its friendly name. Nothing else is cached.
+        """
+        infos = []
+        for state in (DEVICE_STATE_DISABLED, DEVICE_STATE_NOTPRESENT, DEVICE_STATE_UNPLUGGED):
+            if not states & state:
+                continue
+            for device_id in self.source.enumerate(self.direction, state):
+                with self._lock:
+                    name = self._names.get(device_id)
+                    if name is None:
+                        self.stats.misses += 1
+                        try:
+                            name = str(self.source.open(device_id).FriendlyName)
+                        except Exception:  # noqa: BLE001
+                            continue
+                        self._names[device_id] = name
+                    else:
+                        self.stats.hits += 1
+                infos.append(DeviceInfo(device_id, name, state))
+        return infos
+
+    def get(self, device_id: str) -> Optional[object]:
+        with self._lock:
+            device = self._devices.get(device_id)
+            if device is not None:
+                self.stats.hits += 1
+            return device
+
+    def info(self, device_id: str) -> Optional[DeviceInfo]:
+        with self._lock:
+            return self._infos.get(device_id)
+
+    def find(self, name: str) -> List[DeviceInfo]:
+        """Cached devices whose friendly name is ``name`` (there may be several)."""
+        with self._lock:
+            return [self._infos[device_id] for device_id in self._by_name.get(name, ())]
+
+    def endpoint_volume(self, device_id: str) -> Optional[object]:
+        device = self.get(device_id)
+        return device.EndpointVolume if device is not None else None
+
+    def on_device_added(self, device_id: str) -> None:
+        self._queue("added", device_id)
+
+    def on_device_removed(self, device_id: str) -> None:
+        self._queue("removed", device_id)
+
+    def on_device_state_changed(self, device_id: str, new_state: int) -> None:
+        self._queue("state", device_id, new_state)
+
+    def on_property_changed(self, device_id: str) -> None:
+        self._queue("renamed", device_id)
+
+    def apply_changes(self) -> None:
+        """Apply the queued notifications in order, then tell the listeners once."""
+        changed = False
+        while True:
+            with self._changes_lock:
+                if not self._changes:
+                    break
+                kind, device_id, state = self._changes.popleft()
+            with self._lock:
+                changed |= self._apply(kind, device_id, state)
+        if changed:
+            self._notify()
+
+    def _queue(self, kind: str, device_id: str, state: int = 0) -> None:
+        """Record a notification without touching the endpoint or waiting for ``_lock``."""
+        with self._changes_lock:
+            if kind == "renamed" and (kind, device_id, state) in self._changes:
+                return  # a burst of property changes needs only one look at the name
+            idle = not self._changes
+            self._changes.append((kind, device_id, state))
+        if self._defer is None:
+            self.apply_changes()
+        elif idle:
+            self._defer(self.apply_changes)
+
+    def _apply(self, kind: str, device_id: str, state: int) -> bool:
+        if kind == "removed":
+            self._names.pop(device_id, None)
+            self._forget(device_id)
+            return True
+        if self.source.direction(device_id) != self.direction:
+            return False
+        if kind == "added":
+            if device_id not in self._order and self._cache(device_id):
+                if self._infos[device_id].state & self.state:
+                    self._order.append(device_id)
+                else:
+                    self._forget(device_id)  # arrived disabled or unplugged; a state change brings it in
+            return True
+        self._names.pop(device_id, None)
+        if kind == "state":
+            self._forget(device_id)
+            if state & self.state and self._cache(device_id):
+                self._order.append(device_id)
+            return True
+        return self._rename(device_id)
+
+    def _rename(self, device_id: str) -> bool:
+        """Re-read a cached endpoint's friendly name, keeping the endpoint itself."""
+        old = self._infos.get(device_id)
+        if old is None:
+            return False
+        try:
+            name = str(self.source.open(device_id).FriendlyName)
+        except Exception:  # noqa: BLE001
+            return False
+        if name == old.name:
+            return False
+        same_name = self._by_name.get(old.name, [])
+        if device_id in same_name:
+            same_name.remove(device_id)
+        if not same_name:
+            self._by_name.pop(old.name, None)
+        self._infos[device_id] = DeviceInfo(device_id, name, old.state)
+        self._by_name.setdefault(name, []).append(device_id)
+        return True
+
+    def _cache(self, device_id: str) -> bool:
+        if device_id in self._devices:
+            self.stats.hits += 1
+            return True
+        self.stats.misses += 1
+        try:
+            device = self.source.open(device_id)
+        except Exception:  # noqa: BLE001
+            return False
+        state = getattr(device, "state", self.state)
+        state = int(getattr(state, "value", state))
+        info = DeviceInfo(device_id, str(device.FriendlyName), state)
+        self._devices[device_id] = device
+        self._infos[device_id] = info
+        self._by_name.setdefault(info.name, []).append(device_id)
+        return True
+
+    def _forget(self, device_id: str) -> None:
+        if self._devices.pop(device_id, None) is not None:
+            self.stats.invalidations += 1
+        info = self._infos.pop(device_id, None)
+        if info is not None:
+            same_name = self._by_name.get(info.name, [])
+            if device_id in same_name:
+                same_name.remove(device_id)
+            if not same_name:
+                self._by_name.pop(info.name, None)
+        if device_id in self._order:
+            self._order.remove(device_id)
+
+    def _notify(self) -> None:
+        for listener in list(self._listeners):
+            listener()
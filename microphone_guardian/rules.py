@@ -0,0 +1,242 @@
+"""Per-application targets chosen by what is capturing, where, and when.
+
+A :class:`Rule` names an application, optionally an endpoint ID and a
+time-of-day window, and says what to do while it matches: hold a target, or
+keep hands off the device. Rules are tried in file order and the first
+match wins; when none match, the device's own settings apply.
+
+:func:`compile_rules` indexes the list once. Exact process names go into a
+hash and wildcard names stay as an ordered list of compiled patterns; both
+are consulted once per new process name. The question the enforcement loop
+asks on every tick - which rule holds for this device, these processes and
+this time - is answered from a memo keyed by device and process set. Each
+entry stays valid until the next window boundary of the rules it was
+chosen from, so a tick costs a dict lookup and a comparison however many
+rules there are.
+"""
+
+import fnmatch
+import json
+import logging
+import os
+import re
+import time
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, FrozenSet, List, Optional, Pattern, Sequence, Tuple
+
+from .profiles import config_dir
+
+log = logging.getLogger("microphone_guardian")
+
+FORMAT_VERSION = 1
+HANDS_OFF = "hands-off"
+DAY_SECONDS = 24 * 3600
+MEMO_SIZE = 4096
+NO_PROCESSES: FrozenSet[str] = frozenset()
+
+_WINDOW = re.compile(r"^\s*(\d{1,2}):(\d{2})\s*-\s*(\d{1,2}):(\d{2})\s*$")
+
+
+def default_path() -> str:
+    return os.path.join(config_dir(), "rules.json")
+
+
+def process_key(name: str) -> str:
+    """Normalise an executable name: case-insensitive, with or without ``.exe``."""
+    name = name.lower()
+    return name[:-4] if name.endswith(".exe") else name
+
+
+@dataclass(frozen=True)
+class Rule:
+    """One line of the rule file.
+
+    ``process`` is an executable name, optionally with ``*`` and ``?``
+    wildcards; empty matches whatever is or is not capturing. ``device`` is
+    an endpoint ID; empty matches every device. ``window`` is a
+    ``(start, end)`` pair of seconds after local midnight and may wrap past
+    midnight. ``target`` is a level between 0 and 1, or ``None`` to leave
+    the device alone.
+    """
+
+    process: str = ""
+    target: Optional[float] = 1.0
+    device: str = ""
+    window: Optional[Tuple[int, int]] = None
+    name: str = ""
+
+    @property
+    def hands_off(self) -> bool:
+        return self.target is None
+
+    def covers(self, seconds: float) -> bool:
+        """Whether ``seconds`` after midnight fall inside the window."""
+        if self.window is None:
+            return True
+        start, end = self.window
+        if start <= end:
+            return start <= seconds < end
+        return seconds >= start or seconds < end
+
+    def describe(self) -> str:
+        label = self.name or self.process or "rule"
+        action = "hands off" if self.target is None else f"{int(round(self.target * 100))}%"
+        return f"{label}: {action}"
+
+
+@dataclass(frozen=True)
+class _Decision:
+    rule: Optional[Rule]
+    valid_from: float
+    valid_until: float
+
+
+def parse_rule(raw: Any) -> Rule:
+    """Build a rule from one JSON object; raises ``ValueError`` when it is malformed."""
+    if not isinstance(raw, dict):
+        raise ValueError("a rule must be an object")
+    target = raw.get("target", 100)
+    if target == HANDS_OFF:
+        level: Optional[float] = None
+    elif isinstance(target, (int, float)) and not isinstance(target, bool) and 0 <= target <= 100:
+        level = target / 100.0
+    else:
+        raise ValueError(f"target must be a percentage or {HANDS_OFF!r}, not {target!r}")
+    window = None
+    between = raw.get("between")
+    if between is not None:
+        match = _WINDOW.match(str(between))
+        if match is None:
+            raise ValueError(f"between must look like '22:00-07:00', not {between!r}")
+        hour, minute, end_hour, end_minute = (int(part) for part in match.groups())
+        if hour > 23 or end_hour > 23 or minute > 59 or end_minute > 59:
+            raise ValueError(f"{between!r} is not a valid time of day")
+        window = (hour * 3600 + minute * 60, end_hour * 3600 + end_minute * 60)
+        if window[0] == window[1]:
+            raise ValueError(f"{between!r} is an empty window")
+    return Rule(
+        process=str(raw.get("process", "")),
+        target=level,
+        device=str(raw.get("device", "")),
+        window=window,
+        name=str(raw.get("name", "")),
+    )
+
+
+def load_rules(path: str) -> List[Rule]:
+    """Read a rule file; raises ``OSError`` or ``ValueError`` naming the bad rule."""
+    with open(path, encoding="utf-8") as stream:
+        data = json.load(stream)
+    rules = data.get("rules") if isinstance(data, dict) else None
+    if not isinstance(rules, list):
+        raise ValueError("expected an object with a 'rules' list")
+    parsed = []
+    for number, raw in enumerate(rules, 1):
+        try:
+            parsed.append(parse_rule(raw))
+        except ValueError as exc:
+            raise ValueError(f"rule {number}: {exc}") from None
+    return parsed
+
+
+class RuleMatcher:
+    """Answer "which rule applies" for a device, its capturing processes and the time of day.
+
+    Only the worker thread may call :meth:`evaluate`; ``clock`` returns wall
+    time in seconds since the epoch.
+    """
+
+    def __init__(self, rules: Sequence[Rule], clock: Callable[[], float] = time.time) -> None:
+        self.rules = tuple(rules)
+        self.clock = clock
+        self.misses = 0
+        self._anywhere: List[int] = []
+        self._exact: Dict[str, List[int]] = {}
+        self._patterns: List[Tuple[Pattern[str], int]] = []
+        for index, rule in enumerate(self.rules):
+            key = process_key(rule.process)
+            if not key:
+                self._anywhere.append(index)
+            elif any(char in key for char in "*?["):
+                self._patterns.append((re.compile(fnmatch.translate(key)), index))
+            else:
+                self._exact.setdefault(key, []).append(index)
+        self._by_process: Dict[str, Tuple[int, ...]] = {}
+        self._memo: Dict[Tuple[str, FrozenSet[str]], _Decision] = {}
+        self._hour_start = 0.0
+        self._hour_end = 0.0
+        self._hour_offset = 0
+
+    def __len__(self) -> int:
+        return len(self.rules)
+
+    def evaluate(self, device_id: str, processes: FrozenSet[str] = NO_PROCESSES) -> Optional[Rule]:
+        """The first rule that matches now, or ``None`` to use the device's own settings."""
+        seconds = self._seconds_of_day(self.clock())
+        key = (device_id, processes)
+        decision = self._memo.get(key)
+        if decision is None or not decision.valid_from <= seconds < decision.valid_until:
+            decision = self._decide(device_id, processes, seconds)
+            if len(self._memo) >= MEMO_SIZE:
+                self._memo.clear()
+            self._memo[key] = decision
+        return decision.rule
+
+    def _seconds_of_day(self, now: float) -> float:
+        # localtime() only runs once an hour; DST changes happen on the hour.
+        if not self._hour_start <= now < self._hour_end:
+            local = time.localtime(now)
+            self._hour_start = now - (now % 1.0) - local.tm_min * 60 - local.tm_sec
+            self._hour_end = self._hour_start + 3600.0
+            self._hour_offset = local.tm_hour * 3600
+        return self._hour_offset + (now - self._hour_start)
+
+    def _decide(self, device_id: str, processes: FrozenSet[str], seconds: float) -> _Decision:
+        self.misses += 1
+        indexes = set(self._anywhere)
+        for process in processes:
+            indexes.update(self._matching(process))
+        valid_from, valid_until = 0.0, float(DAY_SECONDS)
+        for index in sorted(indexes):
+            rule = self.rules[index]
+            if rule.device and rule.device != device_id:
+                continue
+            if rule.window is not None:
+                for boundary in rule.window:
+                    if boundary <= seconds:
+                        valid_from = max(valid_from, boundary)
+                    else:
+                        valid_until = min(valid_until, boundary)
+            if rule.covers(seconds):
+                return _Decision(rule, valid_from, valid_until)
+        return _Decision(None, valid_from, valid_until)
+
+    def _matching(self, process: str) -> Tuple[int, ...]:
+        """Indexes of the rules naming ``process``, exactly or by pattern, in rule order."""
+        found = self._by_process.get(process)
+        if found is None:
+            key = process_key(process)
+            indexes = list(self._exact.get(key, ()))
+            indexes.extend(index for pattern, index in self._patterns if pattern.match(key))
+            found = self._by_process[process] = tuple(sorted(indexes))
+        return found
+
+
+def compile_rules(rules: Sequence[Rule], clock: Callable[[], float] = time.time) -> Optional[RuleMatcher]:
+    """Index ``rules`` for the worker; ``None`` when there are none, so ticks skip rule checks."""
+    return RuleMatcher(rules, clock) if rules else None
+
+
+def load(path: Optional[str] = None) -> Optional[RuleMatcher]:
+    """Compile the rule file at ``path`` (default: ``rules.json`` in the config folder).
+
+    A missing default file means no rules. A file given explicitly must
+    exist and be valid; errors propagate as ``OSError`` or ``ValueError``.
+    """
+    if path is None:
+        path = default_path()
+        if not os.path.exists(path):
+            return None
+    rules = compile_rules(load_rules(path))
+    log.info("Loaded %d rules from %s.", len(rules) if rules is not None else 0, path)
+    return rules
@@ -0,0 +1,77 @@
+"""Single priority-queue timer shared by every enforced endpoint."""
+
+import heapq
+import itertools
+from typing import Dict, Hashable, List, Optional, Tuple
+
+DEFAULT_SLACK = 0.010
+
+
+def advance(deadline: float, interval: float, now: float) -> Tuple[float, int]:
+    """Return the next slot on the ``deadline + k * interval`` grid after ``now``.
+
+    Deadlines stay anchored to the grid, so time spent doing the work does
+    not accumulate as drift. Slots that have already passed are skipped,
+    not queued; the second value says how many were skipped.
+    """
+    following = deadline + interval
+    if following > now:
+        return following, 0
+    missed = int((now - deadline) // interval)
+    return deadline + (missed + 1) * interval, missed
+
+
+class DeadlineScheduler:
+    """Min-heap of per-key deadlines with lazy cancellation.
+
+    ``pop_due`` hands back every key due within ``slack`` of ``now``, so
+    endpoints whose deadlines line up share one wakeup instead of each
+    arming its own timer.
+    """
+
+    def __init__(self, slack: float = DEFAULT_SLACK) -> None:
+        self.slack = slack
+        self._heap: List[Tuple[float, int, Hashable]] = []
+        self._live: Dict[Hashable, Tuple[float, int]] = {}
+        self._counter = itertools.count()
+
+    def __len__(self) -> int:
+        return len(self._live)
+
+    def __contains__(self, key: Hashable) -> bool:
+        return key in self._live
+
+    def schedule(self, key: Hashable, deadline: float) -> None:
+        """Set (or move) the deadline for ``key``."""
+        sequence = next(self._counter)
+        self._live[key] = (deadline, sequence)
+        heapq.heappush(self._heap, (deadline, sequence, key))
+
+    def cancel(self, key: Hashable) -> None:
+        self._live.pop(key, None)
+
+    def deadline(self, key: Hashable) -> Optional[float]:
+        entry = self._live.get(key)
+        return entry[0] if entry is not None else None
+
+    def next_deadline(self) -> Optional[float]:
+        self._discard_stale()
+        return self._heap[0][0] if self._heap else None
+
+    def pop_due(self, now: float) -> List[Tuple[Hashable, float]]:
+        """Remove and return ``(key, deadline)`` for everything due at ``now`` (plus slack), earliest first."""
+        due: List[Tuple[Hashable, float]] = []
+        horizon = now + self.slack
+        heap = self._heap
+        live = self._live
+        while heap and heap[0][0] <= horizon:
+            deadline, sequence, key = heapq.heappop(heap)
+            if live.get(key) == (deadline, sequence):
+                del live[key]
+                due.append((key, deadline))
+        return due
+
+    def _discard_stale(self) -> None:
+        heap = self._heap
+        while heap and self._live.get(heap[0][2]) != heap[0][:2]:
+            heapq.heappop(heap)
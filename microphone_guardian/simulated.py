@@ -0,0 +1,377 @@
+"""In-process stand-ins for Windows audio endpoints.
+
+These fakes mirror the handful of ``IAudioEndpointVolume`` methods the engine
+uses, so enforcement can be exercised on any platform. Latency, failures and
+drift are all injectable; given a seed and a fake clock, every run is the
+same.
+"""
+
+import math
+import random
+import threading
+import time
+from typing import Callable, Dict, FrozenSet, List, Optional, Tuple
+
+from .engine import ActivityCallback, SessionsCallback, Unregister, VolumeCallback
+from .registry import DEVICE_STATE_ACTIVE, DEVICE_STATE_DISABLED, DEVICE_STATE_UNPLUGGED, DeviceEventListener
+from .worker import Backend
+
+DRIFT_PATTERNS = ("step", "random", "ramp")
+
+
+class FakeClock:
+    """A clock that reads ``now`` and only moves when ``now`` is set."""
+
+    def __init__(self, now: float = 0.0) -> None:
+        self.now = now
+
+    def __call__(self) -> float:
+        return self.now
+
+
+class FakeEndpointVolume:
+    """Endpoint volume that fires registered callbacks on every change, like WASAPI does.
+
+    Each call sleeps for ``latency`` seconds and fails with :class:`OSError`
+    with probability ``failure_rate``; :meth:`fail_next` forces failures.
+    """
+
+    def __init__(
+        self,
+        level: float = 1.0,
+        muted: bool = False,
+        latency: float = 0.0,
+        failure_rate: float = 0.0,
+        seed: Optional[int] = None,
+    ) -> None:
+        self.level = level
+        self.muted = muted
+        self.latency = latency
+        self.failure_rate = failure_rate
+        self.random = random.Random(seed)
+        self.reads = 0
+        self.writes = 0
+        self.mute_reads = 0
+        self.mute_writes = 0
+        self.failures = 0
+        self._forced_failures = 0
+        self._callbacks: List[VolumeCallback] = []
+        self._lock = threading.Lock()
+
+    def GetMasterVolumeLevelScalar(self) -> float:
+        self._wait()
+        self.reads += 1
+        return self.level
+
+    def SetMasterVolumeLevelScalar(self, level: float, event_context: Optional[object]) -> None:
+        self._wait()
+        self.writes += 1
+        self._change(level, self.muted)
+
+    def GetMute(self) -> int:
+        self._wait()
+        self.mute_reads += 1
+        return int(self.muted)
+
+    def SetMute(self, muted: int, event_context: Optional[object]) -> None:
+        self._wait()
+        self.mute_writes += 1
+        self._change(self.level, bool(muted))
+
+    def fail_next(self, count: int = 1) -> None:
+        """Make the next ``count`` calls fail."""
+        self._forced_failures += count
+
+    def _wait(self) -> None:
+        if self.latency:
+            time.sleep(self.latency)
+        if self._forced_failures or (self.failure_rate and self.random.random() < self.failure_rate):
+            self._forced_failures = max(0, self._forced_failures - 1)
+            self.failures += 1
+            raise OSError("simulated endpoint failure")
+
+    def drift(self, level: float, muted: Optional[bool] = None) -> None:
+        """Simulate another application moving the level, and the mute state if given."""
+        self._change(level, self.muted if muted is None else muted)
+
+    def _change(self, level: float, muted: bool) -> None:
+        with self._lock:
+            self.level = max(0.0, min(1.0, level))
+            self.muted = muted
+            callbacks = list(self._callbacks)
+        for callback in callbacks:
+            callback(self.level, self.muted)
+
+
+class AdversarialEndpointVolume(FakeEndpointVolume):
+    """Endpoint that another application keeps pulling back to ``pull_to``.
+
+    Models a conferencing app's "automatically adjust microphone" feature:
+    at most ``rate`` times per second, if the level is anywhere else, the
+    adversary moves it to ``pull_to``. The pull is applied lazily on the next
+    read, so ``clock`` can be a fake one.
+    """
+
+    def __init__(
+        self,
+        clock: Callable[[], float] = time.monotonic,
+        rate: float = 1.0,
+        pull_to: float = 0.7,
+        level: float = 1.0,
+        latency: float = 0.0,
+    ) -> None:
+        super().__init__(level, latency=latency)
+        self.clock = clock
+        self.rate = rate
+        self.pull_to = pull_to
+        self.pulls = 0
+        self._last_pull = float("-inf")
+
+    def GetMasterVolumeLevelScalar(self) -> float:
+        self.interfere()
+        return super().GetMasterVolumeLevelScalar()
+
+    def interfere(self) -> None:
+        """Pull the level if the adversary is due to act."""
+        now = self.clock()
+        if self.rate <= 0 or abs(self.level - self.pull_to) < 1e-6 or now - self._last_pull < 1.0 / self.rate:
+            return
+        self._last_pull = now
+        self.pulls += 1
+        self.drift(self.pull_to)
+
+
+class FakeVolumeNotifications:
+    """Notification source that hooks straight into a :class:`FakeEndpointVolume`."""
+
+    def register(self, endpoint_volume: FakeEndpointVolume, callback: VolumeCallback) -> Unregister:
+        with endpoint_volume._lock:
+            endpoint_volume._callbacks.append(callback)
+
+        def unregister() -> None:
+            with endpoint_volume._lock:
+                if callback in endpoint_volume._callbacks:
+                    endpoint_volume._callbacks.remove(callback)
+
+        return unregister
+
+
+class FakeCaptureActivity:
+    """Capture-session source whose sessions are started and stopped by hand."""
+
+    def __init__(self, active: bool = False) -> None:
+        self.default = active
+        self.active: Dict[str, bool] = {}
+        self._callbacks: Dict[str, List[ActivityCallback]] = {}
+
+    def watch(self, device: "FakeDevice", callback: ActivityCallback) -> Unregister:
+        callbacks = self._callbacks.setdefault(device.id, [])
+        callbacks.append(callback)
+        callback(self.active.get(device.id, self.default))
+        return lambda: callbacks.remove(callback)
+
+    def set_active(self, device_id: str, active: bool) -> None:
+        """Start (``True``) or end (``False``) capturing on ``device_id``."""
+        if self.active.get(device_id, self.default) == active:
+            return
+        self.active[device_id] = active
+        for callback in list(self._callbacks.get(device_id, ())):
+            callback(active)
+
+
+class FakeCaptureSessions:
+    """Session source whose capturing applications are started and stopped by hand."""
+
+    def __init__(self) -> None:
+        self.processes: Dict[str, FrozenSet[str]] = {}
+        self._callbacks: Dict[str, List[SessionsCallback]] = {}
+
+    def watch(self, device: "FakeDevice", callback: SessionsCallback) -> Unregister:
+        callbacks = self._callbacks.setdefault(device.id, [])
+        callbacks.append(callback)
+        callback(self.processes.get(device.id, frozenset()))
+        return lambda: callbacks.remove(callback)
+
+    def start(self, device_id: str, process: str) -> None:
+        """``process`` opens a capture session on ``device_id``."""
+        self.set(device_id, self.processes.get(device_id, frozenset()) | {process})
+
+    def stop(self, device_id: str, process: str) -> None:
+        """``process`` closes its capture session on ``device_id``."""
+        self.set(device_id, self.processes.get(device_id, frozenset()) - {process})
+
+    def set(self, device_id: str, processes: FrozenSet[str]) -> None:
+        if self.processes.get(device_id, frozenset()) == processes:
+            return
+        self.processes[device_id] = processes
+        for callback in list(self._callbacks.get(device_id, ())):
+            callback(processes)
+
+
+class SyntheticPeakMeter:
+    """Peak meter source that plays a synthetic signal instead of a microphone.
+
+    ``signal`` is ``"sine"`` (a tone's peak envelope), ``"noise"`` (speech-like
+    random peaks), ``"clipping"`` (a tone driven past full scale) or
+    ``"silence"``.
+    """
+
+    SIGNALS = ("sine", "noise", "clipping", "silence")
+
+    def __init__(
+        self,
+        signal: str = "noise",
+        amplitude: float = 0.5,
+        frequency: float = 0.5,
+        clock: Callable[[], float] = time.monotonic,
+        seed: Optional[int] = None,
+    ) -> None:
+        if signal not in self.SIGNALS:
+            raise ValueError(f"unknown signal {signal!r}")
+        self.signal = signal
+        self.amplitude = amplitude
+        self.frequency = frequency
+        self.clock = clock
+        self.random = random.Random(seed)
+        self.opens = 0
+
+    def open(self, device: object) -> Callable[[], float]:
+        self.opens += 1
+        return self.read
+
+    def read(self) -> float:
+        if self.signal == "silence":
+            return 0.0
+        if self.signal == "noise":
+            return min(1.0, abs(self.random.gauss(0.0, self.amplitude / 2)))
+        gain = 1.5 if self.signal == "clipping" else 1.0
+        return min(1.0, gain * self.amplitude * abs(math.sin(2 * math.pi * self.frequency * self.clock())))
+
+
+class FakeDevice:
+    """Endpoint with the attributes pycaw's ``AudioDevice`` exposes."""
+
+    def __init__(self, device_id: str, name: str, direction: str = "in", state: int = DEVICE_STATE_ACTIVE) -> None:
+        self.id = device_id
+        self.FriendlyName = name
+        self.direction = direction
+        self.state = state
+        self.EndpointVolume = FakeEndpointVolume()
+
+
+class FakeEndpointSource:
+    """Endpoint source backed by a dict; hot-plug helpers fire registry notifications."""
+
+    def __init__(self, devices: Optional[List[FakeDevice]] = None, latency: float = 0.0) -> None:
+        self.devices: Dict[str, FakeDevice] = {device.id: device for device in devices or []}
+        self.latency = latency
+        self.enumerations = 0
+        self.opens = 0
+        self._listeners: List[DeviceEventListener] = []
+
+    def enumerate(self, direction: str, state: int) -> List[str]:
+        self.enumerations += 1
+        if self.latency:
+            time.sleep(self.latency)
+        return [
+            device.id
+            for device in self.devices.values()
+            if device.direction == direction and device.state & state
+        ]
+
+    def open(self, device_id: str) -> FakeDevice:
+        self.opens += 1
+        if self.latency:
+            time.sleep(self.latency)
+        return self.devices[device_id]
+
+    def direction(self, device_id: str) -> str:
+        return self.devices[device_id].direction if device_id in self.devices else ""
+
+    def subscribe(self, listener: DeviceEventListener) -> Unregister:
+        self._listeners.append(listener)
+        return lambda: self._listeners.remove(listener)
+
+    def plug(self, device: FakeDevice) -> None:
+        self.devices[device.id] = device
+        for listener in list(self._listeners):
+            listener.on_device_added(device.id)
+
+    def unplug(self, device_id: str) -> None:
+        for listener in list(self._listeners):
+            listener.on_device_removed(device_id)
+        self.devices.pop(device_id, None)
+
+    def set_state(self, device_id: str, state: int) -> None:
+        self.devices[device_id].state = state
+        for listener in list(self._listeners):
+            listener.on_device_state_changed(device_id, state)
+
+    def rename(self, device_id: str, name: str) -> None:
+        self.devices[device_id].FriendlyName = name
+        for listener in list(self._listeners):
+            listener.on_property_changed(device_id)
+
+
+def demo_source(
+    count: int = 4, latency: float = 0.0, failure_rate: float = 0.0, seed: Optional[int] = None, inactive: int = 0
+) -> FakeEndpointSource:
+    """Return a source with ``count`` active capture endpoints, named like real ones.
+
+    ``inactive`` more endpoints follow them, alternately unplugged and disabled.
+    """
+    devices = [
+        FakeDevice(f"{{0.0.1.00000000}}.{{{index:08x}-0000-0000-0000-000000000000}}", f"Microphone ({index + 1})")
+        for index in range(count)
+    ]
+    for index, device in enumerate(devices):
+        device.EndpointVolume = FakeEndpointVolume(
+            latency=latency, failure_rate=failure_rate, seed=None if seed is None else seed + index
+        )
+    for index in range(count, count + inactive):
+        state = DEVICE_STATE_UNPLUGGED if (index - count) % 2 == 0 else DEVICE_STATE_DISABLED
+        device_id = f"{{0.0.1.00000000}}.{{{index:08x}-0000-0000-0000-000000000000}}"
+        devices.append(FakeDevice(device_id, f"Headset Microphone ({index + 1})", state=state))
+    return FakeEndpointSource(devices, latency=latency)
+
+
+def simulated_backend(count: int = 4, latency: float = 0.0, seed: Optional[int] = None, inactive: int = 0) -> Backend:
+    """A complete in-memory audio stack: endpoints, notifications, sessions and meters."""
+    return Backend(
+        demo_source(count, latency, seed=seed, inactive=inactive),
+        FakeVolumeNotifications(),
+        activity=FakeCaptureActivity(active=True),
+        meter=SyntheticPeakMeter(seed=seed),
+        sessions=FakeCaptureSessions(),
+    )
+
+
+def drift_schedule(
+    pattern: str,
+    duration: float,
+    period: float = 10.0,
+    low: float = 0.3,
+    seed: Optional[int] = None,
+) -> List[Tuple[float, float]]:
+    """``(time, level)`` moves another application makes over ``duration`` seconds.
+
+    ``"step"`` drops the level to ``low`` once every ``period``. ``"random"``
+    moves it to a random level at random times, ``period`` apart on
+    average. ``"ramp"`` lowers it in five 0.1 s steps down to ``low`` every
+    ``period``, like automatic gain control.
+    """
+    if pattern not in DRIFT_PATTERNS:
+        raise ValueError(f"unknown drift pattern {pattern!r}")
+    rng = random.Random(seed)
+    moves: List[Tuple[float, float]] = []
+    now = 0.0
+    while True:
+        now += rng.expovariate(1.0 / period) if pattern == "random" else period
+        if now >= duration:
+            return moves
+        if pattern == "step":
+            moves.append((now, low))
+        elif pattern == "random":
+            moves.append((now, rng.uniform(0.0, 0.95)))
+        else:
+            moves.extend((now + 0.1 * step, 1.0 - (1.0 - low) * step / 5) for step in range(1, 6))
@@ -0,0 +1,412 @@
+"""Compact binary traces of what the worker saw and did, and their replay.
+
+A :class:`TraceRecorder` attached to the worker logs the worker's inputs:
+commands, devices appearing and disappearing, capture sessions starting and
+ending, and volume notifications. It also logs every endpoint read, write and
+failure, each stamped with the worker's monotonic clock. Records are
+fixed-size (15 bytes) apart from device definitions and commands.
+
+:func:`replay` rebuilds the outside world from a trace. It plugs devices in
+and out, and it repeats other applications' level changes, inferred from the
+reads and notifications that did not match the worker's own writes. It then
+runs the current worker code against that world on a virtual clock, as fast
+as the CPU allows. The recorded actions stay in the trace for comparison.
+"""
+
+import dataclasses
+import json
+import struct
+import time
+from dataclasses import dataclass
+from typing import Any, BinaryIO, Callable, Dict, Iterator, List, Optional, Set, Tuple
+
+from .engine import EnforcementEvent
+from .worker import EnforcementSettings, EnforcementWorker, WorkerCommand
+
+MAGIC = b"MGTRACE\x01"
+KINDS = (
+    "device",
+    "command",
+    "present",
+    "absent",
+    "activity",
+    "notify",
+    "notify-muted",
+    "read",
+    "read-mute",
+    "write",
+    "write-mute",
+    "failure",
+)
+RECORDED_COMMANDS = ("start", "stop", "configure", "set-target", "pause", "resume")
+NO_DEVICE = 0xFFFF
+BUFFER_BYTES = 64 * 1024
+LEVEL_EPSILON = 1e-4
+
+_RECORD = struct.Struct("<dBHf")
+_LENGTH = struct.Struct("<H")
+_CODES = {kind: code for code, kind in enumerate(KINDS)}
+_WITH_PAYLOAD = (_CODES["device"], _CODES["command"])
+
+
+@dataclass(frozen=True)
+class TraceRecord:
+    """One decoded record; ``payload`` is only set for ``command`` records."""
+
+    time: float
+    kind: str
+    device_id: str = ""
+    value: float = 0.0
+    payload: Any = None
+
+
+class RecordingEndpointVolume:
+    """Proxy around an endpoint volume that logs every call the engine makes."""
+
+    def __init__(self, inner: object, recorder: "TraceRecorder", device_id: str) -> None:
+        self._inner = inner
+        self._recorder = recorder
+        self._device_id = device_id
+
+    def __getattr__(self, name: str) -> Any:
+        return getattr(self._inner, name)
+
+    def _call(self, kind: str, call: Callable[..., Any], *args: Any) -> Any:
+        try:
+            result = call(*args)
+        except Exception:
+            self._recorder.record("failure", self._device_id)
+            raise
+        value = result if kind.startswith("read") else args[0]
+        self._recorder.record(kind, self._device_id, float(value))
+        return result
+
+    def GetMasterVolumeLevelScalar(self) -> float:
+        return self._call("read", self._inner.GetMasterVolumeLevelScalar)
+
+    def SetMasterVolumeLevelScalar(self, level: float, event_context: Optional[object]) -> None:
+        self._call("write", self._inner.SetMasterVolumeLevelScalar, level, event_context)
+
+    def GetMute(self) -> int:
+        return self._call("read-mute", self._inner.GetMute)
+
+    def SetMute(self, muted: int, event_context: Optional[object]) -> None:
+        self._call("write-mute", self._inner.SetMute, muted, event_context)
+
+
+class TraceRecorder:
+    """Append records to a binary stream; call from the worker thread only.
+
+    Records are buffered and written ``buffer_bytes`` at a time, and on
+    :meth:`flush` and :meth:`close`.
+    """
+
+    def __init__(
+        self, stream: BinaryIO, clock: Callable[[], float] = time.monotonic, buffer_bytes: int = BUFFER_BYTES
+    ) -> None:
+        self.stream = stream
+        self.clock = clock
+        self.buffer_bytes = buffer_bytes
+        self.records = 0
+        self._started = clock()
+        self._indices: Dict[str, int] = {}
+        self._present: Set[str] = set()
+        self._buffer = bytearray(MAGIC)
+
+    @classmethod
+    def open(cls, path: str, clock: Callable[[], float] = time.monotonic) -> "TraceRecorder":
+        return cls(open(path, "wb"), clock)
+
+    def record(self, kind: str, device_id: Optional[str] = None, value: float = 0.0, payload: Any = None) -> None:
+        index = NO_DEVICE if device_id is None else self._index(device_id)
+        self._append(_CODES[kind], index, value, payload)
+
+    def _index(self, device_id: str) -> int:
+        index = self._indices.get(device_id)
+        if index is None:
+            index = self._indices[device_id] = len(self._indices)
+            self._append(_CODES["device"], index, 0.0, device_id)
+        return index
+
+    def _append(self, code: int, index: int, value: float, payload: Any) -> None:
+        self._buffer += _RECORD.pack(self.clock() - self._started, code, index, value)
+        if code in _WITH_PAYLOAD:
+            data = (payload if isinstance(payload, str) else json.dumps(payload, separators=(",", ":"))).encode()
+            self._buffer += _LENGTH.pack(len(data)) + data
+        self.records += 1
+        if len(self._buffer) >= self.buffer_bytes:
+            self.flush()
+
+    def wrap(self, device_id: str, endpoint_volume: object) -> RecordingEndpointVolume:
+        return RecordingEndpointVolume(endpoint_volume, self, device_id)
+
+    def command(self, command: WorkerCommand) -> None:
+        """Log a front-end command the worker is about to apply."""
+        if command.kind not in RECORDED_COMMANDS:
+            return
+        payload: Dict[str, Any] = {"kind": command.kind}
+        device_id = command.payload
+        if command.kind in ("start", "configure"):
+            device_id, settings = command.payload
+            payload["settings"] = dataclasses.asdict(settings)
+        elif command.kind == "set-target":
+            device_id, payload["target"] = command.payload
+        self.record("command", device_id, payload=payload)
+
+    def devices(self, device_ids: List[str]) -> None:
+        """Log which endpoints came and went since the last enumeration."""
+        current = set(device_ids)
+        for device_id in device_ids:
+            if device_id not in self._present:
+                self.record("present", device_id)
+        for device_id in sorted(self._present - current):
+            self.record("absent", device_id)
+        self._present = current
+
+    def activity(self, device_id: str, active: bool) -> None:
+        self.record("activity", device_id, float(active))
+
+    def notification(self, device_id: str, level: float, muted: bool) -> None:
+        self.record("notify-muted" if muted else "notify", device_id, level)
+
+    def flush(self) -> None:
+        if self._buffer:
+            self.stream.write(self._buffer)
+            self._buffer = bytearray()
+        self.stream.flush()
+
+    def close(self) -> None:
+        self.flush()
+        self.stream.close()
+
+
+def read_trace(stream: BinaryIO) -> Iterator[TraceRecord]:
+    """Decode records in order; raises :class:`ValueError` on a damaged trace."""
+    if stream.read(len(MAGIC)) != MAGIC:
+        raise ValueError("not a Microphone Guardian trace")
+    devices: Dict[int, str] = {}
+    while True:
+        head = stream.read(_RECORD.size)
+        if not head:
+            return
+        if len(head) < _RECORD.size:
+            raise ValueError("trace ends in the middle of a record")
+        timestamp, code, index, value = _RECORD.unpack(head)
+        if code >= len(KINDS):
+            raise ValueError(f"unknown record kind {code}")
+        payload = None
+        if code in _WITH_PAYLOAD:
+            (length,) = _LENGTH.unpack(stream.read(_LENGTH.size))
+            data = stream.read(length).decode()
+            if code == _CODES["device"]:
+                devices[index] = data
+                continue
+            payload = json.loads(data)
+        yield TraceRecord(timestamp, KINDS[code], devices.get(index, ""), value, payload)
+
+
+def load(path: str) -> List[TraceRecord]:
+    with open(path, "rb") as stream:
+        return list(read_trace(stream))
+
+
+@dataclass
+class ReplayReport:
+    """What the replayed worker did, next to what the recorded one did."""
+
+    duration: float = 0.0
+    wall_seconds: float = 0.0
+    records: int = 0
+    external_moves: int = 0
+    reads: int = 0
+    writes: int = 0
+    wakeups: int = 0
+    off_target_seconds: float = 0.0
+    recorded_reads: int = 0
+    recorded_writes: int = 0
+
+    @property
+    def speedup(self) -> float:
+        return self.duration / self.wall_seconds if self.wall_seconds > 0 else 0.0
+
+
+# (time, phase, order, kind, device ID, value). Phase 0 comes before the
+# wakeups due at the same instant and phase 1 after them, as when recording.
+Stimulus = Tuple[float, int, int, str, str, Any]
+
+
+def _stimuli(records: List[TraceRecord]) -> Tuple[Dict[str, Tuple[float, bool]], Set[str], List[Stimulus]]:
+    """Split a trace into starting levels, starting devices and timed inputs.
+
+    A read or notification that differs from the last level the worker wrote
+    is taken to be another application moving the level at that moment; one
+    seen by a read, and a failed call, must land before the wakeup that
+    observed it. A device whose endpoint was used before any enumeration
+    mentioned it was there from the start.
+    """
+    initial: Dict[str, Tuple[float, bool]] = {}
+    levels: Dict[str, float] = {}
+    mutes: Dict[str, bool] = {}
+    present_at: Optional[float] = None
+    initially_present: Set[str] = set()
+    enumerated: Set[str] = set()
+    stimuli: List[Stimulus] = []
+
+    def observe(record: TraceRecord, level: Optional[float], muted: Optional[bool]) -> None:
+        device_id = record.device_id
+        phase = 0 if record.kind.startswith("read") else 1
+        start_level, start_muted = initial.get(device_id, (1.0, False))
+        if level is not None:
+            if device_id not in levels:
+                start_level = level
+            elif abs(levels[device_id] - level) > LEVEL_EPSILON:
+                stimuli.append((record.time, phase, len(stimuli), "level", device_id, level))
+            levels[device_id] = level
+        if muted is not None:
+            if device_id not in mutes:
+                start_muted = muted
+            elif mutes[device_id] != muted:
+                stimuli.append((record.time, phase, len(stimuli), "mute", device_id, muted))
+            mutes[device_id] = muted
+        initial[device_id] = (start_level, start_muted)
+
+    for record in records:
+        kind = record.kind
+        if kind in ("present", "absent"):
+            enumerated.add(record.device_id)
+        elif kind != "command" and record.device_id not in enumerated:
+            enumerated.add(record.device_id)
+            initially_present.add(record.device_id)
+        if kind == "present" and (present_at is None or record.time == present_at):
+            present_at = record.time
+            initially_present.add(record.device_id)
+        elif kind in ("present", "absent", "activity", "failure", "command"):
+            value = record.payload if kind == "command" else record.value
+            phase = 0 if kind == "failure" else 1
+            stimuli.append((record.time, phase, len(stimuli), kind, record.device_id, value))
+        elif kind in ("read", "notify", "notify-muted"):
+            observe(record, record.value, True if kind == "notify-muted" else None if kind == "read" else False)
+        elif kind == "read-mute":
+            observe(record, None, bool(record.value))
+        elif kind == "write":
+            levels[record.device_id] = record.value
+        elif kind == "write-mute":
+            mutes[record.device_id] = bool(record.value)
+    for device_id in initially_present:
+        initial.setdefault(device_id, (1.0, False))
+    stimuli.sort()
+    return initial, initially_present, stimuli
+
+
+def replay(
+    records: List[TraceRecord],
+    adjust: Optional[Callable[[EnforcementSettings], EnforcementSettings]] = None,
+    post: Optional[Callable[[EnforcementEvent], None]] = None,
+) -> ReplayReport:
+    """Run the current worker against the world recorded in ``records``.
+
+    ``adjust`` rewrites the settings of every recorded start or configure
+    command, to try other intervals or modes on the same trace.
+    """
+    from .simulated import FakeCaptureActivity, FakeClock, FakeDevice, FakeEndpointSource, FakeVolumeNotifications
+
+    initial, initially_present, stimuli = _stimuli(records)
+    clock = FakeClock()
+    devices: Dict[str, FakeDevice] = {}
+
+    def device(device_id: str) -> FakeDevice:
+        if device_id not in devices:
+            devices[device_id] = FakeDevice(device_id, device_id)
+            level, muted = initial.get(device_id, (1.0, False))
+            devices[device_id].EndpointVolume.level = level
+            devices[device_id].EndpointVolume.muted = muted
+        return devices[device_id]
+
+    source = FakeEndpointSource([device(device_id) for device_id in sorted(initially_present)])
+    activity = FakeCaptureActivity(active=True)
+    worker = EnforcementWorker(
+        source, FakeVolumeNotifications(), post=post, clock=clock, activity=activity, retry_failures=True
+    )  # recordings come from headless runs, which retry failed endpoint calls
+    report = ReplayReport(
+        duration=records[-1].time if records else 0.0,
+        records=len(records),
+        external_moves=sum(stimulus[3] in ("level", "mute") for stimulus in stimuli),
+        recorded_reads=sum(record.kind in ("read", "read-mute") for record in records),
+        recorded_writes=sum(record.kind in ("write", "write-mute") for record in records),
+    )
+    off_since: Dict[str, float] = {}
+
+    def pump() -> None:
+        while not worker.commands.empty():
+            worker.handle(worker.commands.get())
+
+    def track() -> None:
+        now = clock.now
+        for device_id, enforcer in worker.enforcers.items():
+            endpoint = devices[device_id].EndpointVolume
+            off = abs(endpoint.level - enforcer.target) > enforcer.tolerance
+            if off and device_id not in off_since:
+                off_since[device_id] = now
+            elif not off and device_id in off_since:
+                report.off_target_seconds += now - off_since.pop(device_id)
+
+    def apply(kind: str, device_id: str, value: Any) -> None:
+        if kind == "level":
+            device(device_id).EndpointVolume.drift(value)
+        elif kind == "mute":
+            endpoint = device(device_id).EndpointVolume
+            endpoint.drift(endpoint.level, muted=value)
+        elif kind == "present":
+            source.plug(device(device_id))
+        elif kind == "absent":
+            source.unplug(device_id)
+            off_since.pop(device_id, None)
+        elif kind == "activity":
+            activity.set_active(device_id, bool(value))
+        elif kind == "failure":
+            device(device_id).EndpointVolume.fail_next()
+        elif kind == "command":
+            worker.handle(_command(value, device_id or None, adjust))
+
+    began = time.perf_counter()
+    worker.registry.start()
+    worker.handle(WorkerCommand("refresh"))
+    pump()
+    index = 0
+    while True:
+        at, phase = stimuli[index][:2] if index < len(stimuli) else (None, 0)
+        deadline = worker.scheduler.next_deadline()
+        if at is None and (deadline is None or deadline > report.duration):
+            break
+        if at is not None and (deadline is None or at < deadline or (at == deadline and phase == 0)):
+            clock.now = max(clock.now, at)
+            _at, _phase, _order, kind, device_id, value = stimuli[index]
+            index += 1
+            apply(kind, device_id, value)
+        else:
+            clock.now = deadline
+            worker.run_due()
+        pump()
+        track()
+    clock.now = max(clock.now, report.duration)
+    for since in off_since.values():
+        report.off_target_seconds += clock.now - since
+    report.wall_seconds = time.perf_counter() - began
+    report.wakeups = worker.wakeups
+    report.reads = sum(device.EndpointVolume.reads + device.EndpointVolume.mute_reads for device in devices.values())
+    report.writes = sum(device.EndpointVolume.writes + device.EndpointVolume.mute_writes for device in devices.values())
+    return report
+
+
+def _command(
+    payload: Dict[str, Any],
+    device_id: Optional[str],
+    adjust: Optional[Callable[[EnforcementSettings], EnforcementSettings]],
+) -> WorkerCommand:
+    kind = payload["kind"]
+    if kind in ("start", "configure"):
+        settings = EnforcementSettings(**payload["settings"])
+        return WorkerCommand(kind, (device_id, adjust(settings) if adjust else settings))
+    if kind == "set-target":
+        return WorkerCommand(kind, (device_id, payload["target"]))
+    return WorkerCommand(kind, device_id)
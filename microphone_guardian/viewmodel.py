@@ -0,0 +1,188 @@
+"""Tk-free window state that turns worker events into change-only UI updates.
+
+The window feeds every :class:`~microphone_guardian.engine.EnforcementEvent`
+into :meth:`ViewModel.apply` and calls :meth:`ViewModel.flush` once per frame.
+A flush returns only the fields whose value differs from what is already on
+screen, so a device holding steady costs no Tk writes at all.
+"""
+
+import time
+from dataclasses import dataclass, field
+from datetime import datetime
+from typing import Any, Dict, Hashable, Optional, Tuple
+
+from .engine import EnforcementEvent
+from .history import LevelHistory
+from .worker import EnforcementSettings
+
+STATUS = "status"
+LAST_APPLIED = "last_applied"
+NEXT_CHECK = "next_check"
+IO_STATS = "io_stats"
+METER = "meter"
+METER_IDLE = (0, "Input level: —")
+
+_UNSET = object()
+
+
+def row_key(device_id: str) -> Tuple[str, str]:
+    """Field key for a device's row in the guarded-devices table."""
+    return ("row", device_id)
+
+
+@dataclass
+class GuardedDevice:
+    """What the window knows about one device the worker is enforcing."""
+
+    name: str
+    settings: EnforcementSettings
+    status: str = "Starting…"
+    level: str = "info"
+    last_applied: str = "—"
+    next_check: str = "—"
+    io_stats: str = "Reads: 0 · writes: 0 · skipped: 0"
+    history: LevelHistory = field(default_factory=LevelHistory)
+
+    def row(self) -> Tuple[str, str, str, str]:
+        return (self.name, f"{int(round(self.settings.target * 100))}%", self.status, self.last_applied)
+
+
+class ViewModel:
+    """Staged window fields plus the per-device state they are derived from."""
+
+    def __init__(self) -> None:
+        self.guarded: Dict[str, GuardedDevice] = {}
+        self.selected: Optional[str] = None
+        self.writes = 0
+        self.flushes = 0
+        self._shown: Dict[Hashable, Any] = {}
+        self._pending: Dict[Hashable, Any] = {}
+
+    def set(self, key: Hashable, value: Any) -> None:
+        """Stage ``value``; a later flush pushes it only if the screen shows something else."""
+        if self._shown.get(key, _UNSET) == value:
+            self._pending.pop(key, None)
+        else:
+            self._pending[key] = value
+
+    def forget(self, key: Hashable) -> None:
+        """Drop a field whose widget went away, so it is pushed again if it comes back."""
+        self._shown.pop(key, None)
+        self._pending.pop(key, None)
+
+    def flush(self) -> Dict[Hashable, Any]:
+        """Return the changed fields and record them as shown."""
+        pending, self._pending = self._pending, {}
+        self._shown.update(pending)
+        self.writes += len(pending)
+        self.flushes += 1
+        return pending
+
+    def show(self, device_id: str) -> None:
+        """Stage the detail fields for ``device_id``."""
+        guarded = self.guarded[device_id]
+        self.set(LAST_APPLIED, f"Last applied: {guarded.last_applied}")
+        self.set(NEXT_CHECK, f"Next check in: {guarded.next_check}")
+        self.set(IO_STATS, guarded.io_stats)
+        self.set(STATUS, (guarded.status, guarded.level))
+
+    def update_row(self, device_id: str) -> None:
+        self.set(row_key(device_id), self.guarded[device_id].row())
+
+    def apply(self, event: EnforcementEvent, now: Optional[float] = None) -> bool:
+        """Fold a per-device event into the state; returns ``False`` for kinds it does not track."""
+        if event.kind in ("meter", "meter-unavailable"):
+            return self._apply_meter(event)
+        guarded = self.guarded.get(event.device_id)
+        if guarded is None:
+            return False
+        if now is None:
+            now = time.monotonic()
+        if event.kind == "error":
+            guarded.status = event.message
+            guarded.level = "error"
+        elif event.kind == "parked":
+            guarded.status = f"'{guarded.name}' is disconnected; waiting for it to come back."
+            guarded.level = "warning"
+        elif event.kind == "paused":
+            guarded.status = f"Paused by remote control; '{guarded.name}' is left alone until resumed."
+            guarded.level = "info"
+            guarded.next_check = "paused"
+        elif event.kind == "configured":
+            guarded.settings = event.payload
+            guarded.status = f"Target set to {int(round(event.level * 100))}% by remote control."
+            guarded.level = "info"
+        elif event.kind == "activity":
+            if event.payload:
+                guarded.status = f"Capture started on '{guarded.name}'."
+                guarded.level = "success"
+            else:
+                guarded.status = f"No application is recording from '{guarded.name}'; checks paused."
+                guarded.level = "info"
+                guarded.next_check = "paused until capture starts"
+        elif event.kind in ("activity-unavailable", "sessions-unavailable"):
+            guarded.status = event.message
+            guarded.level = "warning"
+        elif event.kind == "rule":
+            rule = event.payload
+            if rule is None:
+                guarded.status = f"No rule applies; holding {int(round(event.level * 100))}% on '{guarded.name}'."
+            elif rule.hands_off:
+                guarded.status = f"Rule '{event.message}': leaving '{guarded.name}' alone."
+                guarded.next_check = "hands off"
+            else:
+                guarded.status = f"Rule '{event.message}' on '{guarded.name}'."
+            guarded.level = "info"
+        elif event.kind == "contention":
+            if event.payload:
+                guarded.status = event.message
+                guarded.level = "warning"
+            else:
+                guarded.status = f"The other application stopped; holding '{guarded.name}' normally again."
+                guarded.level = "success"
+        elif event.kind == "yielded":
+            guarded.history.append(now, event.level, "yielded")
+            guarded.status = f"Leaving {int(round(event.level * 100))}% alone while another application fights back."
+            guarded.level = "warning"
+        elif event.kind == "notifications-unavailable":
+            guarded.status = f"Instant correction unavailable, polling only: {event.message}"
+            guarded.level = "warning"
+        elif event.kind == "stats":
+            stats = event.payload
+            guarded.io_stats = f"Reads: {stats.reads} · writes: {stats.writes} · skipped: {stats.skipped_writes}"
+        elif event.kind == "scheduled":
+            guarded.next_check = f"{event.payload:g} s"
+        elif event.kind == "verified":
+            guarded.history.append(now, event.level, "verified")
+            guarded.status = f"Holding {int(round(event.level * 100))}% on '{guarded.name}'."
+            guarded.level = "success"
+        elif event.kind in ("applied", "corrected"):
+            verb = "Corrected" if event.kind == "corrected" else "Enforcing"
+            observed = event.payload if event.payload is not None else event.level
+            guarded.history.append(now, observed, event.kind)
+            guarded.last_applied = datetime.now().strftime("%H:%M:%S")
+            guarded.status = f"{verb} {int(round(event.level * 100))}% on '{guarded.name}'."
+            guarded.level = "success"
+        else:
+            return False
+        self.update_row(event.device_id)
+        if event.device_id == self.selected:
+            self.show(event.device_id)
+        return True
+
+    def _apply_meter(self, event: EnforcementEvent) -> bool:
+        if event.device_id != self.selected:
+            return False
+        if event.kind == "meter-unavailable":
+            self.set(METER, (0, f"Input level unavailable: {event.message}"))
+            return True
+        stats = event.payload
+        # Whole percents, so a steady signal does not repaint the bar every frame.
+        self.set(
+            METER,
+            (
+                int(round(stats.peak * 100)),
+                f"Input peak {stats.peak:.0%} · RMS {stats.rms:.0%} · clipping {stats.clipping:.0%}",
+            ),
+        )
+        return True
@@ -0,0 +1,727 @@
+"""Dedicated thread that owns every audio-API call.
+
+Front ends submit :class:`WorkerCommand` objects and receive
+:class:`~microphone_guardian.engine.EnforcementEvent` results through a
+callback (usually ``queue.put``). They never touch endpoints themselves, so a
+slow audio service cannot freeze them.
+"""
+
+import concurrent.futures
+import contextlib
+import dataclasses
+import queue
+import threading
+import time
+from dataclasses import dataclass
+from typing import TYPE_CHECKING, Any, Callable, ContextManager, Dict, FrozenSet, List, Optional, Set, Tuple
+
+from .engine import (
+    DEFAULT_TOLERANCE,
+    MAX_BACKOFF_SECONDS,
+    SAFETY_NET_SECONDS,
+    Backoff,
+    CaptureActivitySource,
+    CaptureSessionSource,
+    ContentionGuard,
+    EnforcementEvent,
+    Unregister,
+    VolumeCallback,
+    VolumeEnforcer,
+    VolumeNotificationSource,
+)
+from .profiling import ProfiledEndpointVolume, Profiler
+from .registry import DeviceRegistry, EndpointSource
+from .scheduler import DeadlineScheduler, advance
+
+if TYPE_CHECKING:
+    from .meter import PeakMeterSource, PeakRing
+    from .metrics import Metrics
+    from .rules import Rule, RuleMatcher
+    from .trace import TraceRecorder
+
+
+MIN_INTERVAL_SECONDS = 0.05
+METER_INTERVAL_SECONDS = 0.02
+METER_REPORT_SAMPLES = 5
+METER_WINDOW_SAMPLES = 50
+METER_KEY = "\0meter"  # scheduler key; never a valid endpoint ID
+
+
+@dataclass(frozen=True)
+class EnforcementSettings:
+    """User-facing knobs for one enforced endpoint."""
+
+    target: float = 1.0
+    tolerance: float = DEFAULT_TOLERANCE
+    interval: float = 5.0
+    instant: bool = True
+    contention: str = "backoff"
+    activity_gated: bool = False
+
+
+@dataclass(frozen=True)
+class Backend:
+    """Everything the worker needs from an audio stack.
+
+    :func:`~microphone_guardian.backend.wasapi_backend` builds the Windows
+    one and :func:`~microphone_guardian.simulated.simulated_backend` an
+    in-memory one for benchmarks and development.
+    """
+
+    source: EndpointSource
+    notifications: Optional[VolumeNotificationSource] = None
+    apartment: Callable[[], ContextManager[Any]] = contextlib.nullcontext
+    activity: Optional[CaptureActivitySource] = None
+    meter: Optional["PeakMeterSource"] = None
+    sessions: Optional[CaptureSessionSource] = None
+
+
+@dataclass(frozen=True)
+class WorkerCommand:
+    """Request sent from a front end to the worker thread."""
+
+    kind: str
+    payload: Any = None
+
+
+class QueuedNotifications:
+    """Hop volume notifications from COM callback threads onto the worker queue."""
+
+    def __init__(self, inner: VolumeNotificationSource, post: Callable[[WorkerCommand], None]) -> None:
+        self.inner = inner
+        self.post = post
+
+    def register(self, endpoint_volume: object, callback: VolumeCallback) -> Unregister:
+        def forward(level: float, muted: bool) -> None:
+            self.post(WorkerCommand("volume-changed", (callback, level, muted)))
+
+        return self.inner.register(endpoint_volume, forward)
+
+
+class EnforcementWorker:
+    """Run device enumeration and enforcement on a thread with its own COM apartment.
+
+    Any number of endpoints can be enforced at once, each with its own
+    :class:`EnforcementSettings`. A single :class:`DeadlineScheduler` decides
+    when the thread wakes up next.
+
+    When a guarded endpoint disappears, its settings are parked under its
+    endpoint ID and enforcement resumes as soon as the same ID is active
+    again.
+    Hot-plug notifications reach the worker as ``devices-changed``
+    commands, so the registry opens endpoints on this thread and never on
+    the audio service's callback thread.
+
+    With ``activity_gated`` settings and an ``activity`` source, polling
+    stops while no application is capturing from the endpoint, and the
+    target is applied the moment a capture session starts.
+
+    ``pause`` sets a device's settings aside in the same way until
+    ``resume``, whether or not the device is connected.
+
+    With ``rules``, every check first asks the
+    :class:`~microphone_guardian.rules.RuleMatcher` which rule holds for the
+    device, the applications the ``sessions`` source says are capturing
+    from it, and the time of day. A matching rule overrides the target or,
+    for hands-off rules, suspends reads and writes until it stops matching.
+
+    A ``recorder`` logs the commands, device changes, capture activity and
+    endpoint calls the worker sees, so that :mod:`~microphone_guardian.trace`
+    can replay them later.
+
+    An endpoint call that fails stops the device's enforcer, so the window
+    can report it. With ``retry_failures`` the device is checked again
+    instead, further apart after each failure in a row up to
+    ``MAX_BACKOFF_SECONDS``, and parked if the registry no longer has it.
+    Unattended runs use this to survive audio service restarts.
+
+    ``inactive`` lists disabled and unplugged endpoints in an
+    ``inactive-devices`` event. They are only enumerated when asked for.
+
+    The ``profile`` command turns the :attr:`profiler` on or off and wraps or
+    unwraps the endpoints of running enforcers to match.
+    """
+
+    def __init__(
+        self,
+        source: EndpointSource,
+        notifications: Optional[VolumeNotificationSource] = None,
+        post: Optional[Callable[[EnforcementEvent], None]] = None,
+        apartment: Callable[[], ContextManager[Any]] = contextlib.nullcontext,
+        clock: Callable[[], float] = time.monotonic,
+        direction: str = "in",
+        scheduler: Optional[DeadlineScheduler] = None,
+        metrics: Optional["Metrics"] = None,
+        activity: Optional[CaptureActivitySource] = None,
+        meter: Optional["PeakMeterSource"] = None,
+        recorder: Optional["TraceRecorder"] = None,
+        profiler: Optional[Profiler] = None,
+        sessions: Optional[CaptureSessionSource] = None,
+        rules: Optional["RuleMatcher"] = None,
+        retry_failures: bool = False,
+    ) -> None:
+        self.source = source
+        self.notifications = notifications
+        self.post = post or (lambda event: None)
+        self.apartment = apartment
+        self.clock = clock
+        self.registry = DeviceRegistry(source, direction, defer=lambda apply: self.submit("devices-changed", apply))
+        self.registry.add_listener(lambda: self.submit("refresh"))
+        self.commands: "queue.Queue[WorkerCommand]" = queue.Queue()
+        self.scheduler = scheduler if scheduler is not None else DeadlineScheduler()
+        self.metrics = metrics
+        self.activity = activity
+        self.meter = meter
+        self.recorder = recorder
+        self.profiler = profiler if profiler is not None else Profiler()
+        self.sessions = sessions
+        self.rules = rules
+        self.retry_failures = retry_failures
+        self.meter_ring: Optional["PeakRing"] = None
+        self._meter_device: Optional[str] = None
+        self._meter_read: Optional[Callable[[], float]] = None
+        self._meter_samples = 0
+        self.enforcers: Dict[str, VolumeEnforcer] = {}
+        self.settings: Dict[str, EnforcementSettings] = {}
+        self.parked: Dict[str, EnforcementSettings] = {}
+        self.paused: Dict[str, EnforcementSettings] = {}
+        self.wakeups = 0
+        self.started_at = clock()
+        self.idle: Set[str] = set()
+        self.hands_off: Set[str] = set()
+        self.processes: Dict[str, FrozenSet[str]] = {}
+        self.rule_for: Dict[str, "Rule"] = {}
+        self._failed: Set[str] = set()
+        self._unwatch: Dict[str, Unregister] = {}
+        self._session_watches: Dict[str, Unregister] = {}
+        self._thread = threading.Thread(target=self._run, name="enforcement-worker", daemon=True)
+        if metrics is not None:
+            metrics.watch_wakeups(self.wakeup_stats)
+
+    @classmethod
+    def for_backend(cls, backend: Backend, **options: Any) -> "EnforcementWorker":
+        """Build a worker on ``backend``; ``options`` are the remaining constructor arguments."""
+        return cls(
+            backend.source,
+            backend.notifications,
+            apartment=backend.apartment,
+            activity=backend.activity,
+            meter=backend.meter,
+            sessions=backend.sessions,
+            **options,
+        )
+
+    def start(self) -> None:
+        self._thread.start()
+
+    def submit(self, kind: str, payload: Any = None) -> None:
+        """Queue a command; never blocks."""
+        self.commands.put(WorkerCommand(kind, payload))
+
+    def call(self, function: Callable[[], Any], timeout: Optional[float] = None) -> Any:
+        """Run ``function`` on the worker thread and return its result.
+
+        Raises whatever ``function`` raised, or
+        :class:`concurrent.futures.TimeoutError` if the worker does not get to
+        it within ``timeout`` seconds.
+        """
+        future: "concurrent.futures.Future[Any]" = concurrent.futures.Future()
+        self.submit("call", (function, future))
+        return future.result(timeout)
+
+    def shutdown(self, timeout: Optional[float] = 1.0) -> None:
+        self.submit("shutdown")
+        if self._thread.is_alive() and threading.current_thread() is not self._thread:
+            self._thread.join(timeout)
+
+    def _run(self) -> None:
+        with self.apartment():
+            try:
+                self.registry.start()
+            except Exception as exc:  # noqa: BLE001
+                self.post(EnforcementEvent("error", 0.0, f"Device enumeration failed: {exc}"))
+            else:
+                self._post_devices()
+            while True:
+                timeout = None
+                next_deadline = self.scheduler.next_deadline()
+                if next_deadline is not None:
+                    timeout = max(0.0, next_deadline - self.clock())
+                try:
+                    command: Optional[WorkerCommand] = self.commands.get(timeout=timeout)
+                except queue.Empty:
+                    command = None
+                if command is not None:
+                    if command.kind == "shutdown":
+                        break
+                    with self.profiler.span(command.kind, "command"):
+                        self.handle(command)
+                self.run_due()
+            for device_id in list(self.enforcers):
+                self._stop_enforcer(device_id)
+            self.registry.close()
+
+    def run_due(self) -> int:
+        """Enforce every endpoint whose deadline has passed; returns how many ran.
+
+        Called by the worker thread after each wakeup. Benchmarks and replays
+        call it directly, together with :meth:`handle`, to drive the worker
+        synchronously on a fake clock.
+        """
+        now = self.clock()
+        due = self.scheduler.pop_due(now)
+        if due:
+            self.wakeups += 1
+        for device_id, deadline in due:
+            if device_id == METER_KEY:
+                self._sample_meter(deadline)
+            elif device_id in self.enforcers:
+                self._tick(device_id, deadline)
+        return len(due)
+
+    def wakeup_stats(self) -> Tuple[int, float]:
+        """Enforcement wakeups so far and the seconds they were counted over."""
+        return self.wakeups, self.clock() - self.started_at
+
+    def handle(self, command: WorkerCommand) -> None:
+        """Apply one command on the calling thread."""
+        if self.recorder is not None:
+            self.recorder.command(command)
+        if command.kind == "refresh":
+            self._post_devices()
+        elif command.kind == "devices-changed":
+            command.payload()
+        elif command.kind == "inactive":
+            self._post_inactive()
+        elif command.kind == "start":
+            device_id, settings = command.payload
+            self._start_enforcer(device_id, settings)
+        elif command.kind == "stop":
+            device_ids = list(self.enforcers) if command.payload is None else [command.payload]
+            for device_id in device_ids:
+                self._stop_enforcer(device_id)
+            if command.payload is None:
+                self.parked.clear()
+                self.paused.clear()
+            else:
+                self.parked.pop(command.payload, None)
+                self.paused.pop(command.payload, None)
+        elif command.kind == "pause":
+            device_ids = list(self.enforcers) + list(self.parked) if command.payload is None else [command.payload]
+            for device_id in device_ids:
+                self._pause(device_id)
+        elif command.kind == "resume":
+            device_ids = list(self.paused) if command.payload is None else [command.payload]
+            for device_id in device_ids:
+                if device_id in self.paused:
+                    self._start_enforcer(device_id, self.paused.pop(device_id))
+        elif command.kind == "configure":
+            device_id, settings = command.payload
+            self._configure(device_id, settings)
+        elif command.kind == "set-target":
+            device_id, target = command.payload
+            current = self.settings_for(device_id)
+            if current is not None:
+                self._configure(device_id, dataclasses.replace(current, target=target))
+        elif command.kind == "meter":
+            self._watch_meter(command.payload)
+        elif command.kind == "profile":
+            self._set_profiling(bool(command.payload))
+        elif command.kind == "call":
+            function, future = command.payload
+            if future.set_running_or_notify_cancel():
+                try:
+                    future.set_result(function())
+                except Exception as exc:  # noqa: BLE001
+                    future.set_exception(exc)
+        elif command.kind == "activity":
+            device_id, active = command.payload
+            if self.recorder is not None:
+                self.recorder.activity(device_id, active)
+            self._set_activity(device_id, active)
+        elif command.kind == "sessions":
+            device_id, processes = command.payload
+            if device_id in self.enforcers:
+                self.processes[device_id] = processes
+                self._follow_rules(device_id)
+        elif command.kind == "volume-changed":
+            callback, level, muted = command.payload
+            enforcer = getattr(callback, "__self__", None)
+            if enforcer is not None and self.enforcers.get(enforcer.device_id) is enforcer:
+                if self.recorder is not None:
+                    self.recorder.notification(enforcer.device_id, level, muted)
+                if enforcer.device_id not in self.hands_off:
+                    callback(level, muted)
+                    self._after_enforcement(enforcer.device_id)
+
+    def settings_for(self, device_id: str) -> Optional[EnforcementSettings]:
+        """Settings of a guarded, disconnected or paused device; worker thread only."""
+        return self.settings.get(device_id) or self.parked.get(device_id) or self.paused.get(device_id)
+
+    def _post_devices(self) -> None:
+        try:
+            with self.profiler.span("enumerate"):
+                devices = self.registry.devices()
+        except Exception as exc:  # noqa: BLE001
+            self.post(EnforcementEvent("error", 0.0, f"Device enumeration failed: {exc}"))
+            return
+        self.post(EnforcementEvent("devices", 0.0, payload=devices))
+        if self.recorder is not None:
+            self.recorder.devices([device.id for device in devices])
+        for device_id in list(self.enforcers):
+            if self.registry.get(device_id) is None:
+                self._stop_enforcer(device_id, park=True)
+        for device_id in list(self.parked):
+            if self.registry.get(device_id) is not None:
+                self._start_enforcer(device_id, self.parked.pop(device_id))
+
+    def _post_inactive(self) -> None:
+        try:
+            with self.profiler.span("enumerate-inactive"):
+                devices = self.registry.inactive()
+        except Exception as exc:  # noqa: BLE001
+            self.post(EnforcementEvent("error", 0.0, f"Listing disconnected devices failed: {exc}"))
+            return
+        self.post(EnforcementEvent("inactive-devices", 0.0, payload=devices))
+
+    def _start_enforcer(self, device_id: str, settings: EnforcementSettings) -> None:
+        self._stop_enforcer(device_id)
+        self.paused.pop(device_id, None)
+        with self.profiler.span("activate", device=device_id):
+            endpoint_volume = self.registry.endpoint_volume(device_id)
+        if endpoint_volume is None:
+            self.parked[device_id] = settings
+            self.post(EnforcementEvent("parked", settings.target, device_id=device_id))
+            return
+        if self.metrics is not None:
+            endpoint_volume = self.metrics.wrap(device_id, endpoint_volume)
+        if self.recorder is not None:
+            endpoint_volume = self.recorder.wrap(device_id, endpoint_volume)
+        if self.profiler.enabled:
+            endpoint_volume = self.profiler.wrap(device_id, endpoint_volume)
+        self.settings[device_id] = settings
+        self._failed.discard(device_id)
+        enforcer = VolumeEnforcer(
+            endpoint_volume,
+            settings.target,
+            notifications=self._volume_notifications(settings),
+            listener=self._on_event,
+            tolerance=settings.tolerance,
+            backoff=Backoff(settings.interval, MAX_BACKOFF_SECONDS),
+            device_id=device_id,
+            contention=_contention_guard(settings.contention),
+            clock=self.clock,
+        )
+        self.enforcers[device_id] = enforcer
+        if self.metrics is not None:
+            self.metrics.track(device_id, enforcer.stats)
+        if self.rules is not None:
+            self._watch_sessions(device_id)
+            self._apply_rules(device_id)
+        enforcer.start(enforce=device_id not in self.hands_off)
+        self._after_enforcement(device_id)
+        self._schedule(device_id)
+        if settings.activity_gated:
+            self._watch_activity(device_id)
+
+    def _volume_notifications(self, settings: EnforcementSettings) -> Optional[QueuedNotifications]:
+        if settings.instant and self.notifications is not None:
+            return QueuedNotifications(self.notifications, self.commands.put)
+        return None
+
+    def _stop_enforcer(self, device_id: str, park: bool = False, pause: bool = False) -> None:
+        """Stop enforcing; with ``park`` the settings are kept until the device returns.
+
+        With ``pause`` they are kept until a ``resume`` command instead.
+        """
+        enforcer = self.enforcers.pop(device_id, None)
+        self.scheduler.cancel(device_id)
+        self._unwatch_activity(device_id)
+        self._unwatch_sessions(device_id)
+        self.idle.discard(device_id)
+        self.hands_off.discard(device_id)
+        self.processes.pop(device_id, None)
+        self.rule_for.pop(device_id, None)
+        if enforcer is None:
+            return
+        enforcer.stop()
+        if self.metrics is not None:
+            self.metrics.retire(device_id)
+        settings = self.settings.pop(device_id, EnforcementSettings())
+        kind = "stopped"
+        if park:
+            self.parked[device_id] = settings
+            kind = "parked"
+        elif pause:
+            self.paused[device_id] = settings
+            kind = "paused"
+        self.post(EnforcementEvent(kind, settings.target, device_id=device_id))
+
+    def _pause(self, device_id: str) -> None:
+        if device_id in self.parked:
+            self.paused[device_id] = self.parked.pop(device_id)
+            self.post(EnforcementEvent("paused", self.paused[device_id].target, device_id=device_id))
+        elif device_id in self.enforcers:
+            self._stop_enforcer(device_id, pause=True)
+
+    def _configure(self, device_id: str, settings: EnforcementSettings) -> None:
+        enforcer = self.enforcers.get(device_id)
+        if enforcer is None:
+            for held in (self.parked, self.paused):
+                if device_id in held:
+                    held[device_id] = settings
+            return
+        previous = self.settings[device_id]
+        self.settings[device_id] = settings
+        enforcer.set_target(settings.target)
+        enforcer.tolerance = settings.tolerance
+        if self.rules is not None:
+            self._apply_rules(device_id)
+        if settings.contention != previous.contention:
+            enforcer.contention = _contention_guard(settings.contention)
+        if settings.instant != previous.instant:
+            enforcer.stop()
+            enforcer.notifications = self._volume_notifications(settings)
+            enforcer.start(enforce=False)
+        if settings.activity_gated and not previous.activity_gated:
+            self._watch_activity(device_id)
+        elif previous.activity_gated and not settings.activity_gated:
+            self._unwatch_activity(device_id)
+            self._set_activity(device_id, True)
+        self._schedule(device_id, keep_earlier=True)
+
+    def _tick(self, device_id: str, deadline: float) -> None:
+        with self.profiler.span("enforce", device=device_id):
+            if self.rules is not None:
+                self._apply_rules(device_id)
+            if device_id not in self.hands_off:
+                self.enforcers[device_id].enforce()
+                self._after_enforcement(device_id)
+            self._schedule(device_id, anchor=deadline)
+
+    def _apply_rules(self, device_id: str) -> bool:
+        """Point the enforcer at whatever rule holds now; returns whether the rule changed."""
+        enforcer = self.enforcers[device_id]
+        rule = self.rules.evaluate(device_id, self.processes.get(device_id, frozenset()))
+        target = self.settings[device_id].target if rule is None or rule.target is None else rule.target
+        enforcer.set_target(target)
+        if rule is self.rule_for.get(device_id):
+            return False
+        if rule is None:
+            del self.rule_for[device_id]
+        else:
+            self.rule_for[device_id] = rule
+        if rule is not None and rule.hands_off:
+            self.hands_off.add(device_id)
+        else:
+            self.hands_off.discard(device_id)
+        self.post(EnforcementEvent("rule", target, rule.describe() if rule else "", payload=rule, device_id=device_id))
+        return True
+
+    def _follow_rules(self, device_id: str) -> None:
+        """Re-check the rules after the capturing applications changed; enforce a new target at once."""
+        if not self._apply_rules(device_id) or device_id in self.hands_off or device_id in self.idle:
+            return
+        enforcer = self.enforcers[device_id]
+        enforcer.backoff.reset()
+        enforcer.enforce()
+        self._after_enforcement(device_id)
+        self._schedule(device_id)
+
+    def _after_enforcement(self, device_id: str) -> None:
+        enforcer = self.enforcers.get(device_id)
+        if enforcer is None:
+            return
+        if device_id in self._failed:
+            if not self.retry_failures or self.registry.get(device_id) is None:
+                self._stop_enforcer(device_id, park=self.registry.get(device_id) is None)
+                return
+            self._failed.discard(device_id)
+            enforcer.backoff.grow()  # try again later, waiting longer after each failure in a row
+        self.post(
+            EnforcementEvent(
+                "stats",
+                enforcer.target,
+                payload=dataclasses.replace(enforcer.stats),
+                device_id=device_id,
+            )
+        )
+
+    def _schedule(self, device_id: str, anchor: Optional[float] = None, keep_earlier: bool = False) -> None:
+        """Arm the next check on an absolute monotonic deadline.
+
+        After a tick, ``anchor`` is the deadline that just fired, so the next
+        one is computed from it rather than from when the work finished.
+        """
+        enforcer = self.enforcers.get(device_id)
+        if enforcer is None or device_id in self.idle:
+            return
+        interval = self.settings[device_id].interval
+        if enforcer.notifying:
+            interval = max(interval, SAFETY_NET_SECONDS)
+        enforcer.backoff.configure(interval, MAX_BACKOFF_SECONDS)
+        interval = enforcer.backoff.current
+        now = self.clock()
+        if anchor is None:
+            deadline = now + interval
+        else:
+            deadline, missed = advance(anchor, interval, now)
+            enforcer.stats.missed_ticks += missed
+        current = self.scheduler.deadline(device_id)
+        if keep_earlier and current is not None:
+            deadline = min(deadline, current)
+        self.scheduler.schedule(device_id, deadline)
+        self.post(EnforcementEvent("scheduled", enforcer.target, payload=interval, device_id=device_id))
+
+    def _set_profiling(self, enabled: bool) -> None:
+        """Start a fresh profile, or stop collecting; endpoint proxies only exist while it runs."""
+        profiler = self.profiler
+        if enabled and not profiler.enabled:
+            profiler.clear()
+        profiler.enabled = enabled
+        for device_id, enforcer in self.enforcers.items():
+            endpoint_volume = enforcer.endpoint_volume
+            if isinstance(endpoint_volume, ProfiledEndpointVolume):
+                endpoint_volume = endpoint_volume.inner
+            enforcer.endpoint_volume = profiler.wrap(device_id, endpoint_volume) if enabled else endpoint_volume
+
+    def _watch_meter(self, device_id: Optional[str]) -> None:
+        """Sample ``device_id``'s peak meter until asked to stop (``None``)."""
+        self.scheduler.cancel(METER_KEY)
+        self._meter_device = self._meter_read = None
+        device = self.registry.get(device_id) if device_id is not None else None
+        if self.meter is None or device is None:
+            return
+        from .meter import PeakRing
+
+        try:
+            ring = PeakRing()  # before opening, so a missing NumPy never activates the COM meter
+        except RuntimeError as exc:
+            self.post(EnforcementEvent("meter-unavailable", 0.0, str(exc), device_id=device_id))
+            return
+        try:
+            self._meter_read = self.meter.open(device)
+        except Exception as exc:  # noqa: BLE001
+            self.post(EnforcementEvent("meter-unavailable", 0.0, str(exc), device_id=device_id))
+            return
+        self.meter_ring = ring
+        self._meter_device = device_id
+        self._meter_samples = 0
+        self.scheduler.schedule(METER_KEY, self.clock() + METER_INTERVAL_SECONDS)
+
+    def _sample_meter(self, deadline: float) -> None:
+        ring, read = self.meter_ring, self._meter_read
+        if ring is None or read is None:
+            return
+        try:
+            ring.append(read())
+        except Exception as exc:  # noqa: BLE001
+            self.post(EnforcementEvent("meter-unavailable", 0.0, str(exc), device_id=self._meter_device or ""))
+            self._meter_device = self._meter_read = None
+            return
+        self._meter_samples += 1
+        if self._meter_samples % METER_REPORT_SAMPLES == 0:
+            stats = ring.stats(METER_WINDOW_SAMPLES)
+            self.post(EnforcementEvent("meter", stats.current, payload=stats, device_id=self._meter_device or ""))
+        next_deadline, _missed = advance(deadline, METER_INTERVAL_SECONDS, self.clock())
+        self.scheduler.schedule(METER_KEY, next_deadline)
+
+    def _watch_activity(self, device_id: str) -> None:
+        device = self.registry.get(device_id)
+        if self.activity is None or device is None or device_id in self._unwatch:
+            return
+
+        def changed(active: bool) -> None:
+            self.commands.put(WorkerCommand("activity", (device_id, active)))
+
+        try:
+            self._unwatch[device_id] = self.activity.watch(device, changed)
+        except Exception as exc:  # noqa: BLE001
+            self.post(
+                EnforcementEvent(
+                    "activity-unavailable",
+                    self.settings[device_id].target,
+                    f"Cannot see capture sessions, polling continuously: {exc}",
+                    device_id=device_id,
+                )
+            )
+
+    def _unwatch_activity(self, device_id: str) -> None:
+        unwatch = self._unwatch.pop(device_id, None)
+        if unwatch is None:
+            return
+        try:
+            unwatch()
+        except Exception:  # noqa: BLE001
+            pass
+
+    def _set_activity(self, device_id: str, active: bool) -> None:
+        """Suspend polling while idle; enforce at once when capture starts."""
+        enforcer = self.enforcers.get(device_id)
+        if enforcer is None or active == (device_id not in self.idle):
+            return
+        self.post(EnforcementEvent("activity", enforcer.target, payload=active, device_id=device_id))
+        if not active:
+            self.idle.add(device_id)
+            self.scheduler.cancel(device_id)
+            return
+        self.idle.discard(device_id)
+        enforcer.backoff.reset()
+        if device_id not in self.hands_off:
+            enforcer.enforce()
+            self._after_enforcement(device_id)
+        self._schedule(device_id)
+
+    def _watch_sessions(self, device_id: str) -> None:
+        device = self.registry.get(device_id)
+        if self.sessions is None or device is None or device_id in self._session_watches:
+            return
+        # The first report comes from inside watch(); take it directly so the
+        # rules see the capturing applications before the first write. Reports
+        # arrive on COM threads, so the switch to queueing them happens under
+        # a lock: each one is either in ``initial`` or queued, never lost.
+        handoff = threading.Lock()
+        initial: List[FrozenSet[str]] = []
+        live: List[bool] = []
+
+        def changed(processes: FrozenSet[str]) -> None:
+            with handoff:
+                if not live:
+                    initial.append(frozenset(processes))
+                    return
+            self.commands.put(WorkerCommand("sessions", (device_id, frozenset(processes))))
+
+        try:
+            self._session_watches[device_id] = self.sessions.watch(device, changed)
+        except Exception as exc:  # noqa: BLE001
+            self.post(
+                EnforcementEvent(
+                    "sessions-unavailable",
+                    self.settings[device_id].target,
+                    f"Cannot see which applications are capturing; only device and time rules apply: {exc}",
+                    device_id=device_id,
+                )
+            )
+            return
+        with handoff:
+            live.append(True)
+            if initial:
+                self.processes[device_id] = initial[-1]
+
+    def _unwatch_sessions(self, device_id: str) -> None:
+        unwatch = self._session_watches.pop(device_id, None)
+        if unwatch is None:
+            return
+        try:
+            unwatch()
+        except Exception:  # noqa: BLE001
+            pass
+
+    def _on_event(self, event: EnforcementEvent) -> None:
+        if event.kind == "error":
+            self._failed.add(event.device_id)
+        self.post(event)
+
+
+def _contention_guard(strategy: str) -> Optional[ContentionGuard]:
+    return None if strategy == "off" else ContentionGuard(strategy)